@@ -0,0 +1,66 @@
+"""
+Time the COPY ingestion path of new grids.
+
+The execute_values upserts it replaced were removed with the re-import
+path; to compare against them, run this benchmark from commit f26764c.
+
+Requires a reachable PostgreSQL configured like the API. Every run happens
+inside a transaction that is rolled back, so the database is left untouched.
+
+    cd electra-app
+    python -m benchmarks.ingest_benchmark 1000 10000 100000
+"""
+import sys
+import time
+from db.db import get_conn
+from repositories import buses_repo, lines_repo, loads_repo
+from repositories.migrations import apply_migrations
+
+
+def synthetic_model(n_elements: int) -> dict:
+    n_buses = max(2, n_elements // 2)
+    n_lines = max(1, n_elements // 4)
+    n_loads = max(1, n_elements - n_buses - n_lines)
+    buses = [
+        {"idtag": f"bus{i}", "name": f"Bus {i}", "Vnom": 20.0, "Vm0": 1.0, "Va0": 0.0, "active": True,
+         "active_prof": [1.0] * 24}
+        for i in range(n_buses)
+    ]
+    lines = [
+        {"idtag": f"line{i}", "name": f"Line {i}", "bus_from": f"bus{i % n_buses}", "bus_to": f"bus{(i + 1) % n_buses}",
+         "active": True, "R": 0.01, "X": 0.05, "B": 0.001, "rate": 100.0}
+        for i in range(n_lines)
+    ]
+    loads = [
+        {"idtag": f"load{i}", "name": f"Load {i}", "bus": f"bus{i % n_buses}", "active": True, "P": 1.5, "Q": 0.3}
+        for i in range(n_loads)
+    ]
+    return {"bus": buses, "line": lines, "load": loads}
+
+
+def run(n_elements: int) -> float:
+    md = synthetic_model(n_elements)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO grids (name) VALUES (%s) RETURNING id;", (f"bench-{n_elements}",))
+            grid_id = cur.fetchone()["id"]
+        start = time.perf_counter()
+        for repo, items in ((buses_repo, md["bus"]), (loads_repo, md["load"]), (lines_repo, md["line"])):
+            repo.copy_insert(conn, grid_id, items)
+        return time.perf_counter() - start
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def main(sizes: list[int]) -> None:
+    apply_migrations()
+    print(f"{'elements':>10} {'copy [s]':>10} {'rows/s':>10}")
+    for n in sizes:
+        t_copy = run(n)
+        print(f"{n:>10} {t_copy:>10.3f} {n / t_copy:>10.0f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,89 @@
+"""
+Compare response encoding: stdlib json + jsonable_encoder vs orjson.
+
+Uses synthetic power-flow DataFrames and element list rows, so no database
+or grid file is needed.
+
+    cd electra-app
+    python -m benchmarks.serialization_benchmark 1000 10000 100000
+"""
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from services.serialization import dumps, df_records
+
+
+def synthetic_results(n_buses: int):
+    rng = np.random.default_rng(0)
+    n_branches = int(n_buses * 1.3)
+    bus_df = pd.DataFrame(
+        {
+            "Vm": rng.uniform(0.95, 1.05, n_buses),
+            "Va": rng.uniform(-0.3, 0.3, n_buses),
+            "P": rng.normal(0, 10, n_buses),
+            "Q": rng.normal(0, 3, n_buses),
+        },
+        index=[f"Bus {i}" for i in range(n_buses)],
+    )
+    branch_df = pd.DataFrame(
+        {c: rng.normal(0, 10, n_branches) for c in ("Pf", "Qf", "Pt", "Qt", "loading", "Ploss", "Qloss")},
+        index=[f"Branch {i}" for i in range(n_branches)],
+    )
+    # Open branches report NaN loadings
+    branch_df.iloc[::50, branch_df.columns.get_loc("loading")] = np.nan
+    return bus_df, branch_df
+
+
+def synthetic_rows(n_rows: int) -> list:
+    scalars = {f"col{i}": float(i) for i in range(70)}
+    return [
+        {"id": i, "grid_id": 1, "idtag": f"tr{i}", "name": f"Transformer {i}", "active": True,
+         **scalars, "active_prof": [1.0] * 24, "rate_prof": [100.0] * 24}
+        for i in range(n_rows)
+    ]
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def power_flow_stdlib(bus_df, branch_df) -> bytes:
+    payload = {
+        "bus_results": json.loads(bus_df.rename_axis("name").reset_index().to_json(orient="records")),
+        "branch_results": json.loads(branch_df.rename_axis("name").reset_index().to_json(orient="records")),
+    }
+    return json.dumps(jsonable_encoder(payload)).encode("utf-8")
+
+
+def power_flow_orjson(bus_df, branch_df) -> bytes:
+    return dumps({"bus_results": df_records(bus_df), "branch_results": df_records(branch_df)})
+
+
+def list_stdlib(rows) -> bytes:
+    return json.dumps(jsonable_encoder(rows)).encode("utf-8")
+
+
+def main(sizes) -> None:
+    print(f"{'payload':<12}{'size':>10}{'stdlib (s)':>14}{'orjson (s)':>14}{'speed-up':>10}")
+    for n in sizes:
+        bus_df, branch_df = synthetic_results(n)
+        old = _time(lambda: power_flow_stdlib(bus_df, branch_df))
+        new = _time(lambda: power_flow_orjson(bus_df, branch_df))
+        print(f"{'power flow':<12}{n:>10}{old:>14.4f}{new:>14.4f}{old / new:>9.1f}x")
+
+        rows = synthetic_rows(n)
+        old = _time(lambda: list_stdlib(rows))
+        new = _time(lambda: dumps(rows))
+        print(f"{'list':<12}{n:>10}{old:>14.4f}{new:>14.4f}{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
@@ -1,9 +1,14 @@
 import os
 import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
+from db.pool import ConnectionPool
 
 
 _file = Path(__file__).resolve()
@@ -56,6 +61,141 @@ def _get_conn_from_parts():
     )
 
 
-def get_conn():
-    
-    return _get_conn_from_parts()
+_pool: Optional[ConnectionPool] = None
+_lock_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+# Connection bound by transaction() for the current request/thread context
+_current_conn: ContextVar = ContextVar("electra_db_conn", default=None)
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _get_conn_from_parts,
+                    min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+                    max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                    idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+                    checkout_timeout=float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "30")),
+                    health_check_after=float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "5")),
+                )
+    return _pool
+
+
+def get_lock_pool() -> ConnectionPool:
+    """Connections that hold session-level grid advisory locks (services.grid_locks).
+
+    A lock is held for a whole solve, so these are kept apart from the request
+    pool: long solves can never starve ordinary queries of connections.
+    """
+    global _lock_pool
+    if _lock_pool is None:
+        with _pool_lock:
+            if _lock_pool is None:
+                _lock_pool = ConnectionPool(
+                    _get_conn_from_parts,
+                    min_size=0,
+                    max_size=int(os.getenv("GRID_LOCK_MAX_CONNECTIONS", "16")),
+                    idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+                    checkout_timeout=float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "30")),
+                    health_check_after=float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "5")),
+                )
+    return _lock_pool
+
+
+def close_pool() -> None:
+    global _pool, _lock_pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        if _lock_pool is not None:
+            _lock_pool.close()
+            _lock_pool = None
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+class PooledConnection:
+    """Proxy around a pooled psycopg2 connection.
+
+    ``close()`` hands the connection back to the pool instead of closing the
+    socket. Handles borrowed from an enclosing ``transaction()`` do not own the
+    connection: their ``commit``/``rollback``/``close`` are deferred to it.
+    """
+
+    __slots__ = ("_pool", "_conn", "_owned", "_released")
+
+    def __init__(self, pool: ConnectionPool, conn, owned: bool):
+        self._pool = pool
+        self._conn = conn
+        self._owned = owned
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def commit(self) -> None:
+        if self._owned:
+            self._conn.commit()
+
+    def rollback(self) -> None:
+        if self._owned:
+            self._conn.rollback()
+
+    def close(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        if self._owned:
+            self._pool.putconn(self._conn)
+
+
+def get_conn() -> PooledConnection:
+    """Check out a connection; call ``close()`` to return it to the pool.
+
+    Inside ``transaction()`` the connection bound to the current context is
+    shared instead, so every repository call joins the same transaction.
+    """
+    shared = _current_conn.get()
+    if shared is not None:
+        return PooledConnection(get_pool(), shared, owned=False)
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn(), owned=True)
+
+
+@contextmanager
+def transaction():
+    """Share one pooled connection and transaction across repository calls.
+
+    Commits when the block exits normally and rolls back on error. Nested
+    calls reuse the outermost transaction.
+    """
+    shared = _current_conn.get()
+    pool = get_pool()
+    if shared is not None:
+        yield PooledConnection(pool, shared, owned=False)
+        return
+    conn = pool.getconn()
+    token = _current_conn.set(conn)
+    try:
+        yield PooledConnection(pool, conn, owned=False)
+        conn.commit()
+    except BaseException:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        _current_conn.reset(token)
+        pool.putconn(conn)
@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when a connection is requested from a pool that was closed."""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of psycopg2 connections.
+
+    Idle connections are reused LIFO so the warmest socket is handed out first,
+    pruned after ``idle_timeout`` seconds (never below ``min_size``) and pinged
+    on checkout when they have been idle longer than ``health_check_after``.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], "extensions.connection"],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        checkout_timeout: float = 30.0,
+        health_check_after: float = 5.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool bounds: min_size={min_size}, max_size={max_size}")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle: list[tuple[extensions.connection, float]] = []
+        self._in_use = 0
+        self._closed = False
+
+        self._created = 0
+        self._reused = 0
+        self._discarded = 0
+        self._waits = 0
+        self._timeouts = 0
+
+    # ------------------------------------------------------------------ #
+    # Checkout / return
+    # ------------------------------------------------------------------ #
+
+    def getconn(self, timeout: Optional[float] = None):
+        deadline = time.monotonic() + (self.checkout_timeout if timeout is None else timeout)
+        conn = None
+        last_used = 0.0
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("Connection pool is closed")
+                self._prune_idle_locked()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolExhaustedError(
+                        f"No database connection available after waiting "
+                        f"{self.checkout_timeout if timeout is None else timeout:.1f}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._waits += 1
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and not self._is_healthy(conn, last_used):
+                self._close_quietly(conn)
+                with self._cond:
+                    self._discarded += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._created += 1
+            else:
+                with self._cond:
+                    self._reused += 1
+            return conn
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        if not discard and not conn.closed:
+            try:
+                # Leave the connection outside any transaction (read-only repos never commit)
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                self._discarded += 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    # ------------------------------------------------------------------ #
+    # Lifecycle
+    # ------------------------------------------------------------------ #
+
+    def warm(self) -> None:
+        """Open connections up to ``min_size`` so the first requests skip the handshake."""
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) + self._in_use >= self.min_size:
+                    return
+                self._in_use += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._created += 1
+                self._in_use -= 1
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "created": self._created,
+                "reused": self._reused,
+                "discarded": self._discarded,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "closed": self._closed,
+            }
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+
+    def _prune_idle_locked(self) -> None:
+        if not self._idle or self.idle_timeout <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        total = len(self._idle) + self._in_use
+        keep = []
+        # Oldest connections sit at the front of the list
+        for conn, last_used in self._idle:
+            if last_used < cutoff and total > self.min_size:
+                self._discarded += 1
+                self._close_quietly(conn)
+                total -= 1
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+                cur.fetchone()
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.info(f"Discarding stale pooled connection: {e}")
+            return False
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
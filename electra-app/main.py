@@ -1,11 +1,48 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import grid, bus, load, generator, shunt, transformer2w, line, health
+from db.db import get_pool, close_pool
+from repositories.migrations import apply_migrations
+from services.circuit_cache import circuit_cache
+from services.jobs import fail_stale_jobs
+from services.workers import shutdown_pools
+from services.storage import UploadSizeLimit
+from services.serialization import ORJSONResponse
+from routes import grid, bus, load, generator, shunt, transformer2w, line, health, jobs
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        get_pool().warm()
+    except Exception as e:
+        logger.warning(f"Could not warm database connection pool: {e}")
+    # Schema DDL runs once here so request paths never touch the catalog
+    applied = apply_migrations()
+    if applied:
+        logger.info(f"Applied schema migrations: {applied}")
+    try:
+        lost = fail_stale_jobs()
+        if lost:
+            logger.warning(f"Marked {lost} unfinished jobs older than the job timeout as failed")
+    except Exception as e:
+        logger.warning(f"Could not check for lost jobs: {e}")
+    yield
+    shutdown_pools()
+    # Write back circuits modified since the last flush
+    circuit_cache.shutdown()
+    close_pool()
+
 
 app = FastAPI(
     title="Electra API",
     description="Backend API para la aplicación Electra",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -14,8 +51,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-After-Id",
+        "X-Total-Count",
+        "X-Power-Flow-Converged",
+        "X-Power-Flow-State-Hash",
+        "X-Power-Flow-Cached",
+        "X-Power-Flow-Iterations",
+        "X-Power-Flow-Warm-Start",
+        "X-Time-Series-Steps",
+        "X-Time-Series-Seconds",
+    ],
 )
 
+
+# Oversized uploads are refused while they arrive, before the multipart body is spooled
+app.add_middleware(UploadSizeLimit)
+
+
 app.include_router(grid.router, prefix="/grid", tags=["grid"])
 app.include_router(bus.router, prefix="/bus", tags=["bus"])
 app.include_router(load.router, prefix="/load", tags=["load"])
@@ -23,4 +76,5 @@ app.include_router(generator.router, prefix="/generator", tags=["generator"])
 app.include_router(shunt.router, prefix="/shunt", tags=["shunt"])
 app.include_router(transformer2w.router, prefix="/transformer2w", tags=["transformer2w"])
 app.include_router(line.router, prefix="/line", tags=["line"]) 
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 app.include_router(health.router, prefix="/health", tags=["health"]) 
@@ -1,6 +1,7 @@
 """
 Repository package initializer.
 
-This package contains per-model repositories responsible for their own
-schema (CREATE TABLE) and bulk upsert operations.
+This package contains per-model repositories responsible for their queries
+and bulk COPY loading. The schema is applied once at startup by
+repositories.migrations, starting from the frozen repositories.baseline_schema.
 """
@@ -0,0 +1,32 @@
+from psycopg2 import errors
+
+# First key of every grid lock; the second one is the grid id
+GRID_LOCK_NAMESPACE = 4211
+
+
+class AdvisoryLockTimeout(RuntimeError):
+    """Raised when a session-level advisory lock could not be taken in time."""
+
+
+def lock_grid(conn, grid_id: int, exclusive: bool, timeout: float) -> None:
+    """Take a session-level advisory lock on a grid, waiting at most timeout seconds.
+
+    conn must be a dedicated connection kept until unlock_grid() is called.
+    """
+    fn = "pg_advisory_lock" if exclusive else "pg_advisory_lock_shared"
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT set_config('lock_timeout', %s, false);", (f"{int(timeout * 1000)}ms",))
+            cur.execute(f"SELECT {fn}(%s, %s);", (GRID_LOCK_NAMESPACE, grid_id))
+        conn.commit()
+    except errors.LockNotAvailable as e:
+        conn.rollback()
+        raise AdvisoryLockTimeout(f"Grid {grid_id} is locked by another worker") from e
+
+
+def unlock_grid(conn, grid_id: int, exclusive: bool) -> None:
+    fn = "pg_advisory_unlock" if exclusive else "pg_advisory_unlock_shared"
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT {fn}(%s, %s);", (GRID_LOCK_NAMESPACE, grid_id))
+        cur.execute("RESET lock_timeout;")
+    conn.commit()
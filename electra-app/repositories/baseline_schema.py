@@ -0,0 +1,587 @@
+"""
+Frozen DDL of schema version 1: the grid and element tables as the app
+created them before migrations were versioned.
+
+Never edit these statements. Schema changes go into a new migration, so a
+fresh database and an upgraded one run exactly the same steps. The ALTERs
+bring tables created by even older releases up to the same version 1.
+"""
+
+BASELINE_DDL = (
+    # grids
+    """
+    CREATE TABLE IF NOT EXISTS grids (
+        id SERIAL PRIMARY KEY,
+        name TEXT,
+        base_mva DOUBLE PRECISION,
+        raw_json JSONB,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+    """,
+    "ALTER TABLE grids ADD COLUMN IF NOT EXISTS tmp_file_path TEXT;",
+    # buses
+    """
+    CREATE TABLE IF NOT EXISTS buses (
+        id SERIAL PRIMARY KEY,
+        grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+        idtag TEXT NOT NULL,
+        name TEXT,
+        code TEXT,
+        vnom DOUBLE PRECISION,
+        vm0 DOUBLE PRECISION,
+        va0 DOUBLE PRECISION,
+        vmin DOUBLE PRECISION,
+        vmax DOUBLE PRECISION,
+        vm_cost DOUBLE PRECISION,
+        angle_min DOUBLE PRECISION,
+        angle_max DOUBLE PRECISION,
+        angle_cost DOUBLE PRECISION,
+        r_fault DOUBLE PRECISION,
+        x_fault DOUBLE PRECISION,
+        x DOUBLE PRECISION,
+        y DOUBLE PRECISION,
+        longitude DOUBLE PRECISION,
+        latitude DOUBLE PRECISION,
+        is_slack BOOLEAN,
+        active BOOLEAN,
+        is_dc BOOLEAN,
+        graphic_type TEXT,
+        h DOUBLE PRECISION,
+        w DOUBLE PRECISION,
+        country TEXT,
+        area TEXT,
+        zone TEXT,
+        substation TEXT,
+        voltage_level TEXT,
+        bus_bar TEXT,
+        ph_a BOOLEAN,
+        ph_b BOOLEAN,
+        ph_c BOOLEAN,
+        ph_n BOOLEAN,
+        is_grounded BOOLEAN,
+        active_prof JSONB,
+        vmin_prof JSONB,
+        vmax_prof JSONB,
+        UNIQUE (grid_id, idtag)
+    );
+    """,
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS grid_id INTEGER;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS vmin DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS vmax DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS vm_cost DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS angle_min DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS angle_max DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS angle_cost DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS r_fault DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS x_fault DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS active BOOLEAN;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS is_dc BOOLEAN;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS graphic_type TEXT;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS h DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS w DOUBLE PRECISION;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS country TEXT;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS area TEXT;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS zone TEXT;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS substation TEXT;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS voltage_level TEXT;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS bus_bar TEXT;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS ph_a BOOLEAN;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS ph_b BOOLEAN;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS ph_c BOOLEAN;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS ph_n BOOLEAN;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS is_grounded BOOLEAN;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS active_prof JSONB;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS vmin_prof JSONB;",
+    "ALTER TABLE buses ADD COLUMN IF NOT EXISTS vmax_prof JSONB;",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            WHERE c.conname = 'fk_buses_grid'
+              AND t.relname = 'buses'
+        ) THEN
+            ALTER TABLE buses
+            ADD CONSTRAINT fk_buses_grid
+            FOREIGN KEY (grid_id) REFERENCES grids(id) ON DELETE CASCADE;
+        END IF;
+    END$$;
+    """,
+    # loads
+    """
+    CREATE TABLE IF NOT EXISTS loads (
+        id SERIAL PRIMARY KEY,
+        grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+        idtag TEXT NOT NULL,
+        name TEXT,
+        code TEXT,
+        bus_idtag TEXT NOT NULL,
+        active BOOLEAN,
+        p DOUBLE PRECISION,
+        q DOUBLE PRECISION,
+        conn TEXT,
+        longitude DOUBLE PRECISION,
+        latitude DOUBLE PRECISION,
+        UNIQUE (grid_id, idtag),
+        FOREIGN KEY (grid_id, bus_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE
+    );
+    """,
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS grid_id INTEGER;",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            WHERE c.conname = 'fk_loads_grid'
+              AND t.relname = 'loads'
+        ) THEN
+            ALTER TABLE loads
+            ADD CONSTRAINT fk_loads_grid
+            FOREIGN KEY (grid_id) REFERENCES grids(id) ON DELETE CASCADE;
+        END IF;
+    END$$;
+    """,
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS rdfid TEXT;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS action TEXT;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS comment TEXT;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS modelling_authority TEXT;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS commissioned_date BIGINT;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS decommissioned_date BIGINT;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS active_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS mttf DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS mttr DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS capex DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS opex DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS build_status TEXT;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS cost DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS cost_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS facility TEXT;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS technologies JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS scalable BOOLEAN;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS shift_key DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS shift_key_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS use_kw BOOLEAN;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS rms_model JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS bus_pos INTEGER;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS p_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS pa DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS pa_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS pb DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS pb_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS pc DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS pc_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS q_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS qa DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS qa_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS qb DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS qb_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS qc DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS qc_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ir DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ir_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ir1 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ir1_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ir2 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ir2_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ir3 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ir3_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ii DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ii_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ii1 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ii1_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ii2 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ii2_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ii3 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS ii3_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS g DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS g_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS g1 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS g1_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS g2 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS g2_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS g3 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS g3_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS b DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS b_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS b1 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS b1_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS b2 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS b2_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS b3 DOUBLE PRECISION;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS b3_prof JSONB;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS n_customers INTEGER;",
+    "ALTER TABLE loads ADD COLUMN IF NOT EXISTS n_customers_prof JSONB;",
+    # generators
+    """
+    CREATE TABLE IF NOT EXISTS generators (
+        id SERIAL PRIMARY KEY,
+        grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+        idtag TEXT NOT NULL,
+        name TEXT,
+        code TEXT,
+        bus_idtag TEXT NOT NULL,
+        active BOOLEAN,
+        p DOUBLE PRECISION,
+        vset DOUBLE PRECISION,
+        qmin DOUBLE PRECISION,
+        qmax DOUBLE PRECISION,
+        pf DOUBLE PRECISION,
+        UNIQUE (grid_id, idtag),
+        FOREIGN KEY (grid_id, bus_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE
+    );
+    """,
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS grid_id INTEGER;",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            WHERE c.conname = 'fk_generators_grid'
+              AND t.relname = 'generators'
+        ) THEN
+            ALTER TABLE generators
+            ADD CONSTRAINT fk_generators_grid
+            FOREIGN KEY (grid_id) REFERENCES grids(id) ON DELETE CASCADE;
+        END IF;
+    END$$;
+    """,
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS rdfid TEXT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS action TEXT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS comment TEXT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS modelling_authority TEXT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS commissioned_date BIGINT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS decommissioned_date BIGINT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS active_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS mttf DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS mttr DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS capex DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS opex DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS build_status TEXT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS cost DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS cost_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS facility TEXT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS technologies JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS scalable BOOLEAN;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS shift_key DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS shift_key_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS use_kw BOOLEAN;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS conn TEXT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS rms_model JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS bus_pos INTEGER;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS control_bus TEXT;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS control_bus_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS p_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS pmin DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS pmin_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS pmax DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS pmax_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS srap_enabled BOOLEAN;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS srap_enabled_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS is_controlled BOOLEAN;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS pf_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS vset_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS snom DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS qmin_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS qmax_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS use_reactive_power_curve BOOLEAN;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS q_curve JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS r1 DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS x1 DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS r0 DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS x0 DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS r2 DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS x2 DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS cost2 DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS cost2_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS cost0 DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS cost0_prof JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS startupcost DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS shutdowncost DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS mintimeup DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS mintimedown DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS rampup DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS rampdown DOUBLE PRECISION;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS enabled_dispatch BOOLEAN;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS emissions JSONB;",
+    "ALTER TABLE generators ADD COLUMN IF NOT EXISTS fuels JSONB;",
+    # shunts
+    """
+    CREATE TABLE IF NOT EXISTS shunts (
+        id SERIAL PRIMARY KEY,
+        grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+        idtag TEXT NOT NULL,
+        name TEXT,
+        code TEXT,
+        bus_idtag TEXT NOT NULL,
+        active BOOLEAN,
+        b DOUBLE PRECISION,
+        UNIQUE (grid_id, idtag),
+        FOREIGN KEY (grid_id, bus_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE
+    );
+    """,
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS grid_id INTEGER;",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            WHERE c.conname = 'fk_shunts_grid'
+              AND t.relname = 'shunts'
+        ) THEN
+            ALTER TABLE shunts
+            ADD CONSTRAINT fk_shunts_grid
+            FOREIGN KEY (grid_id) REFERENCES grids(id) ON DELETE CASCADE;
+        END IF;
+    END$$;
+    """,
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS rdfid TEXT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS action TEXT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS comment TEXT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS modelling_authority TEXT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS commissioned_date BIGINT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS decommissioned_date BIGINT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS active_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS mttf DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS mttr DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS capex DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS opex DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS build_status TEXT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS cost DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS cost_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS facility TEXT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS technologies JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS scalable BOOLEAN;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS shift_key DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS shift_key_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS use_kw BOOLEAN;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS conn TEXT;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS rms_model JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS bus_pos INTEGER;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS g DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS g_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS g0 DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS g0_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS ga DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS ga_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS gb DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS gb_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS gc DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS gc_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS b_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS b0 DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS b0_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS ba DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS ba_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS bb DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS bb_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS bc DOUBLE PRECISION;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS bc_prof JSONB;",
+    "ALTER TABLE shunts ADD COLUMN IF NOT EXISTS ysh JSONB;",
+    # transformers2w
+    """
+    CREATE TABLE IF NOT EXISTS transformers2w (
+        id SERIAL PRIMARY KEY,
+        grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+        idtag TEXT NOT NULL,
+        name TEXT,
+        code TEXT,
+        bus_from_idtag TEXT NOT NULL,
+        bus_to_idtag TEXT NOT NULL,
+        active BOOLEAN,
+        r DOUBLE PRECISION,
+        x DOUBLE PRECISION,
+        g DOUBLE PRECISION,
+        b DOUBLE PRECISION,
+        hv DOUBLE PRECISION,
+        lv DOUBLE PRECISION,
+        sn DOUBLE PRECISION,
+        UNIQUE (grid_id, idtag),
+        FOREIGN KEY (grid_id, bus_from_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE,
+        FOREIGN KEY (grid_id, bus_to_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE
+    );
+    """,
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS grid_id INTEGER;",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            WHERE c.conname = 'fk_transformers2w_grid'
+              AND t.relname = 'transformers2w'
+        ) THEN
+            ALTER TABLE transformers2w
+            ADD CONSTRAINT fk_transformers2w_grid
+            FOREIGN KEY (grid_id) REFERENCES grids(id) ON DELETE CASCADE;
+        END IF;
+    END$$;
+    """,
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS rdfid TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS action TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS comment TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS modelling_authority TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS commissioned_date DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS decommissioned_date DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS active_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS reducible BOOLEAN;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS rate DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS rate_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS contingency_factor DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS contingency_factor_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS protection_rating_factor DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS protection_rating_factor_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS monitor_loading BOOLEAN;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS mttf DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS mttr DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS cost DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS cost_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS build_status TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS capex DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS opex DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tx_group TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS color TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS rms_model JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS bus_from_pos DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS bus_to_pos DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS r0 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS x0 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS g0 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS b0 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS r2 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS x2 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS g2 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS b2 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tolerance DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_changer JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_module DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_module_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_module_max DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_module_min DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_module_control_mode TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_module_control_mode_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS vset DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS vset_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS qset DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS qset_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS regulation_bus TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_phase DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_phase_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_phase_max DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_phase_min DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_phase_control_mode TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS tap_phase_control_mode_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS pset DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS pset_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS temp_base DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS temp_oper DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS temp_oper_prof JSONB;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS alpha DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS pcu DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS pfe DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS i0 DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS vsc DOUBLE PRECISION;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS conn TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS conn_f TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS conn_t TEXT;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS vector_group_number INTEGER;",
+    "ALTER TABLE transformers2w ADD COLUMN IF NOT EXISTS template TEXT;",
+    # lines
+    """
+    CREATE TABLE IF NOT EXISTS lines (
+        id SERIAL PRIMARY KEY,
+        grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+        idtag TEXT NOT NULL,
+        name TEXT,
+        code TEXT,
+        bus_from_idtag TEXT NOT NULL,
+        bus_to_idtag TEXT NOT NULL,
+        active BOOLEAN,
+        r DOUBLE PRECISION,
+        x DOUBLE PRECISION,
+        b DOUBLE PRECISION,
+        length DOUBLE PRECISION,
+        UNIQUE (grid_id, idtag),
+        FOREIGN KEY (grid_id, bus_from_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE,
+        FOREIGN KEY (grid_id, bus_to_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE
+    );
+    """,
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS grid_id INTEGER;",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            WHERE c.conname = 'fk_lines_grid'
+              AND t.relname = 'lines'
+        ) THEN
+            ALTER TABLE lines
+            ADD CONSTRAINT fk_lines_grid
+            FOREIGN KEY (grid_id) REFERENCES grids(id) ON DELETE CASCADE;
+        END IF;
+    END$$;
+    """,
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS rdfid TEXT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS action TEXT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS comment TEXT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS modelling_authority TEXT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS commissioned_date BIGINT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS decommissioned_date BIGINT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS active_prof JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS reducible BOOLEAN;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS rate DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS rate_prof JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS contingency_factor DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS contingency_factor_prof JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS protection_rating_factor DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS protection_rating_factor_prof JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS monitor_loading BOOLEAN;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS mttf DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS mttr DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS cost DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS cost_prof JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS build_status TEXT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS capex DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS opex DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS line_group TEXT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS color TEXT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS rms_model JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS bus_from_pos INTEGER;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS bus_to_pos INTEGER;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS r0 DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS x0 DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS b0 DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS r2 DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS x2 DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS b2 DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS ys JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS ysh JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS tolerance DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS circuit_idx INTEGER;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS temp_base DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS temp_oper DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS temp_oper_prof JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS alpha DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS r_fault DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS x_fault DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS fault_pos DOUBLE PRECISION;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS template TEXT;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS locations JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS possible_tower_types JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS possible_underground_line_types JSONB;",
+    "ALTER TABLE lines ADD COLUMN IF NOT EXISTS possible_sequence_line_types JSONB;",
+)
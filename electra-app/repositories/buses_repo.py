@@ -1,105 +1,23 @@
-from psycopg2.extras import execute_values, Json
+from typing import Iterator, List, Optional
+from psycopg2.extras import Json
 from db.db import get_conn
+from .copy_util import copy_merge
+from .element_status_repo import BASE_STATUS
+from .pagination import list_page, stream_rows, DEFAULT_LIMIT
 
+COLUMNS = (
+    "grid_id", "idtag", "name", "code", "vnom", "vm0", "va0", "vmin", "vmax", "vm_cost",
+    "angle_min", "angle_max", "angle_cost", "r_fault", "x_fault", "x", "y", "longitude", "latitude",
+    "is_slack", "active", "is_dc", "graphic_type", "h", "w", "country", "area", "zone",
+    "substation", "voltage_level", "bus_bar", "ph_a", "ph_b", "ph_c", "ph_n", "is_grounded",
+    "active_prof", "vmin_prof", "vmax_prof",
+)
 
-def ensure_schema(conn) -> None:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS buses (
-                id SERIAL PRIMARY KEY,
-                grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
-                idtag TEXT NOT NULL,
-                name TEXT,
-                code TEXT,
-                vnom DOUBLE PRECISION,
-                vm0 DOUBLE PRECISION,
-                va0 DOUBLE PRECISION,
-                vmin DOUBLE PRECISION,
-                vmax DOUBLE PRECISION,
-                vm_cost DOUBLE PRECISION,
-                angle_min DOUBLE PRECISION,
-                angle_max DOUBLE PRECISION,
-                angle_cost DOUBLE PRECISION,
-                r_fault DOUBLE PRECISION,
-                x_fault DOUBLE PRECISION,
-                x DOUBLE PRECISION,
-                y DOUBLE PRECISION,
-                longitude DOUBLE PRECISION,
-                latitude DOUBLE PRECISION,
-                is_slack BOOLEAN,
-                active BOOLEAN,
-                is_dc BOOLEAN,
-                graphic_type TEXT,
-                h DOUBLE PRECISION,
-                w DOUBLE PRECISION,
-                country TEXT,
-                area TEXT,
-                zone TEXT,
-                substation TEXT,
-                voltage_level TEXT,
-                bus_bar TEXT,
-                ph_a BOOLEAN,
-                ph_b BOOLEAN,
-                ph_c BOOLEAN,
-                ph_n BOOLEAN,
-                is_grounded BOOLEAN,
-                active_prof JSONB,
-                vmin_prof JSONB,
-                vmax_prof JSONB,
-                UNIQUE (grid_id, idtag)
-            );
-            """
-        )
-        # Add columns if they don't exist (for existing databases)
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS grid_id INTEGER;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS vmin DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS vmax DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS vm_cost DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS angle_min DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS angle_max DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS angle_cost DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS r_fault DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS x_fault DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS active BOOLEAN;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS is_dc BOOLEAN;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS graphic_type TEXT;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS h DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS w DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS country TEXT;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS area TEXT;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS zone TEXT;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS substation TEXT;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS voltage_level TEXT;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS bus_bar TEXT;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS ph_a BOOLEAN;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS ph_b BOOLEAN;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS ph_c BOOLEAN;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS ph_n BOOLEAN;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS is_grounded BOOLEAN;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS active_prof JSONB;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS vmin_prof JSONB;")
-        cur.execute("ALTER TABLE buses ADD COLUMN IF NOT EXISTS vmax_prof JSONB;")
-        cur.execute("""
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1
-                FROM pg_constraint c
-                JOIN pg_class t ON t.oid = c.conrelid
-                WHERE c.conname = 'fk_buses_grid'
-                  AND t.relname = 'buses'
-            ) THEN
-                ALTER TABLE buses
-                ADD CONSTRAINT fk_buses_grid
-                FOREIGN KEY (grid_id) REFERENCES grids(id) ON DELETE CASCADE;
-            END IF;
-        END$$;
-        """)
-    conn.commit()
+# Fields that list endpoints may project
+LIST_FIELDS = ("id",) + COLUMNS
 
 
-def upsert(conn, grid_id: int, buses: list[dict]) -> int:
+def _rows(grid_id: int, buses: list[dict]) -> list[tuple]:
     rows = []
     for b in (buses or []):
         if not b.get("idtag"):
@@ -150,66 +68,22 @@ def upsert(conn, grid_id: int, buses: list[dict]) -> int:
                 (Json(vmaxp) if vmaxp is not None else None),
             )
         )
+    return rows
+
+
+def copy_insert(conn, grid_id: int, buses: list[dict]) -> int:
+    """Bulk insert for a grid that has no buses yet: COPY into a staging table and merge once."""
+    rows = _rows(grid_id, buses)
     if not rows:
         return 0
     with conn.cursor() as cur:
-        execute_values(
-            cur,
-            """
-            INSERT INTO buses (
-                grid_id, idtag, name, code, vnom, vm0, va0, vmin, vmax, vm_cost, angle_min, angle_max, angle_cost, r_fault, x_fault,
-                x, y, longitude, latitude, is_slack, active, is_dc, graphic_type, h, w, country, area, zone, substation, voltage_level,
-                bus_bar, ph_a, ph_b, ph_c, ph_n, is_grounded, active_prof, vmin_prof, vmax_prof
-            ) VALUES %s
-            ON CONFLICT (grid_id, idtag) DO UPDATE SET
-                name = EXCLUDED.name,
-                code = EXCLUDED.code,
-                vnom = EXCLUDED.vnom,
-                vm0 = EXCLUDED.vm0,
-                va0 = EXCLUDED.va0,
-                vmin = EXCLUDED.vmin,
-                vmax = EXCLUDED.vmax,
-                vm_cost = EXCLUDED.vm_cost,
-                angle_min = EXCLUDED.angle_min,
-                angle_max = EXCLUDED.angle_max,
-                angle_cost = EXCLUDED.angle_cost,
-                r_fault = EXCLUDED.r_fault,
-                x_fault = EXCLUDED.x_fault,
-                x = EXCLUDED.x,
-                y = EXCLUDED.y,
-                longitude = EXCLUDED.longitude,
-                latitude = EXCLUDED.latitude,
-                is_slack = EXCLUDED.is_slack,
-                active = EXCLUDED.active,
-                is_dc = EXCLUDED.is_dc,
-                graphic_type = EXCLUDED.graphic_type,
-                h = EXCLUDED.h,
-                w = EXCLUDED.w,
-                country = EXCLUDED.country,
-                area = EXCLUDED.area,
-                zone = EXCLUDED.zone,
-                substation = EXCLUDED.substation,
-                voltage_level = EXCLUDED.voltage_level,
-                bus_bar = EXCLUDED.bus_bar,
-                ph_a = EXCLUDED.ph_a,
-                ph_b = EXCLUDED.ph_b,
-                ph_c = EXCLUDED.ph_c,
-                ph_n = EXCLUDED.ph_n,
-                is_grounded = EXCLUDED.is_grounded,
-                active_prof = EXCLUDED.active_prof,
-                vmin_prof = EXCLUDED.vmin_prof,
-                vmax_prof = EXCLUDED.vmax_prof
-            """,
-            rows,
-        )
-    return len(rows)
+        return copy_merge(cur, "buses", COLUMNS, rows, derived=BASE_STATUS)
 
 
 def get_bus_by_id(bus_id: int):
     """Return a single bus row by its primary key id, or None if not found."""
     conn = get_conn()
     try:
-        ensure_schema(conn)
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -227,32 +101,30 @@ def get_bus_by_id(bus_id: int):
         conn.close()
 
 
-def list_buses():
-    """Return all buses as a list of rows (dicts when using RealDictCursor)."""
-    conn = get_conn()
-    try:
-        ensure_schema(conn)
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, grid_id, idtag, name, code, vnom, vm0, va0, vmin, vmax, vm_cost, angle_min, angle_max, angle_cost, r_fault, x_fault,
-                       x, y, longitude, latitude, is_slack, active, is_dc, graphic_type, h, w, country, area, zone, substation, voltage_level,
-                       bus_bar, ph_a, ph_b, ph_c, ph_n, is_grounded, active_prof, vmin_prof, vmax_prof
-                FROM buses
-                ORDER BY id;
-                """
-            )
-            rows = cur.fetchall()
-            return rows
-    finally:
-        conn.close()
+def list_buses(
+    grid_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = DEFAULT_LIMIT,
+    fields: Optional[List[str]] = None,
+    include_total: bool = False,
+) -> dict:
+    """Return one keyset page of buses ordered by id (see pagination.list_page)."""
+    return list_page("buses", LIST_FIELDS, grid_id, after_id, limit, fields, include_total)
+
+
+def stream_buses(
+    grid_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Iterator[dict]:
+    """Iterate over buses ordered by id through a server-side cursor."""
+    return stream_rows("buses", LIST_FIELDS, grid_id, after_id, fields)
 
 
 def update_bus_status(bus_id: int, active: bool):
     """Update the active status of a bus."""
     conn = get_conn()
     try:
-        ensure_schema(conn)
         with conn.cursor() as cur:
             cur.execute(
                 """
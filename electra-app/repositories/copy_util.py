@@ -0,0 +1,99 @@
+"""
+Streaming helper for COPY ... FROM STDIN in PostgreSQL text format.
+
+Rows are encoded lazily while psycopg2 reads from the buffer, so large
+tables are never materialized as one big string.
+"""
+import io
+import json
+import math
+from typing import Iterable, Sequence, Tuple
+from psycopg2.extras import Json
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _encode(val) -> str:
+    if val is None:
+        return "\\N"
+    if isinstance(val, bool):
+        return "t" if val else "f"
+    if isinstance(val, (bytes, bytearray, memoryview)):
+        # bytea hex input; the backslash itself is escaped for COPY
+        return "\\\\x" + bytes(val).hex()
+    if isinstance(val, Json):
+        val = val.adapted
+    if isinstance(val, (dict, list, tuple)):
+        return json.dumps(val).translate(_ESCAPES)
+    if isinstance(val, float):
+        if math.isnan(val):
+            return "NaN"
+        if math.isinf(val):
+            return "Infinity" if val > 0 else "-Infinity"
+        return repr(val)
+    return str(val).translate(_ESCAPES)
+
+
+class _RowStream(io.RawIOBase):
+    def __init__(self, rows: Iterable[Sequence]):
+        self._rows = iter(rows)
+        self._buf = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while len(self._buf) < len(b):
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                break
+            self._buf += ("\t".join(_encode(v) for v in row) + "\n").encode("utf-8")
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        del self._buf[:n]
+        return n
+
+
+def copy_rows(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence], size: int = 1 << 16) -> None:
+    """COPY rows (tuples ordered like columns) into table using the given cursor."""
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        io.BufferedReader(_RowStream(rows), buffer_size=size),
+        size=size,
+    )
+
+
+def copy_merge(
+    cur,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    key: Sequence[str] = ("grid_id", "idtag"),
+    derived: Sequence[Tuple[str, str]] = (),
+) -> int:
+    """COPY rows into a temporary staging table, then insert them into table in one statement.
+
+    Duplicate keys inside the payload are collapsed so the merge never trips
+    the table's unique constraint; the first row of each key wins, as in
+    profiles_repo.split_profiles. derived (column, source) pairs fill extra
+    columns of table from a staged column. Returns the number of inserted rows.
+    """
+    stage = f"_stage_{table}"
+    cols = ", ".join(columns)
+    targets = ", ".join([*columns, *(column for column, _ in derived)])
+    sources = ", ".join([*columns, *(source for _, source in derived)])
+    keys = ", ".join(key)
+    cur.execute(f"DROP TABLE IF EXISTS {stage};")
+    cur.execute(
+        f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+        f"SELECT {cols}, 0::bigint AS _ordinal FROM {table} WITH NO DATA;"
+    )
+    # Each row carries its position in the payload so the duplicate kept is deterministic
+    copy_rows(cur, stage, (*columns, "_ordinal"), ((*row, i) for i, row in enumerate(rows)))
+    cur.execute(
+        f"INSERT INTO {table} ({targets}) SELECT DISTINCT ON ({keys}) {sources} FROM {stage} ORDER BY {keys}, _ordinal;"
+    )
+    inserted = cur.rowcount
+    cur.execute(f"DROP TABLE {stage};")
+    return inserted
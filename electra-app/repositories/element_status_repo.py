@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from db.db import get_conn
+
+# (element_type, table) pairs for every element kind that carries an active flag
+ELEMENT_TABLES = (
+    ("bus", "buses"),
+    ("generator", "generators"),
+    ("load", "loads"),
+    ("shunt", "shunts"),
+    ("line", "lines"),
+    ("transformer2w", "transformers2w"),
+)
+TABLE_BY_TYPE = dict(ELEMENT_TABLES)
+
+# Elements switched off together with their bus
+BUS_CASCADE = ("generator", "load", "shunt")
+
+# base_active keeps the status an element had in the uploaded file
+BASE_STATUS = (("base_active", "active"),)
+
+
+def ensure_schema(conn) -> None:
+    with conn.cursor() as cur:
+        # Covering indexes so grid-scoped status reads are index-only scans
+        for _, table in ELEMENT_TABLES:
+            cur.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_grid_idtag_active "
+                f"ON {table} (grid_id, idtag) INCLUDE (active);"
+            )
+
+
+def add_base_status(conn) -> None:
+    # Rows loaded before this column existed keep NULL: their file status is unknown
+    with conn.cursor() as cur:
+        for _, table in ELEMENT_TABLES:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS base_active BOOLEAN;")
+
+
+_STATUS_QUERY = "\nUNION ALL\n".join(
+    f"SELECT '{element_type}' AS element_type, idtag, active FROM {table} WHERE grid_id = %(grid_id)s"
+    for element_type, table in ELEMENT_TABLES
+) + ";"
+
+
+def list_element_status(grid_id: int) -> List[dict]:
+    """Return (element_type, idtag, active) rows of every element of one grid in a single round trip."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_STATUS_QUERY, {"grid_id": grid_id})
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+
+def update_status_batch(
+    grid_id: int,
+    element_type: str,
+    items: Sequence[Tuple[Optional[int], Optional[str], bool]],
+) -> List[dict]:
+    """Set active on many elements of one type and grid with UPDATE ... FROM (VALUES ...).
+
+    Items are (id, idtag, active) with exactly one of id or idtag given. Items
+    keyed by id and by idtag are applied by two separate UPDATEs, each joining
+    on a single indexed key. Returns the updated (id, idtag, active) rows.
+    """
+    by_id = [(id_, active) for id_, _, active in items if id_ is not None]
+    by_idtag = [(idtag, active) for id_, idtag, active in items if id_ is None]
+    table = sql.Identifier(TABLE_BY_TYPE[element_type])
+    conn = get_conn()
+    try:
+        rows = []
+        with conn.cursor() as cur:
+            for key, cast, values in (("id", "integer", by_id), ("idtag", "text", by_idtag)):
+                if not values:
+                    continue
+                query = sql.SQL(
+                    """
+                    UPDATE {table} AS t SET active = v.active
+                    FROM (VALUES %s) AS v(key, active)
+                    WHERE t.grid_id = {grid_id} AND t.{key} = v.key
+                    RETURNING t.id, t.idtag, t.active;
+                    """
+                ).format(table=table, grid_id=sql.Literal(grid_id), key=sql.Identifier(key))
+                rows += execute_values(
+                    cur,
+                    query,
+                    values,
+                    template=f"(%s::{cast}, %s::boolean)",
+                    page_size=max(1, len(values)),
+                    fetch=True,
+                )
+        conn.commit()
+        return rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def cascade_bus_deactivation(grid_id: int, bus_idtags: Sequence[str]) -> Dict[str, List[str]]:
+    """Deactivate the generators, loads and shunts of the given buses; returns their idtags per type."""
+    deactivated: Dict[str, List[str]] = {}
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            for element_type in BUS_CASCADE:
+                cur.execute(
+                    sql.SQL(
+                        "UPDATE {table} SET active = FALSE "
+                        "WHERE grid_id = %s AND bus_idtag = ANY(%s) RETURNING idtag;"
+                    ).format(table=sql.Identifier(TABLE_BY_TYPE[element_type])),
+                    (grid_id, list(bus_idtags)),
+                )
+                idtags = [row["idtag"] for row in cur.fetchall()]
+                if idtags:
+                    deactivated[element_type] = idtags
+        conn.commit()
+        return deactivated
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
@@ -1,71 +1,76 @@
 import json
-from typing import Dict, Any
-from db.db import get_conn
-from . import grids_repo, buses_repo, loads_repo, generators_repo, shunts_repo, transformers2w_repo, lines_repo
+from typing import Dict, Any, Optional
+from db.db import transaction
+from . import grids_repo, payloads_repo, profiles_repo, buses_repo, loads_repo, generators_repo, shunts_repo, transformers2w_repo, lines_repo
 
 
-def _ensure_schema(conn) -> None:
-    grids_repo.ensure_schema(conn)
-    buses_repo.ensure_schema(conn)
-    loads_repo.ensure_schema(conn)
-    generators_repo.ensure_schema(conn)
-    shunts_repo.ensure_schema(conn)
-    transformers2w_repo.ensure_schema(conn)
-    lines_repo.ensure_schema(conn)
-
-
-def save_grid_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
-    conn = get_conn()
-    try:
-        _ensure_schema(conn)
+def save_grid_payload(payload: Dict[str, Any], file_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Persist a gathered model as a new grid.
 
+    A new grid cannot conflict with existing rows, so its elements are bulk
+    loaded with COPY.
+    """
+    # insert_grid and the per-table writes join this single transaction
+    with transaction() as conn:
         name = payload.get("name")
         base_mva = payload.get("baseMVA")
-        raw_json = json.dumps(payload)
 
         # The payload may include a tmp_file_path field to be stored alongside the grid
         tmp_file_path = payload.get("tmp_file_path")
-        grid_id = grids_repo.insert_grid(name, base_mva, raw_json, tmp_file_path)
+        grid_id = grids_repo.insert_grid(name, base_mva, tmp_file_path, file_hash)
+
+        # The full gathered model is kept compressed in its own table, if at all
+        if payloads_repo.STORE_RAW_PAYLOAD:
+            payloads_repo.save_payload(grid_id, json.dumps(payload).encode("utf-8"))
 
         md = (payload.get("model_data") or {})
+        # Numeric profiles go to element_profiles as packed arrays, not JSONB
+        profile_rows = []
 
         # Buses
-        buses = md.get("bus") or []
+        buses, rows = profiles_repo.split_profiles(grid_id, "bus", md.get("bus") or [])
+        profile_rows += rows
         buses_saved = 0
         if buses:
-            buses_saved = buses_repo.upsert(conn, grid_id, buses)
+            buses_saved = buses_repo.copy_insert(conn, grid_id, buses)
 
         # Loads
-        loads = md.get("load") or []
+        loads, rows = profiles_repo.split_profiles(grid_id, "load", md.get("load") or [])
+        profile_rows += rows
         loads_saved = 0
         if loads:
-            loads_saved = loads_repo.upsert(conn, grid_id, loads)
+            loads_saved = loads_repo.copy_insert(conn, grid_id, loads)
 
         # Generators
-        generators = md.get("generator") or []
+        generators, rows = profiles_repo.split_profiles(grid_id, "generator", md.get("generator") or [])
+        profile_rows += rows
         generators_saved = 0
         if generators:
-            generators_saved = generators_repo.upsert(conn, grid_id, generators)
+            generators_saved = generators_repo.copy_insert(conn, grid_id, generators)
 
         # Shunts
-        shunts = md.get("shunt") or []
+        shunts, rows = profiles_repo.split_profiles(grid_id, "shunt", md.get("shunt") or [])
+        profile_rows += rows
         shunts_saved = 0
         if shunts:
-            shunts_saved = shunts_repo.upsert(conn, grid_id, shunts)
+            shunts_saved = shunts_repo.copy_insert(conn, grid_id, shunts)
 
         # Transformers 2W
-        trafos = md.get("transformer2w") or []
+        trafos, rows = profiles_repo.split_profiles(grid_id, "transformer2w", md.get("transformer2w") or [])
+        profile_rows += rows
         transformers2w_saved = 0
         if trafos:
-            transformers2w_saved = transformers2w_repo.upsert(conn, grid_id, trafos)
+            transformers2w_saved = transformers2w_repo.copy_insert(conn, grid_id, trafos)
 
         # Lines
-        lines = md.get("line") or []
+        lines, rows = profiles_repo.split_profiles(grid_id, "line", md.get("line") or [])
+        profile_rows += rows
         lines_saved = 0
         if lines:
-            lines_saved = lines_repo.upsert(conn, grid_id, lines)
+            lines_saved = lines_repo.copy_insert(conn, grid_id, lines)
+
+        profiles_repo.copy_insert(conn, profile_rows)
 
-        conn.commit()
         return {
             "grid_id": grid_id,
             "buses_saved": buses_saved,
@@ -75,8 +80,63 @@ def save_grid_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
             "transformers2w_saved": transformers2w_saved,
             "lines_saved": lines_saved,
         }
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+
+
+# Element tables in foreign-key order with the key of their count in the ingest result
+_ELEMENT_REPOS = (
+    ("buses", buses_repo, "buses_saved"),
+    ("loads", loads_repo, "loads_saved"),
+    ("generators", generators_repo, "generators_saved"),
+    ("shunts", shunts_repo, "shunts_saved"),
+    ("transformers2w", transformers2w_repo, "transformers2w_saved"),
+    ("lines", lines_repo, "lines_saved"),
+)
+
+
+def clone_grid(source_grid_id: int, tmp_file_path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Copy a stored grid and all its elements into a new grid, server side.
+
+    The copies get the statuses of the uploaded file (base_active), not any
+    status changes made to the source grid since. Returns the same counts as
+    save_grid_payload, or None when the source grid no longer exists or was
+    loaded before base statuses were recorded.
+    """
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT "
+                + " OR ".join(
+                    f"EXISTS (SELECT 1 FROM {table} WHERE grid_id = %(grid_id)s AND base_active IS NULL AND active IS NOT NULL)"
+                    for table, _, _ in _ELEMENT_REPOS
+                )
+                + " AS missing;",
+                {"grid_id": source_grid_id},
+            )
+            if cur.fetchone()["missing"]:
+                return None
+            cur.execute(
+                """
+                INSERT INTO grids (name, base_mva, tmp_file_path, file_hash)
+                SELECT name, base_mva, %s, file_hash FROM grids WHERE id = %s
+                RETURNING id;
+                """,
+                (tmp_file_path, source_grid_id),
+            )
+            row = cur.fetchone()
+            if not row:
+                return None
+            grid_id = row["id"]
+            payloads_repo.copy_payload(source_grid_id, grid_id)
+            result = {"grid_id": grid_id}
+            for table, repo, key in _ELEMENT_REPOS:
+                # COLUMNS starts with grid_id, which is replaced by the new grid
+                columns = [*repo.COLUMNS[1:], "base_active"]
+                values = ["base_active" if column == "active" else column for column in columns]
+                cur.execute(
+                    f"INSERT INTO {table} (grid_id, {', '.join(columns)}) "
+                    f"SELECT %s, {', '.join(values)} FROM {table} WHERE grid_id = %s;",
+                    (grid_id, source_grid_id),
+                )
+                result[key] = cur.rowcount
+            profiles_repo.copy_grid_profiles(cur, source_grid_id, grid_id)
+        return result
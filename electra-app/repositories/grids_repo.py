@@ -2,31 +2,25 @@ from typing import List, Optional
 from db.db import get_conn
 
 
-def ensure_schema(conn) -> None:
+def add_file_hash(conn) -> None:
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS grids (
-                id SERIAL PRIMARY KEY,
-                name TEXT,
-                base_mva DOUBLE PRECISION,
-                raw_json JSONB,
-                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-            );
-            """
-        )
-        cur.execute("ALTER TABLE grids ADD COLUMN IF NOT EXISTS tmp_file_path TEXT;")
-    conn.commit()
+        # SHA-256 of the uploaded file, used to recognise re-uploads
+        cur.execute("ALTER TABLE grids ADD COLUMN IF NOT EXISTS file_hash TEXT;")
+        cur.execute("CREATE INDEX IF NOT EXISTS ix_grids_file_hash ON grids (file_hash, id);")
 
 
-def insert_grid(name: Optional[str], base_mva: Optional[float], raw_json: str, tmp_file_path: Optional[str] = None) -> int:
+def insert_grid(
+    name: Optional[str],
+    base_mva: Optional[float],
+    tmp_file_path: Optional[str] = None,
+    file_hash: Optional[str] = None,
+) -> int:
     conn = get_conn()
     try:
-        ensure_schema(conn)
         with conn.cursor() as cur:
             cur.execute(
-                "INSERT INTO grids (name, base_mva, raw_json, tmp_file_path) VALUES (%s, %s, %s, %s) RETURNING id;",
-                (name, base_mva, raw_json, tmp_file_path),
+                "INSERT INTO grids (name, base_mva, tmp_file_path, file_hash) VALUES (%s, %s, %s, %s) RETURNING id;",
+                (name, base_mva, tmp_file_path, file_hash),
             )
             row = cur.fetchone()
             if isinstance(row, dict):
@@ -45,7 +39,6 @@ def insert_grid(name: Optional[str], base_mva: Optional[float], raw_json: str, t
 def list_grid_ids() -> List[int]:
     conn = get_conn()
     try:
-        ensure_schema(conn)
         with conn.cursor() as cur:
             cur.execute("SELECT id FROM grids ORDER BY created_at DESC, id DESC;")
             rows = cur.fetchall()
@@ -57,7 +50,6 @@ def list_grid_ids() -> List[int]:
 def get_tmp_file_path(grid_id: int) -> Optional[str]:
     conn = get_conn()
     try:
-        ensure_schema(conn)
         with conn.cursor() as cur:
             cur.execute("SELECT tmp_file_path FROM grids WHERE id = %s;", (grid_id,))
             row = cur.fetchone()
@@ -70,10 +62,28 @@ def get_tmp_file_path(grid_id: int) -> Optional[str]:
         conn.close()
 
 
+def find_grid_by_hash(file_hash: str) -> Optional[int]:
+    """Return the most recent grid uploaded from a file with this SHA-256, if any."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id FROM grids WHERE file_hash = %s ORDER BY id DESC LIMIT 1;",
+                (file_hash,),
+            )
+            row = cur.fetchone()
+            if not row:
+                return None
+            if isinstance(row, dict):
+                return row.get("id")
+            return row[0]
+    finally:
+        conn.close()
+
+
 def delete_grid(grid_id: int) -> None:
     conn = get_conn()
     try:
-        ensure_schema(conn)
         with conn.cursor() as cur:
             cur.execute("DELETE FROM grids WHERE id = %s;", (grid_id,))
         conn.commit()
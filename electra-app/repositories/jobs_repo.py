@@ -0,0 +1,116 @@
+from typing import Any, Callable, Optional
+from psycopg2.extras import Json
+from db.db import get_conn
+
+
+def ensure_schema(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                grid_id INTEGER REFERENCES grids(id) ON DELETE CASCADE,
+                status TEXT NOT NULL,
+                params JSONB,
+                result JSONB,
+                error TEXT,
+                submitted_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                started_at TIMESTAMPTZ,
+                finished_at TIMESTAMPTZ
+            );
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS ix_jobs_grid_id ON jobs (grid_id);")
+
+
+def create_job(job_id: str, kind: str, grid_id: Optional[int], params: Optional[dict] = None) -> None:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO jobs (id, kind, grid_id, status, params) VALUES (%s, %s, %s, 'queued', %s);",
+                (job_id, kind, grid_id, Json(params) if params is not None else None),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _set_status(job_id: str, status: str, sql_set: str, params: tuple) -> None:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"UPDATE jobs SET status = %s, {sql_set} WHERE id = %s;",
+                (status, *params, job_id),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def mark_running(job_id: str) -> None:
+    _set_status(job_id, "running", "started_at = NOW()", ())
+
+
+def mark_succeeded(job_id: str, result: Any, dumps: Optional[Callable[[Any], str]] = None) -> None:
+    """Store a job result; dumps overrides the JSON encoder (json.dumps by default)."""
+    _set_status(job_id, "succeeded", "result = %s, finished_at = NOW()", (Json(result, dumps=dumps),))
+
+
+def mark_failed(job_id: str, error: str) -> None:
+    _set_status(job_id, "failed", "error = %s, finished_at = NOW()", (error,))
+
+
+def fail_unfinished(job_id: str, error: str) -> bool:
+    """Mark a job failed unless it already finished; returns whether it was updated."""
+    return fail_stale_jobs(0, error, job_id=job_id) > 0
+
+
+def fail_stale_jobs(max_age_seconds: float, error: str, job_id: Optional[str] = None) -> int:
+    """Fail queued/running jobs submitted (or started) more than max_age_seconds ago; returns how many."""
+    query = """
+        UPDATE jobs SET status = 'failed', error = %s, finished_at = NOW()
+        WHERE status IN ('queued', 'running')
+          AND COALESCE(started_at, submitted_at) <= NOW() - make_interval(secs => %s)
+    """
+    params: list = [error, max_age_seconds]
+    if job_id is not None:
+        query += " AND id = %s"
+        params.append(job_id)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query + ";", params)
+            count = cur.rowcount
+        conn.commit()
+        return count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def get_job(job_id: str, include_result: bool = True):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT id, kind, grid_id, status, params, {"result" if include_result else "NULL AS result"}, error,
+                       submitted_at, started_at, finished_at
+                FROM jobs WHERE id = %s;
+                """,
+                (job_id,),
+            )
+            return cur.fetchone()
+    finally:
+        conn.close()
@@ -1,102 +1,27 @@
-from psycopg2.extras import execute_values, Json
+from typing import Iterator, List, Optional
+from psycopg2.extras import Json
 from db.db import get_conn
+from .copy_util import copy_merge
+from .element_status_repo import BASE_STATUS
+from .pagination import list_page, stream_rows, DEFAULT_LIMIT
 
+COLUMNS = (
+    "grid_id", "idtag", "name", "code", "bus_from_idtag", "bus_to_idtag", "active", "r", "x", "b",
+    "length", "rdfid", "action", "comment", "modelling_authority", "commissioned_date",
+    "decommissioned_date", "active_prof", "reducible", "rate", "rate_prof", "contingency_factor",
+    "contingency_factor_prof", "protection_rating_factor", "protection_rating_factor_prof",
+    "monitor_loading", "mttf", "mttr", "cost", "cost_prof", "build_status", "capex", "opex",
+    "line_group", "color", "rms_model", "bus_from_pos", "bus_to_pos", "r0", "x0", "b0", "r2", "x2",
+    "b2", "ys", "ysh", "tolerance", "circuit_idx", "temp_base", "temp_oper", "temp_oper_prof",
+    "alpha", "r_fault", "x_fault", "fault_pos", "template", "locations", "possible_tower_types",
+    "possible_underground_line_types", "possible_sequence_line_types",
+)
 
-def ensure_schema(conn) -> None:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS lines (
-                id SERIAL PRIMARY KEY,
-                grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
-                idtag TEXT NOT NULL,
-                name TEXT,
-                code TEXT,
-                bus_from_idtag TEXT NOT NULL,
-                bus_to_idtag TEXT NOT NULL,
-                active BOOLEAN,
-                r DOUBLE PRECISION,
-                x DOUBLE PRECISION,
-                b DOUBLE PRECISION,
-                length DOUBLE PRECISION,
-                UNIQUE (grid_id, idtag),
-                FOREIGN KEY (grid_id, bus_from_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE,
-                FOREIGN KEY (grid_id, bus_to_idtag) REFERENCES buses(grid_id, idtag) ON DELETE CASCADE
-            );
-            """
-        )
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS grid_id INTEGER;")
-        cur.execute("""
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1
-                FROM pg_constraint c
-                JOIN pg_class t ON t.oid = c.conrelid
-                WHERE c.conname = 'fk_lines_grid'
-                  AND t.relname = 'lines'
-            ) THEN
-                ALTER TABLE lines
-                ADD CONSTRAINT fk_lines_grid
-                FOREIGN KEY (grid_id) REFERENCES grids(id) ON DELETE CASCADE;
-            END IF;
-        END$$;
-        """)
-        
-        # Add extended fields
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS rdfid TEXT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS action TEXT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS comment TEXT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS modelling_authority TEXT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS commissioned_date BIGINT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS decommissioned_date BIGINT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS active_prof JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS reducible BOOLEAN;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS rate DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS rate_prof JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS contingency_factor DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS contingency_factor_prof JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS protection_rating_factor DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS protection_rating_factor_prof JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS monitor_loading BOOLEAN;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS mttf DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS mttr DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS cost DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS cost_prof JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS build_status TEXT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS capex DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS opex DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS line_group TEXT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS color TEXT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS rms_model JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS bus_from_pos INTEGER;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS bus_to_pos INTEGER;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS r0 DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS x0 DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS b0 DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS r2 DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS x2 DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS b2 DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS ys JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS ysh JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS tolerance DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS circuit_idx INTEGER;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS temp_base DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS temp_oper DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS temp_oper_prof JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS alpha DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS r_fault DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS x_fault DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS fault_pos DOUBLE PRECISION;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS template TEXT;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS locations JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS possible_tower_types JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS possible_underground_line_types JSONB;")
-        cur.execute("ALTER TABLE lines ADD COLUMN IF NOT EXISTS possible_sequence_line_types JSONB;")
-    conn.commit()
+# Fields that list endpoints may project
+LIST_FIELDS = ("id",) + COLUMNS
 
 
-def upsert(conn, grid_id: int, lines: list[dict]) -> int:
+def _rows(grid_id: int, lines: list[dict]) -> list[tuple]:
     def adapt(val):
         """Wrap dict/list in Json() to ensure proper JSONB adaptation."""
         if isinstance(val, (dict, list)):
@@ -169,92 +94,21 @@ def upsert(conn, grid_id: int, lines: list[dict]) -> int:
         for ln in (lines or [])
         if ln.get("idtag") and ln.get("bus_from") and ln.get("bus_to")
     ]
+    return rows
+
+
+def copy_insert(conn, grid_id: int, lines: list[dict]) -> int:
+    """Bulk insert for a grid that has no lines yet: COPY into a staging table and merge once."""
+    rows = _rows(grid_id, lines)
     if not rows:
         return 0
     with conn.cursor() as cur:
-        execute_values(
-            cur,
-            """
-            INSERT INTO lines (
-                grid_id, idtag, name, code, bus_from_idtag, bus_to_idtag, active,
-                r, x, b, length,
-                rdfid, action, comment, modelling_authority, commissioned_date, decommissioned_date,
-                active_prof, reducible, rate, rate_prof, contingency_factor, contingency_factor_prof,
-                protection_rating_factor, protection_rating_factor_prof, monitor_loading, mttf, mttr,
-                cost, cost_prof, build_status, capex, opex, line_group, color, rms_model,
-                bus_from_pos, bus_to_pos, r0, x0, b0, r2, x2, b2, ys, ysh, tolerance, circuit_idx,
-                temp_base, temp_oper, temp_oper_prof, alpha, r_fault, x_fault, fault_pos, template,
-                locations, possible_tower_types, possible_underground_line_types, possible_sequence_line_types
-            ) VALUES %s
-            ON CONFLICT (grid_id, idtag) DO UPDATE SET
-                name = EXCLUDED.name,
-                code = EXCLUDED.code,
-                bus_from_idtag = EXCLUDED.bus_from_idtag,
-                bus_to_idtag = EXCLUDED.bus_to_idtag,
-                active = EXCLUDED.active,
-                r = EXCLUDED.r,
-                x = EXCLUDED.x,
-                b = EXCLUDED.b,
-                length = EXCLUDED.length,
-                rdfid = EXCLUDED.rdfid,
-                action = EXCLUDED.action,
-                comment = EXCLUDED.comment,
-                modelling_authority = EXCLUDED.modelling_authority,
-                commissioned_date = EXCLUDED.commissioned_date,
-                decommissioned_date = EXCLUDED.decommissioned_date,
-                active_prof = EXCLUDED.active_prof,
-                reducible = EXCLUDED.reducible,
-                rate = EXCLUDED.rate,
-                rate_prof = EXCLUDED.rate_prof,
-                contingency_factor = EXCLUDED.contingency_factor,
-                contingency_factor_prof = EXCLUDED.contingency_factor_prof,
-                protection_rating_factor = EXCLUDED.protection_rating_factor,
-                protection_rating_factor_prof = EXCLUDED.protection_rating_factor_prof,
-                monitor_loading = EXCLUDED.monitor_loading,
-                mttf = EXCLUDED.mttf,
-                mttr = EXCLUDED.mttr,
-                cost = EXCLUDED.cost,
-                cost_prof = EXCLUDED.cost_prof,
-                build_status = EXCLUDED.build_status,
-                capex = EXCLUDED.capex,
-                opex = EXCLUDED.opex,
-                line_group = EXCLUDED.line_group,
-                color = EXCLUDED.color,
-                rms_model = EXCLUDED.rms_model,
-                bus_from_pos = EXCLUDED.bus_from_pos,
-                bus_to_pos = EXCLUDED.bus_to_pos,
-                r0 = EXCLUDED.r0,
-                x0 = EXCLUDED.x0,
-                b0 = EXCLUDED.b0,
-                r2 = EXCLUDED.r2,
-                x2 = EXCLUDED.x2,
-                b2 = EXCLUDED.b2,
-                ys = EXCLUDED.ys,
-                ysh = EXCLUDED.ysh,
-                tolerance = EXCLUDED.tolerance,
-                circuit_idx = EXCLUDED.circuit_idx,
-                temp_base = EXCLUDED.temp_base,
-                temp_oper = EXCLUDED.temp_oper,
-                temp_oper_prof = EXCLUDED.temp_oper_prof,
-                alpha = EXCLUDED.alpha,
-                r_fault = EXCLUDED.r_fault,
-                x_fault = EXCLUDED.x_fault,
-                fault_pos = EXCLUDED.fault_pos,
-                template = EXCLUDED.template,
-                locations = EXCLUDED.locations,
-                possible_tower_types = EXCLUDED.possible_tower_types,
-                possible_underground_line_types = EXCLUDED.possible_underground_line_types,
-                possible_sequence_line_types = EXCLUDED.possible_sequence_line_types
-            """,
-            rows,
-        )
-    return len(rows)
+        return copy_merge(cur, "lines", COLUMNS, rows, derived=BASE_STATUS)
 
 
 def get_line_by_id(line_id: int):
     """Return line by its internal ID."""
     conn = get_conn()
-    ensure_schema(conn)
     try:
         with conn.cursor() as cur:
             cur.execute(
@@ -277,36 +131,29 @@ def get_line_by_id(line_id: int):
         conn.close()
 
 
-def list_lines():
-    """Return all lines ordered by id."""
-    conn = get_conn()
-    ensure_schema(conn)
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, grid_id, idtag, name, code, bus_from_idtag, bus_to_idtag, active,
-                       r, x, b, length,
-                       rdfid, action, comment, modelling_authority, commissioned_date, decommissioned_date,
-                       active_prof, reducible, rate, rate_prof, contingency_factor, contingency_factor_prof,
-                       protection_rating_factor, protection_rating_factor_prof, monitor_loading, mttf, mttr,
-                       cost, cost_prof, build_status, capex, opex, line_group, color, rms_model,
-                       bus_from_pos, bus_to_pos, r0, x0, b0, r2, x2, b2, ys, ysh, tolerance, circuit_idx,
-                       temp_base, temp_oper, temp_oper_prof, alpha, r_fault, x_fault, fault_pos, template,
-                       locations, possible_tower_types, possible_underground_line_types, possible_sequence_line_types
-                FROM lines
-                ORDER BY id;
-                """
-            )
-            return cur.fetchall()
-    finally:
-        conn.close()
+def list_lines(
+    grid_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = DEFAULT_LIMIT,
+    fields: Optional[List[str]] = None,
+    include_total: bool = False,
+) -> dict:
+    """Return one keyset page of lines ordered by id (see pagination.list_page)."""
+    return list_page("lines", LIST_FIELDS, grid_id, after_id, limit, fields, include_total)
+
+
+def stream_lines(
+    grid_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Iterator[dict]:
+    """Iterate over lines ordered by id through a server-side cursor."""
+    return stream_rows("lines", LIST_FIELDS, grid_id, after_id, fields)
 
 
 def update_line_status(line_id: int, active: bool):
     """Update the active status of a line."""
     conn = get_conn()
-    ensure_schema(conn)
     try:
         with conn.cursor() as cur:
             cur.execute(
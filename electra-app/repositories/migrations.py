@@ -0,0 +1,81 @@
+"""
+Versioned schema migrations.
+
+Each step runs once, in order, inside a single transaction guarded by an
+advisory lock so several uvicorn workers starting together do not race.
+Applied versions are recorded in the schema_version table.
+"""
+import logging
+from typing import Callable, List, Tuple
+from db.db import transaction
+from . import grids_repo, element_status_repo, jobs_repo, results_repo, payloads_repo, pagination, profiles_repo
+from .baseline_schema import BASELINE_DDL
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant shared by every worker for pg_advisory_xact_lock
+_MIGRATION_LOCK_KEY = 4_211_001
+
+
+def _baseline(conn) -> None:
+    # Tables are created in foreign-key order
+    with conn.cursor() as cur:
+        for statement in BASELINE_DDL:
+            cur.execute(statement)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "baseline element tables", _baseline),
+    (2, "covering (grid_id, idtag) INCLUDE (active) indexes", element_status_repo.ensure_schema),
+    (3, "jobs table", jobs_repo.ensure_schema),
+    (4, "power flow result tables", results_repo.ensure_schema),
+    (5, "grids.file_hash", grids_repo.add_file_hash),
+    (6, "move grids.raw_json to compressed grid_payloads", payloads_repo.move_raw_json),
+    (7, "(grid_id, id) keyset pagination indexes", pagination.ensure_schema),
+    (8, "move numeric JSONB profiles to packed element_profiles", profiles_repo.move_json_profiles),
+    (9, "power flow iteration counts and warm-start voltages", results_repo.add_warm_start),
+    (10, "element base_active statuses from the uploaded file", element_status_repo.add_base_status),
+    (11, "compress grid payloads stored uncompressed", payloads_repo.compress_stored_payloads),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def apply_migrations() -> List[int]:
+    """Apply pending migrations and return the versions that were applied."""
+    applied_now = []
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s);", (_MIGRATION_LOCK_KEY,))
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                );
+                """
+            )
+            cur.execute("SELECT version FROM schema_version;")
+            applied = {row["version"] for row in cur.fetchall()}
+
+        for version, name, step in MIGRATIONS:
+            if version in applied:
+                continue
+            logger.info(f"Applying schema migration {version}: {name}")
+            step(conn)
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (%s, %s);",
+                    (version, name),
+                )
+            applied_now.append(version)
+    return applied_now
+
+
+def current_version() -> int:
+    """Highest applied schema version (0 before any migration ran)."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version;")
+            return cur.fetchone()["version"]
@@ -0,0 +1,147 @@
+"""
+Keyset pagination shared by the element list endpoints.
+
+Pages are read with ``WHERE id > after_id ORDER BY id LIMIT n`` (optionally
+scoped to one grid), so every page costs the same no matter how deep it is.
+Requested fields are checked against the table's column whitelist and
+pushed down into the SELECT list. Streaming listings read the same query
+through a named (server-side) cursor instead of a LIMIT.
+"""
+import os
+import uuid
+from typing import Iterable, Iterator, List, Optional, Sequence
+from psycopg2 import sql
+from db.db import get_conn
+from .element_status_repo import ELEMENT_TABLES
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+# Rows fetched per round trip by streaming (server-side) cursors
+STREAM_ITERSIZE = int(os.getenv("LIST_STREAM_ITERSIZE", "2000"))
+
+
+def ensure_schema(conn) -> None:
+    with conn.cursor() as cur:
+        # Grid-scoped keyset scans walk (grid_id, id) in order
+        for _, table in ELEMENT_TABLES:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_grid_id_id ON {table} (grid_id, id);")
+
+
+def resolve_fields(fields: Optional[Iterable[str]], allowed: Sequence[str]) -> List[str]:
+    """Validate a field projection; id is always included as the page cursor.
+
+    Raises ValueError naming the unknown fields.
+    """
+    if not fields:
+        return list(allowed)
+    requested = [f.strip() for f in fields if f and f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    selected = ["id"]
+    for f in requested:
+        if f not in selected:
+            selected.append(f)
+    return selected
+
+
+def list_page(
+    table: str,
+    allowed: Sequence[str],
+    grid_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = DEFAULT_LIMIT,
+    fields: Optional[Iterable[str]] = None,
+    include_total: bool = False,
+) -> dict:
+    """Return {"rows", "next_after_id", "total"} for one page of a table.
+
+    next_after_id is None on the last page; total is only counted when
+    include_total is set and ignores after_id. limit=None means DEFAULT_LIMIT.
+    """
+    columns = resolve_fields(fields, allowed)
+    limit = max(1, min(int(DEFAULT_LIMIT if limit is None else limit), MAX_LIMIT))
+    where, params = _where(grid_id, None)
+    keyset_where, keyset_params = _where(grid_id, after_id)
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            # One extra row tells whether another page follows
+            cur.execute(
+                sql.SQL("{select} LIMIT %s;").format(select=_select(table, columns, keyset_where)),
+                keyset_params + [limit + 1],
+            )
+            rows = cur.fetchall()
+            total = None
+            if include_total:
+                cur.execute(
+                    sql.SQL("SELECT count(*) AS total FROM {table}{where};").format(
+                        table=sql.Identifier(table),
+                        where=where,
+                    ),
+                    params,
+                )
+                total = cur.fetchone()["total"]
+    finally:
+        conn.close()
+
+    next_after_id = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after_id = rows[-1]["id"]
+    return {"rows": [dict(row) for row in rows], "next_after_id": next_after_id, "total": total}
+
+
+def stream_rows(
+    table: str,
+    allowed: Sequence[str],
+    grid_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    fields: Optional[Iterable[str]] = None,
+    itersize: Optional[int] = None,
+) -> Iterator[dict]:
+    """Iterate over every matching row through a server-side cursor.
+
+    Rows are fetched ``itersize`` at a time, so memory does not grow with the
+    table. Fields are validated before the iterator is returned.
+    """
+    columns = resolve_fields(fields, allowed)
+    where, params = _where(grid_id, after_id)
+    query = sql.SQL("{select};").format(select=_select(table, columns, where))
+    return _iter_named(query, params, itersize or STREAM_ITERSIZE)
+
+
+def _iter_named(query, params, itersize: int) -> Iterator[dict]:
+    conn = get_conn()
+    try:
+        # Named cursors only exist inside a transaction; putconn rolls it back
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+            cur.itersize = itersize
+            cur.execute(query, params)
+            for row in cur:
+                yield row
+    finally:
+        conn.close()
+
+
+def _where(grid_id: Optional[int], after_id: Optional[int]):
+    conditions = []
+    params = []
+    if grid_id is not None:
+        conditions.append(sql.SQL("grid_id = %s"))
+        params.append(grid_id)
+    if after_id is not None:
+        conditions.append(sql.SQL("id > %s"))
+        params.append(after_id)
+    if not conditions:
+        return sql.SQL(""), params
+    return sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions), params
+
+
+def _select(table: str, columns: Sequence[str], where) -> sql.Composed:
+    return sql.SQL("SELECT {columns} FROM {table}{where} ORDER BY id").format(
+        columns=sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+        table=sql.Identifier(table),
+        where=where,
+    )
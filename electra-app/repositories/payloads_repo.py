@@ -0,0 +1,158 @@
+import os
+import zlib
+from typing import Optional
+import psycopg2
+from psycopg2.extras import execute_values
+from db.db import get_conn
+
+try:
+    import zstandard
+except ImportError:  # zlib is used instead
+    zstandard = None
+
+# GRID_STORE_RAW_PAYLOAD=0 skips storing the gathered model JSON altogether
+STORE_RAW_PAYLOAD = os.getenv("GRID_STORE_RAW_PAYLOAD", "1").strip().lower() not in ("0", "false", "no", "off")
+ZSTD_LEVEL = int(os.getenv("GRID_PAYLOAD_ZSTD_LEVEL", "3"))
+# Payloads read per round trip while migrating; each one is a whole model
+_MIGRATION_BATCH_ROWS = 16
+
+
+def ensure_schema(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS grid_payloads (
+                grid_id INTEGER PRIMARY KEY REFERENCES grids(id) ON DELETE CASCADE,
+                codec TEXT NOT NULL,
+                raw_size BIGINT NOT NULL,
+                data BYTEA NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+        # Already compressed, so keep TOAST from trying again
+        cur.execute("ALTER TABLE grid_payloads ALTER COLUMN data SET STORAGE EXTERNAL;")
+
+
+def move_raw_json(conn) -> None:
+    """Move grids.raw_json into grid_payloads, compressed, and drop the column."""
+    ensure_schema(conn)
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'grids' AND column_name = 'raw_json';
+            """
+        )
+        if not cur.fetchone():
+            return
+    # Compressed in Python, a batch at a time: EXTERNAL storage means Postgres never would
+    with conn.cursor(name="_raw_json") as source, conn.cursor() as cur:
+        source.execute("SELECT id, raw_json::text AS raw FROM grids WHERE raw_json IS NOT NULL;")
+        while True:
+            batch = source.fetchmany(_MIGRATION_BATCH_ROWS)
+            if not batch:
+                break
+            _insert_compressed(cur, [(row["id"], row["raw"].encode("utf-8")) for row in batch])
+    with conn.cursor() as cur:
+        cur.execute("ALTER TABLE grids DROP COLUMN raw_json;")
+
+
+def compress_stored_payloads(conn) -> None:
+    """Compress payloads that an earlier version of move_raw_json stored with codec 'none'."""
+    with conn.cursor(name="_raw_payloads") as source, conn.cursor() as cur:
+        source.execute("SELECT grid_id, data FROM grid_payloads WHERE codec = 'none';")
+        while True:
+            batch = source.fetchmany(_MIGRATION_BATCH_ROWS)
+            if not batch:
+                break
+            _insert_compressed(cur, [(row["grid_id"], bytes(row["data"])) for row in batch])
+
+
+def _insert_compressed(cur, payloads) -> None:
+    rows = []
+    for grid_id, raw in payloads:
+        codec, data = compress(raw)
+        rows.append((grid_id, codec, len(raw), psycopg2.Binary(data)))
+    execute_values(
+        cur,
+        """
+        INSERT INTO grid_payloads (grid_id, codec, raw_size, data) VALUES %s
+        ON CONFLICT (grid_id) DO UPDATE SET codec = EXCLUDED.codec, raw_size = EXCLUDED.raw_size, data = EXCLUDED.data;
+        """,
+        rows,
+    )
+
+
+def compress(raw: bytes) -> tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, 6)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Data is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    return data
+
+
+def save_payload(grid_id: int, raw: bytes) -> None:
+    codec, data = compress(raw)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO grid_payloads (grid_id, codec, raw_size, data)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (grid_id) DO UPDATE SET
+                    codec = EXCLUDED.codec,
+                    raw_size = EXCLUDED.raw_size,
+                    data = EXCLUDED.data,
+                    created_at = NOW();
+                """,
+                (grid_id, codec, len(raw), psycopg2.Binary(data)),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def copy_payload(source_grid_id: int, grid_id: int) -> None:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO grid_payloads (grid_id, codec, raw_size, data)
+                SELECT %s, codec, raw_size, data FROM grid_payloads WHERE grid_id = %s;
+                """,
+                (grid_id, source_grid_id),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def get_payload(grid_id: int) -> Optional[bytes]:
+    """Return the stored model JSON of a grid as UTF-8 bytes, or None."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT codec, data FROM grid_payloads WHERE grid_id = %s;", (grid_id,))
+            row = cur.fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    return decompress(row["codec"], bytes(row["data"]))
@@ -0,0 +1,289 @@
+"""
+Element time profiles (loads.p_prof, lines.rate_prof, ...) stored as packed
+binary arrays in element_profiles instead of JSONB columns.
+
+Each numeric or boolean profile is one row keyed by (grid_id, element_type,
+idtag, property), where property is the name of the element column it
+replaces. Encodings:
+
+* const:  every step equals default_value; no data at all
+* sparse: int32 step indices followed by their values; other steps are default_value
+* rle:    int32 run starts followed by one value per run
+* dense:  every value, compressed with zstd/zlib when that pays off
+
+Values are little-endian float64 ("<f8") or bool ("|b1") and decode with
+np.frombuffer. Profiles of any other kind (e.g. bus idtags) stay in their
+JSONB column.
+"""
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from db.db import get_conn
+from .copy_util import copy_rows
+from .payloads_repo import compress, decompress
+
+PROFILE_COLUMNS = (
+    "grid_id", "element_type", "idtag", "property", "encoding", "dtype", "size", "default_value", "codec", "data",
+)
+
+# Dense profiles smaller than this are not worth compressing
+_COMPRESS_MIN_BYTES = 512
+# Element rows read per round trip while migrating JSONB profiles
+_MIGRATION_BATCH_ROWS = 500
+
+
+def ensure_schema(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS element_profiles (
+                grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+                element_type TEXT NOT NULL,
+                idtag TEXT NOT NULL,
+                property TEXT NOT NULL,
+                encoding TEXT NOT NULL,
+                dtype TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                default_value DOUBLE PRECISION,
+                codec TEXT NOT NULL DEFAULT 'none',
+                data BYTEA,
+                PRIMARY KEY (grid_id, element_type, idtag, property)
+            );
+            """
+        )
+        # Packed or already compressed, so keep TOAST from trying again
+        cur.execute("ALTER TABLE element_profiles ALTER COLUMN data SET STORAGE EXTERNAL;")
+
+
+# --------------------------------------------------------------------------- #
+# Encoding
+# --------------------------------------------------------------------------- #
+
+def _is_bool(values) -> bool:
+    return all(isinstance(v, (bool, np.bool_)) for v in values)
+
+
+def _is_number(values) -> bool:
+    return all(
+        isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_)) for v in values
+    )
+
+
+def encode_profile(profile) -> Optional[tuple]:
+    """Encode a gathered profile dict as (encoding, dtype, size, default_value, codec, data).
+
+    Returns None for profiles that are not numeric or boolean (or not in the
+    {"is_sparse", "size", "default", ...} form), which stay JSONB.
+    """
+    if not isinstance(profile, dict) or "is_sparse" not in profile:
+        return None
+    size = int(profile.get("size") or 0)
+    default = profile.get("default")
+    if profile["is_sparse"]:
+        sparse = (profile.get("sparse_data") or {}).get("map") or {}
+        values = list(sparse.values())
+    else:
+        values = profile.get("dense_data")
+        if values is None:
+            return None
+    sample = values if default is None else [default, *values]
+    if sample and _is_bool(sample):
+        dtype = np.dtype("|b1")
+    elif _is_number(sample):
+        dtype = np.dtype("<f8")
+    else:
+        return None
+    default_value = None if default is None else float(default)
+
+    if profile["is_sparse"]:
+        if not sparse:
+            return "const", dtype.str, size, default_value, "none", None
+        idx = np.fromiter((int(k) for k in sparse.keys()), dtype="<i4", count=len(sparse))
+        vals = np.asarray(values, dtype=dtype)
+        return "sparse", dtype.str, size, default_value, "none", idx.tobytes() + vals.tobytes()
+
+    arr = np.asarray(values, dtype=dtype)
+    size = arr.size
+    if size == 0:
+        return "const", dtype.str, 0, default_value, "none", None
+    starts = np.flatnonzero(arr[1:] != arr[:-1]) + 1
+    if starts.size == 0:
+        return "const", dtype.str, size, float(arr[0]), "none", None
+    starts = np.concatenate(([0], starts)).astype("<i4")
+    if starts.size * (4 + dtype.itemsize) * 2 <= arr.nbytes:
+        return "rle", dtype.str, size, default_value, "none", starts.tobytes() + arr[starts].tobytes()
+
+    raw = arr.tobytes()
+    if len(raw) >= _COMPRESS_MIN_BYTES:
+        codec, packed = compress(raw)
+        if len(packed) < len(raw):
+            return "dense", dtype.str, size, default_value, codec, packed
+    return "dense", dtype.str, size, default_value, "none", raw
+
+
+def decode_profile(row: dict) -> np.ndarray:
+    """Rebuild a profile array from an element_profiles row.
+
+    Dense uncompressed profiles are read-only views on the fetched bytes.
+    """
+    dtype = np.dtype(row["dtype"])
+    size = row["size"]
+    encoding = row["encoding"]
+    default = row["default_value"]
+    if encoding == "const":
+        return np.full(size, 0 if default is None else default, dtype=dtype)
+
+    data = row["data"]
+    if row["codec"] != "none":
+        data = decompress(row["codec"], bytes(data))
+    if encoding == "dense":
+        return np.frombuffer(data, dtype=dtype)
+
+    n = len(data) // (4 + dtype.itemsize)
+    positions = np.frombuffer(data, dtype="<i4", count=n)
+    values = np.frombuffer(data, dtype=dtype, count=n, offset=4 * n)
+    if encoding == "sparse":
+        out = np.full(size, 0 if default is None else default, dtype=dtype)
+        out[positions] = values
+        return out
+    if encoding == "rle":
+        return np.repeat(values, np.diff(np.append(positions, size)))
+    raise ValueError(f"Unknown profile encoding {encoding!r}")
+
+
+def profile_dict(row: dict) -> dict:
+    """The gathered-model form of a stored profile, as it used to be kept in JSONB."""
+    default = row["default_value"]
+    if row["dtype"] == "|b1" and default is not None:
+        default = bool(default)
+    if row["encoding"] in ("const", "sparse"):
+        arr = decode_profile(row) if row["encoding"] == "sparse" else None
+        sparse = {}
+        if arr is not None:
+            changed = np.flatnonzero(arr != (0 if default is None else default))
+            sparse = {str(int(i)): arr[i].item() for i in changed}
+        return {"is_sparse": True, "size": row["size"], "default": default, "sparse_data": {"map": sparse}}
+    return {"is_sparse": False, "size": row["size"], "default": default, "dense_data": decode_profile(row).tolist()}
+
+
+def split_profiles(grid_id: int, element_type: str, elements: Sequence[dict]) -> Tuple[List[dict], List[tuple]]:
+    """Take the numeric/boolean *_prof entries out of gathered element dicts.
+
+    Returns copies of the elements without those entries (so their JSONB
+    columns stay NULL) and the element_profiles rows to load. The input
+    dicts are left untouched.
+    """
+    stripped = []
+    rows = []
+    # Repeated idtags are collapsed by the element tables too
+    seen = set()
+    for element in elements or []:
+        idtag = element.get("idtag")
+        moved = None
+        for key, value in element.items():
+            if not key.endswith("_prof") or not idtag:
+                continue
+            encoded = encode_profile(value)
+            if encoded is None:
+                continue
+            if (idtag, key.lower()) not in seen:
+                seen.add((idtag, key.lower()))
+                rows.append((grid_id, element_type, idtag, key.lower(), *encoded))
+            if moved is None:
+                moved = dict(element)
+            moved[key] = None
+        stripped.append(element if moved is None else moved)
+    return stripped, rows
+
+
+# --------------------------------------------------------------------------- #
+# Storage
+# --------------------------------------------------------------------------- #
+
+def copy_insert(conn, rows: Iterable[tuple]) -> None:
+    """Bulk load encoded profile rows with COPY (the grid must have none of them yet)."""
+    with conn.cursor() as cur:
+        copy_rows(cur, "element_profiles", PROFILE_COLUMNS, rows)
+
+
+def copy_grid_profiles(cur, source_grid_id: int, grid_id: int) -> int:
+    columns = ", ".join(PROFILE_COLUMNS[1:])
+    cur.execute(
+        f"INSERT INTO element_profiles (grid_id, {columns}) SELECT %s, {columns} FROM element_profiles WHERE grid_id = %s;",
+        (grid_id, source_grid_id),
+    )
+    return cur.rowcount
+
+
+def get_profile_rows(
+    grid_id: int,
+    element_type: str,
+    idtags: Optional[Sequence[str]] = None,
+    properties: Optional[Sequence[str]] = None,
+) -> List[dict]:
+    """Return the stored profile rows of one element type of a grid, ordered by idtag and property."""
+    query = "SELECT idtag, property, encoding, dtype, size, default_value, codec, data FROM element_profiles WHERE grid_id = %s AND element_type = %s"
+    params: list = [grid_id, element_type]
+    if idtags:
+        query += " AND idtag = ANY(%s)"
+        params.append(list(idtags))
+    if properties:
+        query += " AND property = ANY(%s)"
+        params.append(list(properties))
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query + " ORDER BY idtag, property;", params)
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def move_json_profiles(conn) -> None:
+    """Migrate numeric/boolean JSONB *_prof columns of every element table into element_profiles."""
+    from . import buses_repo, loads_repo, generators_repo, shunts_repo, transformers2w_repo, lines_repo
+
+    ensure_schema(conn)
+    tables = (
+        ("bus", "buses", buses_repo.COLUMNS),
+        ("load", "loads", loads_repo.COLUMNS),
+        ("generator", "generators", generators_repo.COLUMNS),
+        ("shunt", "shunts", shunts_repo.COLUMNS),
+        ("transformer2w", "transformers2w", transformers2w_repo.COLUMNS),
+        ("line", "lines", lines_repo.COLUMNS),
+    )
+    for element_type, table, columns in tables:
+        prof_columns = [c for c in columns if c.endswith("_prof")]
+        if not prof_columns:
+            continue
+        moved = 0
+        with conn.cursor(name=f"_profiles_{table}") as source, conn.cursor() as cur:
+            source.execute(
+                f"SELECT grid_id, idtag, {', '.join(prof_columns)} FROM {table} "
+                f"WHERE COALESCE({', '.join(prof_columns)}) IS NOT NULL;"
+            )
+            # One batch of encoded rows in memory at a time; COPY cannot run while a FETCH is pending
+            while True:
+                batch = source.fetchmany(_MIGRATION_BATCH_ROWS)
+                if not batch:
+                    break
+                rows = []
+                for row in batch:
+                    for column in prof_columns:
+                        encoded = encode_profile(row[column])
+                        if encoded is not None:
+                            rows.append((row["grid_id"], element_type, row["idtag"], column, *encoded))
+                copy_rows(cur, "element_profiles", PROFILE_COLUMNS, rows)
+                moved += len(rows)
+        if not moved:
+            continue
+        with conn.cursor() as cur:
+            for column in prof_columns:
+                cur.execute(
+                    f"""
+                    UPDATE {table} t SET {column} = NULL
+                    FROM element_profiles p
+                    WHERE p.grid_id = t.grid_id AND p.element_type = %s
+                      AND p.idtag = t.idtag AND p.property = %s;
+                    """,
+                    (element_type, column),
+                )
@@ -0,0 +1,252 @@
+from typing import Optional
+import numpy as np
+from db.db import get_conn, transaction
+from .copy_util import copy_rows
+
+# (table column, PowerFlowResults.get_bus_df() column)
+BUS_RESULT_COLUMNS = (
+    ("vm", "Vm"),
+    ("va", "Va"),
+    ("p", "P"),
+    ("q", "Q"),
+)
+
+# (table column, PowerFlowResults.get_branch_df() column)
+BRANCH_RESULT_COLUMNS = (
+    ("pf", "Pf"),
+    ("qf", "Qf"),
+    ("pt", "Pt"),
+    ("qt", "Qt"),
+    ("loading", "loading"),
+    ("ploss", "Ploss"),
+    ("qloss", "Qloss"),
+)
+
+
+def ensure_schema(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS power_flow_runs (
+                id SERIAL PRIMARY KEY,
+                grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+                state_hash TEXT NOT NULL,
+                grid_name TEXT,
+                converged BOOLEAN,
+                error DOUBLE PRECISION,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                UNIQUE (grid_id, state_hash)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bus_results (
+                run_id INTEGER NOT NULL REFERENCES power_flow_runs(id) ON DELETE CASCADE,
+                idx INTEGER NOT NULL,
+                name TEXT,
+                vm DOUBLE PRECISION,
+                va DOUBLE PRECISION,
+                p DOUBLE PRECISION,
+                q DOUBLE PRECISION,
+                PRIMARY KEY (run_id, idx)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS branch_results (
+                run_id INTEGER NOT NULL REFERENCES power_flow_runs(id) ON DELETE CASCADE,
+                idx INTEGER NOT NULL,
+                name TEXT,
+                pf DOUBLE PRECISION,
+                qf DOUBLE PRECISION,
+                pt DOUBLE PRECISION,
+                qt DOUBLE PRECISION,
+                loading DOUBLE PRECISION,
+                ploss DOUBLE PRECISION,
+                qloss DOUBLE PRECISION,
+                PRIMARY KEY (run_id, idx)
+            );
+            """
+        )
+
+
+def add_warm_start(conn) -> None:
+    """Iteration counts on power_flow_runs and the last converged voltages of each grid."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            ALTER TABLE power_flow_runs
+                ADD COLUMN IF NOT EXISTS iterations INTEGER,
+                ADD COLUMN IF NOT EXISTS warm_start BOOLEAN;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS power_flow_voltages (
+                grid_id INTEGER PRIMARY KEY REFERENCES grids(id) ON DELETE CASCADE,
+                state_hash TEXT NOT NULL,
+                bus_idtags TEXT[] NOT NULL,
+                vm BYTEA NOT NULL,
+                va BYTEA NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+
+
+def _df_rows(run_id: int, df, columns):
+    # Column-wise extraction avoids building one Python object per cell row by row
+    names = [str(n) for n in df.index]
+    data = [
+        df[src].astype(float).tolist() if src in df.columns else [None] * len(df)
+        for _, src in columns
+    ]
+    for i, name in enumerate(names):
+        yield (run_id, i, name, *(col[i] for col in data))
+
+
+def save_results(
+    grid_id: int,
+    state_hash: str,
+    grid_name: Optional[str],
+    converged: bool,
+    error: float,
+    bus_df,
+    branch_df,
+    keep: int = 20,
+    iterations: Optional[int] = None,
+    warm_start: Optional[bool] = None,
+) -> Optional[int]:
+    """Store one solved state; returns the run id, or None if it was already stored."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO power_flow_runs (grid_id, state_hash, grid_name, converged, error, iterations, warm_start)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (grid_id, state_hash) DO NOTHING
+                RETURNING id;
+                """,
+                (grid_id, state_hash, grid_name, converged, error, iterations, warm_start),
+            )
+            row = cur.fetchone()
+            if not row:
+                return None
+            run_id = row["id"]
+            copy_rows(
+                cur,
+                "bus_results",
+                ["run_id", "idx", "name"] + [c for c, _ in BUS_RESULT_COLUMNS],
+                _df_rows(run_id, bus_df, BUS_RESULT_COLUMNS),
+            )
+            copy_rows(
+                cur,
+                "branch_results",
+                ["run_id", "idx", "name"] + [c for c, _ in BRANCH_RESULT_COLUMNS],
+                _df_rows(run_id, branch_df, BRANCH_RESULT_COLUMNS),
+            )
+            # Keep only the most recent states of this grid
+            cur.execute(
+                """
+                DELETE FROM power_flow_runs
+                WHERE grid_id = %s AND id NOT IN (
+                    SELECT id FROM power_flow_runs WHERE grid_id = %s ORDER BY created_at DESC, id DESC LIMIT %s
+                );
+                """,
+                (grid_id, grid_id, keep),
+            )
+        return run_id
+
+
+def get_results(grid_id: int, state_hash: str, min_loading: Optional[float] = None) -> Optional[dict]:
+    """Return the stored run with its bus and branch rows, or None.
+
+    min_loading keeps only branches whose absolute loading (%) reaches it.
+    """
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, grid_name, converged, error, iterations, warm_start, created_at
+                FROM power_flow_runs WHERE grid_id = %s AND state_hash = %s;
+                """,
+                (grid_id, state_hash),
+            )
+            run = cur.fetchone()
+            if not run:
+                return None
+            cur.execute(
+                f"""
+                SELECT name, {", ".join(c for c, _ in BUS_RESULT_COLUMNS)}
+                FROM bus_results WHERE run_id = %s ORDER BY idx;
+                """,
+                (run["id"],),
+            )
+            bus_rows = cur.fetchall()
+            if min_loading is None:
+                cur.execute(
+                    f"""
+                    SELECT name, {", ".join(c for c, _ in BRANCH_RESULT_COLUMNS)}
+                    FROM branch_results WHERE run_id = %s ORDER BY idx;
+                    """,
+                    (run["id"],),
+                )
+            else:
+                cur.execute(
+                    f"""
+                    SELECT name, {", ".join(c for c, _ in BRANCH_RESULT_COLUMNS)}
+                    FROM branch_results WHERE run_id = %s AND abs(loading) >= %s ORDER BY idx;
+                    """,
+                    (run["id"], min_loading),
+                )
+            branch_rows = cur.fetchall()
+    return {"run": run, "bus_rows": bus_rows, "branch_rows": branch_rows}
+
+
+def save_voltages(grid_id: int, state_hash: str, bus_idtags, vm, va) -> None:
+    """Keep one grid's last converged bus voltages (p.u. and radians), replacing the previous ones."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO power_flow_voltages (grid_id, state_hash, bus_idtags, vm, va)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (grid_id) DO UPDATE SET
+                    state_hash = EXCLUDED.state_hash,
+                    bus_idtags = EXCLUDED.bus_idtags,
+                    vm = EXCLUDED.vm,
+                    va = EXCLUDED.va,
+                    updated_at = NOW();
+                """,
+                (
+                    grid_id,
+                    state_hash,
+                    list(bus_idtags),
+                    np.asarray(vm, dtype="<f8").tobytes(),
+                    np.asarray(va, dtype="<f8").tobytes(),
+                ),
+            )
+
+
+def get_voltages(grid_id: int) -> Optional[dict]:
+    """Return {state_hash, bus_idtags, vm, va} of the grid's last converged solve, or None."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT state_hash, bus_idtags, vm, va FROM power_flow_voltages WHERE grid_id = %s;",
+                (grid_id,),
+            )
+            row = cur.fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    return {
+        "state_hash": row["state_hash"],
+        "bus_idtags": list(row["bus_idtags"]),
+        "vm": np.frombuffer(row["vm"], dtype="<f8"),
+        "va": np.frombuffer(row["va"], dtype="<f8"),
+    }
@@ -1,5 +1,7 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
+from routes.pagination import page_params, page_body, stream_format, list_stream, stream_filters, stream_body
 from services import bus
 
 router = APIRouter()
@@ -10,8 +12,11 @@ class BusStatusUpdate(BaseModel):
 
 
 @router.get("/")
-def list_buses():
-    return bus.list_buses()
+def list_buses(page: dict = Depends(page_params), stream: Optional[str] = Depends(stream_format)):
+    fmt = list_stream(page, stream)
+    if fmt:
+        return stream_body(fmt, bus.stream_buses(fmt, **stream_filters(page)))
+    return page_body(bus.list_buses(**page))
 
 @router.get("/{bus_id}")
 def get_bus(bus_id: int):
@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from services.generator import get_generator, list_generators, update_generator_status
+from routes.pagination import page_params, page_body, stream_format, list_stream, stream_filters, stream_body
+from services.generator import get_generator, list_generators, stream_generators, update_generator_status
 
 router = APIRouter()
 
@@ -14,8 +16,11 @@ def read_generator(generator_id: int):
     return get_generator(generator_id)
 
 @router.get("/")
-def read_generators():
-    return list_generators()
+def read_generators(page: dict = Depends(page_params), stream: Optional[str] = Depends(stream_format)):
+    fmt = list_stream(page, stream)
+    if fmt:
+        return stream_body(fmt, stream_generators(fmt, **stream_filters(page)))
+    return page_body(list_generators(**page))
 
 @router.patch("/{generator_id}/status")
 def update_status(generator_id: int, status_update: StatusUpdate):
@@ -1,24 +1,125 @@
-from typing import Annotated
-from fastapi import APIRouter, FastAPI, File, UploadFile
-from services import grid
+from typing import Annotated, List, Literal, Optional
+from fastapi import APIRouter, FastAPI, File, Header, Query, Response, UploadFile
+from pydantic import BaseModel
+from services import columnar, grid, jobs, profiles, status_batch
+from services.serialization import ORJSONResponse
 
 router = APIRouter()
 
+
+class StatusBatchItem(BaseModel):
+    element_type: Literal["bus", "generator", "load", "shunt", "line", "transformer2w"]
+    id: Optional[int] = None
+    idtag: Optional[str] = None
+    active: bool
+
+
+class StatusBatch(BaseModel):
+    items: List[StatusBatchItem]
+
+
 @router.post("/files/upload")
-async def upload_file(file: UploadFile = File(...)):
-    return await grid.upload_file(file)
+async def upload_file(
+    file: UploadFile = File(...),
+    on_duplicate: Literal["clone", "reuse", "import"] = Query(
+        "clone",
+        description="When the same file was already uploaded: copy the stored grid (clone), return its id (reuse) or parse it again (import)",
+    ),
+):
+    return await grid.upload_file(file, on_duplicate=on_duplicate)
 
 @router.get("/ids")
 def get_grid_ids():
     return grid.list_grid_ids()
 
+@router.get("/{grid_id}/raw")
+def get_raw_payload(grid_id: int):
+    return Response(content=grid.get_raw_payload(grid_id), media_type="application/json")
+
 @router.delete("/{grid_id}")
 def delete_grid(grid_id: int):
     grid.delete_grid(grid_id)
     return {"deleted": True, "grid_id": grid_id}
 
 @router.get("/{grid_id}/power-flow")
-def calculate_power_flow(grid_id: int):
-    return grid.calculate_power_flow(grid_id)
+def calculate_power_flow(
+    grid_id: int,
+    min_loading: Optional[float] = Query(None, description="Only return branches with |loading| (%) at or above this value"),
+    format: Optional[Literal["json", "arrow", "parquet"]] = Query(
+        None, description="Response format; otherwise negotiated from Accept (JSON by default)"
+    ),
+    table: Literal["bus", "branch"] = Query("bus", description="Table returned by the arrow and parquet formats"),
+    accept: Optional[str] = Header(None),
+):
+    fmt = columnar.negotiate(format, accept)
+    if fmt == "json":
+        return ORJSONResponse(grid.calculate_power_flow(grid_id, min_loading=min_loading))
+    content, summary = grid.calculate_power_flow_table(grid_id, table, fmt, min_loading=min_loading)
+    headers = {
+        "X-Power-Flow-Converged": str(summary["converged"]).lower(),
+        "X-Power-Flow-State-Hash": summary["state_hash"],
+        "X-Power-Flow-Cached": str(summary["cached"]).lower(),
+        "X-Power-Flow-Warm-Start": str(summary["warm_start"]).lower(),
+        "Vary": "Accept",
+    }
+    # Runs stored before iteration counts were recorded have none
+    if summary["iterations"] is not None:
+        headers["X-Power-Flow-Iterations"] = str(summary["iterations"])
+    return Response(content=content, media_type=columnar.MEDIA_TYPES[fmt], headers=headers)
+
+@router.get("/{grid_id}/profiles")
+def get_profiles(
+    grid_id: int,
+    element_type: Literal["bus", "generator", "load", "shunt", "line", "transformer2w"] = Query(...),
+    idtags: Optional[List[str]] = Query(None, alias="idtag", description="Only these elements"),
+    properties: Optional[List[str]] = Query(None, alias="property", description="Only these profiles, by column name (e.g. p_prof)"),
+):
+    return ORJSONResponse(profiles.get_profiles(grid_id, element_type, idtags=idtags, properties=properties))
+
+@router.post("/{grid_id}/power-flow", status_code=202)
+def submit_power_flow(grid_id: int):
+    return jobs.submit_power_flow_job(grid_id)
+
+@router.post("/{grid_id}/status-batch")
+def update_status_batch(grid_id: int, batch: StatusBatch):
+    return status_batch.update_status_batch(grid_id, [item.model_dump() for item in batch.items])
 
+@router.post("/{grid_id}/time-series-power-flow")
+def calculate_time_series(
+    grid_id: int,
+    start: int = Query(0, ge=0, description="First time step (index into the grid's time axis)"),
+    end: Optional[int] = Query(None, ge=1, description="Time step after the last one solved; all remaining steps by default"),
+    chunks: Optional[int] = Query(None, ge=1, le=256, description="Chunks solved in parallel; the pool size by default"),
+    format: Optional[Literal["json", "arrow", "parquet"]] = Query(
+        None, description="Response format; otherwise negotiated from Accept (JSON by default)"
+    ),
+    table: Literal["vm", "loading"] = Query("vm", description="Matrix returned by the arrow and parquet formats"),
+    accept: Optional[str] = Header(None),
+):
+    fmt = columnar.negotiate(format, accept)
+    if fmt == "json":
+        return ORJSONResponse(grid.calculate_time_series(grid_id, start=start, end=end, chunks=chunks))
+    content, summary = grid.calculate_time_series(grid_id, start=start, end=end, chunks=chunks, fmt=fmt, table=table)
+    headers = {
+        "X-Power-Flow-State-Hash": summary["state_hash"],
+        "X-Time-Series-Steps": str(summary["end"] - summary["start"]),
+        "X-Time-Series-Seconds": str(summary["seconds"]),
+        "Vary": "Accept",
+    }
+    return Response(content=content, media_type=columnar.MEDIA_TYPES[fmt], headers=headers)
 
+@router.post("/{grid_id}/contingency-analysis")
+def contingency_analysis(
+    grid_id: int,
+    mode: Literal["auto", "model", "n-1"] = Query(
+        "auto", description="model: the grid's contingency groups; n-1: one outage per line and transformer; auto: model if it has any"
+    ),
+    max_loading: float = Query(100.0, gt=0, description="Branch loading (%) above which a branch counts as overloaded"),
+    top: int = Query(100, ge=1, le=10000, description="Ranked violations and contingencies returned"),
+    method: Literal["ac", "screen"] = Query(
+        "ac", description="ac: AC power flow of every contingency; screen: DC PTDF/LODF screening of all N-1 outages, AC only for the risky ones"
+    ),
+):
+    return ORJSONResponse(
+        grid.calculate_contingency_analysis(grid_id, mode=mode, max_loading=max_loading, top=top, method=method)
+    )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Response, status
-from services.health import db_health_check
+from services.health import db_health_check, pool_stats, circuit_cache_stats, worker_pools_stats, power_flow_cache_stats, sensitivity_cache_stats
 
 router = APIRouter()
 
@@ -11,3 +11,23 @@ def health_db(response: Response):
     else:
         response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
     return result
+
+@router.get("/db/pool")
+def health_db_pool():
+    return pool_stats()
+
+@router.get("/circuit-cache")
+def health_circuit_cache():
+    return circuit_cache_stats()
+
+@router.get("/workers")
+def health_workers():
+    return worker_pools_stats()
+
+@router.get("/power-flow-cache")
+def health_power_flow_cache():
+    return power_flow_cache_stats()
+
+@router.get("/sensitivity-cache")
+def health_sensitivity_cache():
+    return sensitivity_cache_stats()
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from services import jobs
+from services.serialization import ORJSONResponse
+
+router = APIRouter()
+
+@router.get("/{job_id}")
+def get_job(job_id: str, include_result: bool = True):
+    return ORJSONResponse(jobs.get_job(job_id, include_result=include_result))
@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from services.line import get_line, list_lines, update_line_status
+from routes.pagination import page_params, page_body, stream_format, list_stream, stream_filters, stream_body
+from services.line import get_line, list_lines, stream_lines, update_line_status
 
 router = APIRouter()
 
@@ -14,8 +16,11 @@ def read_line(line_id: int):
     return get_line(line_id)
 
 @router.get("/")
-def read_lines():
-    return list_lines()
+def read_lines(page: dict = Depends(page_params), stream: Optional[str] = Depends(stream_format)):
+    fmt = list_stream(page, stream)
+    if fmt:
+        return stream_body(fmt, stream_lines(fmt, **stream_filters(page)))
+    return page_body(list_lines(**page))
 
 @router.patch("/{line_id}/status")
 def update_status(line_id: int, status_update: StatusUpdate):
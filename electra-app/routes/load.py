@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from services.load import get_load, list_loads, update_load_status
+from routes.pagination import page_params, page_body, stream_format, list_stream, stream_filters, stream_body
+from services.load import get_load, list_loads, stream_loads, update_load_status
 
 router = APIRouter()
 
@@ -14,8 +16,11 @@ def read_load(load_id: int):
     return get_load(load_id)
 
 @router.get("/")
-def read_loads():
-    return list_loads()
+def read_loads(page: dict = Depends(page_params), stream: Optional[str] = Depends(stream_format)):
+    fmt = list_stream(page, stream)
+    if fmt:
+        return stream_body(fmt, stream_loads(fmt, **stream_filters(page)))
+    return page_body(list_loads(**page))
 
 @router.patch("/{load_id}/status")
 def update_status(load_id: int, status_update: StatusUpdate):
@@ -0,0 +1,68 @@
+from typing import Iterator, Literal, Optional
+from fastapi import Header, Query
+from fastapi.responses import StreamingResponse
+from repositories.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from services.serialization import ORJSONResponse
+
+
+def page_params(
+    grid_id: Optional[int] = Query(None, description="Only return elements of this grid"),
+    after_id: Optional[int] = Query(None, description="Return elements with id greater than this (X-Next-After-Id of the previous page)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description=f"Page size ({DEFAULT_LIMIT} when only after_id or include_total is given)"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. idtag,name,active"),
+    include_total: bool = Query(False, description="Count the matching elements into X-Total-Count"),
+) -> dict:
+    return {
+        "grid_id": grid_id,
+        "after_id": after_id,
+        "limit": limit,
+        "fields": fields.split(",") if fields else None,
+        "include_total": include_total,
+    }
+
+
+def page_body(page: dict) -> ORJSONResponse:
+    """Return the rows of a page, with its cursor and total in headers."""
+    headers = {}
+    if page["next_after_id"] is not None:
+        headers["X-Next-After-Id"] = str(page["next_after_id"])
+    if page["total"] is not None:
+        headers["X-Total-Count"] = str(page["total"])
+    # Built directly so the rows skip jsonable_encoder
+    return ORJSONResponse(page["rows"], headers=headers)
+
+
+def stream_format(
+    stream: Optional[Literal["ndjson", "json"]] = Query(
+        None,
+        description="Stream every matching row (limit and include_total are ignored) as NDJSON or as one JSON array",
+    ),
+    accept: Optional[str] = Header(None),
+) -> Optional[str]:
+    if stream:
+        return stream
+    if accept and "application/x-ndjson" in accept:
+        return "ndjson"
+    return None
+
+
+def list_stream(page: dict, stream: Optional[str]) -> Optional[str]:
+    """Stream format of a listing, or None to return one page.
+
+    A listing without limit, after_id or include_total returns every row (as a
+    streamed JSON array), as it did before the endpoints were paginated.
+    """
+    if stream:
+        return stream
+    if page["limit"] is None and page["after_id"] is None and not page["include_total"]:
+        return "json"
+    return None
+
+
+def stream_filters(page: dict) -> dict:
+    return {"grid_id": page["grid_id"], "after_id": page["after_id"], "fields": page["fields"]}
+
+
+def stream_body(fmt: str, chunks: Iterator[bytes]) -> StreamingResponse:
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    return StreamingResponse(chunks, media_type=media_type)
@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from services.shunt import get_shunt, list_shunts, update_shunt_status
+from routes.pagination import page_params, page_body, stream_format, list_stream, stream_filters, stream_body
+from services.shunt import get_shunt, list_shunts, stream_shunts, update_shunt_status
 
 router = APIRouter()
 
@@ -14,8 +16,11 @@ def read_shunt(shunt_id: int):
     return get_shunt(shunt_id)
 
 @router.get("/")
-def read_shunts():
-    return list_shunts()
+def read_shunts(page: dict = Depends(page_params), stream: Optional[str] = Depends(stream_format)):
+    fmt = list_stream(page, stream)
+    if fmt:
+        return stream_body(fmt, stream_shunts(fmt, **stream_filters(page)))
+    return page_body(list_shunts(**page))
 
 @router.patch("/{shunt_id}/status")
 def update_status(shunt_id: int, status_update: StatusUpdate):
@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from services.transformer2w import get_transformer2w, list_transformers2w, update_transformer_status
+from routes.pagination import page_params, page_body, stream_format, list_stream, stream_filters, stream_body
+from services.transformer2w import get_transformer2w, list_transformers2w, stream_transformers2w, update_transformer_status
 
 router = APIRouter()
 
@@ -14,8 +16,11 @@ def read_transformer2w(transformer_id: int):
     return get_transformer2w(transformer_id)
 
 @router.get("/")
-def read_transformers2w():
-    return list_transformers2w()
+def read_transformers2w(page: dict = Depends(page_params), stream: Optional[str] = Depends(stream_format)):
+    fmt = list_stream(page, stream)
+    if fmt:
+        return stream_body(fmt, stream_transformers2w(fmt, **stream_filters(page)))
+    return page_body(list_transformers2w(**page))
 
 @router.patch("/{transformer_id}/status")
 def update_status(transformer_id: int, status_update: StatusUpdate):
@@ -0,0 +1,288 @@
+"""
+Per-process LRU cache of parsed VeraGrid circuits keyed by grid_id.
+
+Parsing a grid file is by far the most expensive step of every status
+update and power flow, so the parsed MultiCircuit is kept in memory and
+modified in place. Modified circuits are written back to their file by a
+background flusher (write-behind) after CIRCUIT_CACHE_FLUSH_DELAY seconds,
+when they are evicted, and on shutdown, always through a temporary file
+renamed over the original.
+
+Write-behind is only safe within one process: another worker holding its
+own copy of the grid would overwrite a delayed write. Callers that change a
+grid under its exclusive lock therefore check out with write_through=True,
+which writes the file before the lock is released; the other workers then
+see a newer file and parse it again on their next checkout.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+import VeraGridEngine as gce
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("grid_id", "path", "circuit", "size", "mtime", "version", "flushed_version", "dirty_since", "lock")
+
+    def __init__(self, grid_id: int, path: str, circuit, size: int, mtime: float):
+        self.grid_id = grid_id
+        self.path = path
+        self.circuit = circuit
+        self.size = size
+        self.mtime = mtime
+        self.version = 0
+        self.flushed_version = 0
+        self.dirty_since: Optional[float] = None
+        # Serializes in-place modifications and file writes of this circuit
+        self.lock = threading.RLock()
+
+    @property
+    def dirty(self) -> bool:
+        return self.version != self.flushed_version
+
+
+class CachedCircuit:
+    """Handle yielded by CircuitCache.checkout()."""
+
+    def __init__(self, entry: _Entry):
+        self._entry = entry
+        self._modified = False
+
+    @property
+    def circuit(self):
+        return self._entry.circuit
+
+    @property
+    def version(self) -> int:
+        return self._entry.version
+
+    def mark_dirty(self) -> None:
+        """Record that the circuit was modified and must be written back."""
+        self._modified = True
+
+
+class CircuitCache:
+    def __init__(self, max_bytes: int, size_factor: float, flush_delay: float):
+        self.max_bytes = max_bytes
+        self.size_factor = size_factor
+        self.flush_delay = flush_delay
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._flushes = 0
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    @contextmanager
+    def checkout(self, grid_id: int, path: str, write_through: bool = False):
+        """Yield the cached circuit of a grid with exclusive access to it.
+
+        With write_through=True a modified circuit is written back before
+        this returns instead of by the background flusher.
+        """
+        entry = self._get_entry(grid_id, path)
+        with entry.lock:
+            handle = CachedCircuit(entry)
+            try:
+                yield handle
+            except BaseException:
+                # The block may have left the circuit half-modified; the next checkout re-reads the file
+                self._discard(entry)
+                if entry.dirty:
+                    logger.warning(f"Dropped unsaved changes of grid {grid_id} after an error")
+                raise
+            if handle._modified:
+                entry.version += 1
+                if entry.dirty_since is None:
+                    entry.dirty_since = time.monotonic()
+            with self._lock:
+                still_cached = self._entries.get(grid_id) is entry
+            if entry.dirty and (write_through or not still_cached or self.flush_delay <= 0):
+                if not self._flush_entry(entry) and write_through:
+                    # Never leave a change for a delayed write; the next checkout re-reads the file
+                    self._discard(entry)
+            elif entry.dirty:
+                self._ensure_flusher()
+
+    def evict(self, grid_id: int, flush: bool = True) -> None:
+        """Drop a grid from the cache, writing pending changes first unless flush=False."""
+        with self._lock:
+            entry = self._entries.pop(grid_id, None)
+            if entry is not None:
+                self._bytes -= entry.size
+        if entry is not None and flush:
+            with entry.lock:
+                if entry.dirty:
+                    self._flush_entry(entry)
+
+    def flush_all(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            with entry.lock:
+                if entry.dirty:
+                    self._flush_entry(entry)
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush_all()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "grid_ids": list(self._entries.keys()),
+                "bytes_estimated": self._bytes,
+                "max_bytes": self.max_bytes,
+                "dirty": sum(1 for e in self._entries.values() if e.dirty),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "flushes": self._flushes,
+            }
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _get_entry(self, grid_id: int, path: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(grid_id)
+            if entry is not None and entry.path == path and (entry.dirty or entry.mtime == _mtime(path)):
+                self._entries.move_to_end(grid_id)
+                self._hits += 1
+                return entry
+            self._misses += 1
+
+        # Parse outside the cache lock so other grids are not blocked
+        circuit = gce.open_file(path)
+        size = int(os.path.getsize(path) * self.size_factor)
+        fresh = _Entry(grid_id, path, circuit, size, _mtime(path))
+
+        victims = []
+        with self._lock:
+            current = self._entries.get(grid_id)
+            if current is not None and current.path == path and current.dirty:
+                # Another request modified a concurrently loaded copy; keep it
+                self._entries.move_to_end(grid_id)
+                return current
+            if current is not None:
+                self._bytes -= current.size
+                victims.append(current)
+            self._entries[grid_id] = fresh
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, victim = self._entries.popitem(last=False)
+                self._bytes -= victim.size
+                self._evictions += 1
+                if victim is not fresh:
+                    victims.append(victim)
+                else:
+                    break
+
+        for victim in victims:
+            with victim.lock:
+                if victim.dirty:
+                    self._flush_entry(victim)
+        return fresh
+
+    def _discard(self, entry: _Entry) -> None:
+        with self._lock:
+            if self._entries.get(entry.grid_id) is entry:
+                del self._entries[entry.grid_id]
+                self._bytes -= entry.size
+
+    def _flush_entry(self, entry: _Entry) -> bool:
+        # Caller holds entry.lock
+        version = entry.version
+        try:
+            _save_atomically(entry.circuit, entry.path)
+        except Exception as e:
+            logger.error(f"Could not write circuit of grid {entry.grid_id} to {entry.path}: {e}")
+            return False
+        entry.flushed_version = version
+        entry.dirty_since = None
+        entry.mtime = _mtime(entry.path)
+        with self._lock:
+            self._flushes += 1
+        logger.info(f"Flushed circuit of grid {entry.grid_id} (version {version}) to {entry.path}")
+        return True
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="circuit-cache-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        interval = max(self.flush_delay / 2, 0.1)
+        while not self._stop.wait(interval):
+            now = time.monotonic()
+            with self._lock:
+                due = [
+                    e for e in self._entries.values()
+                    if e.dirty_since is not None and now - e.dirty_since >= self.flush_delay
+                ]
+            for entry in due:
+                # Skip circuits that are in use; they are picked up on the next tick
+                if not entry.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if entry.dirty:
+                        self._flush_entry(entry)
+                finally:
+                    entry.lock.release()
+
+
+def _save_atomically(circuit, path: str) -> None:
+    """Write the circuit next to path and rename it over path.
+
+    Readers (other workers, job processes) see either the old or the new
+    file, never a partial one. The extension is kept because VeraGrid picks
+    the file format from it.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f".{name}.", suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        gce.save_file(circuit, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+circuit_cache = CircuitCache(
+    max_bytes=int(float(os.getenv("CIRCUIT_CACHE_MAX_MB", "512")) * 1024 * 1024),
+    size_factor=float(os.getenv("CIRCUIT_CACHE_SIZE_FACTOR", "8")),
+    flush_delay=float(os.getenv("CIRCUIT_CACHE_FLUSH_DELAY", "2")),
+)
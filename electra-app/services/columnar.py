@@ -0,0 +1,58 @@
+"""
+Columnar (Apache Arrow IPC stream / Parquet) encoding of power-flow tables.
+
+DataFrames are handed to pyarrow column by column, without building one
+Python dict per row. pyarrow is optional: without it only JSON is served.
+"""
+import io
+from typing import Optional
+from fastapi import HTTPException
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # JSON only
+    pa = None
+    pq = None
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+MEDIA_TYPES = {"arrow": ARROW_STREAM, "parquet": PARQUET}
+
+
+def negotiate(fmt: Optional[str], accept: Optional[str]) -> str:
+    """Pick "json", "arrow" or "parquet" from ?format= first, then the Accept header."""
+    if fmt:
+        return fmt
+    if accept:
+        if ARROW_STREAM in accept:
+            return "arrow"
+        if PARQUET in accept:
+            return "parquet"
+    return "json"
+
+
+def ensure_available(fmt: str) -> None:
+    if pa is None:
+        raise HTTPException(status_code=406, detail=f"{MEDIA_TYPES[fmt]} responses require the pyarrow package")
+
+
+def encode_frame(df, fmt: str, metadata: dict) -> bytes:
+    """Encode one results DataFrame; its index (element names) becomes the "name" column.
+
+    metadata (grid name, convergence, state hash, ...) is stored in the schema.
+    """
+    ensure_available(fmt)
+    table = pa.Table.from_pandas(df.rename_axis("name").reset_index(), preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        **{f"electra.{k}": str(v) for k, v in metadata.items()},
+    })
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
@@ -0,0 +1,250 @@
+"""
+N-1 contingency analysis of a stored grid.
+
+Contingencies are the grid file's contingency groups or, when it has none
+(or mode="n-1"), one outage per active line and 2-winding transformer. They
+are sent in batches to the "contingency" process pool; every worker keeps
+the parsed circuit in its own circuit cache, applies each outage in place,
+runs an AC power flow and reverts the outage before the next one. The
+parent holds the grid's shared lock until every batch is back.
+
+method="screen" first ranks every single-branch outage with DC sensitivities
+(services.sensitivity) and only sends the risky ones to the AC solver.
+"""
+import logging
+import os
+import time
+from concurrent.futures import FIRST_EXCEPTION, wait
+from typing import Dict, List, Tuple
+import numpy as np
+import VeraGridEngine as gce
+from fastapi import HTTPException
+from repositories.element_status_repo import list_element_status
+from services.circuit_cache import circuit_cache
+from services.grid_locks import grid_lock
+from services.power_flow import power_flow_frames
+from services.sensitivity import dc_model, screen_outages
+from services.status_sync import build_status_index, apply_status, state_hash
+from services.workers import get_pool, PoolSaturatedError
+
+logger = logging.getLogger(__name__)
+
+# Contingencies solved by one pool task
+BATCH_SIZE = int(os.getenv("CONTINGENCY_BATCH_SIZE", "16"))
+# Largest number of contingencies solved by one request
+MAX_CONTINGENCIES = int(os.getenv("CONTINGENCY_MAX", "20000"))
+# DC screening sends outages loading some branch above this share of max_loading to AC
+SCREEN_MARGIN = float(os.getenv("CONTINGENCY_SCREEN_MARGIN", "0.9"))
+
+# A case is ("group", contingency group idtag) or ("branch", branch idtag)
+Case = Tuple[str, str]
+
+
+def run_contingency_analysis(
+    grid_id: int,
+    tmp_path: str,
+    mode: str = "auto",
+    max_loading: float = 100.0,
+    top: int = 100,
+    method: str = "ac",
+) -> dict:
+    """Solve every contingency and rank the post-contingency violations.
+
+    max_loading is the branch loading (%) above which a branch is overloaded;
+    bus voltages are checked against each bus's Vmin/Vmax. violations holds
+    the worst `top` rows by severity (loading above the limit in %, or the
+    distance to the voltage band in p.u. x 100).
+    """
+    started = time.perf_counter()
+    base = None
+    if method == "screen":
+        if mode == "model":
+            raise HTTPException(status_code=400, detail="Screening covers single-branch (N-1) outages only")
+        # Base-case flows of the current state (usually cached); solved before the grid lock is taken
+        base = power_flow_frames(grid_id, tmp_path)
+    status_index = build_status_index(list_element_status(grid_id))
+    fingerprint = state_hash(status_index)
+    if base is not None and base["state_hash"] != fingerprint:
+        raise HTTPException(status_code=409, detail=f"Grid {grid_id} changed during the analysis; try again")
+    pool = get_pool("contingency")
+
+    screening = None
+    with grid_lock(grid_id):
+        with circuit_cache.checkout(grid_id, tmp_path) as cached:
+            apply_status(cached.circuit, status_index)
+            cases = _cases(cached.circuit, "n-1" if method == "screen" else mode)
+            grid_name = str(cached.circuit.name)
+            if method == "screen":
+                model = dc_model(grid_id, fingerprint, cached.circuit)
+
+        if not cases:
+            raise HTTPException(status_code=400, detail=f"Grid {grid_id} has no contingencies to analyse")
+        if method == "screen":
+            screening = screen_outages(
+                model, base["branch_df"]["Pf"].to_numpy(), [idtag for _, idtag in cases], max_loading, SCREEN_MARGIN,
+            )
+            screening["model_cached"] = model["cached"]
+            screening["model_seconds"] = model["build_seconds"]
+            cases = [("branch", idtag) for idtag in screening["flagged"]]
+        if len(cases) > MAX_CONTINGENCIES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{len(cases)} contingencies; at most {MAX_CONTINGENCIES} per request",
+            )
+
+        futures = []
+        try:
+            for i in range(0, len(cases), BATCH_SIZE):
+                futures.append(pool.submit(
+                    _solve_batch, grid_id, tmp_path, status_index, cases[i:i + BATCH_SIZE], max_loading,
+                ))
+        except PoolSaturatedError as e:
+            for future in futures:
+                future.cancel()
+            raise HTTPException(status_code=429, detail=str(e))
+
+        _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+        batches = [future.result() for future in futures]
+
+    seconds = time.perf_counter() - started
+    outcomes = [outcome for batch in batches for outcome in batch["outcomes"]]
+    violations = [row for outcome in outcomes for row in outcome.pop("violations")]
+    violations.sort(key=lambda row: row["severity"], reverse=True)
+    outcomes.sort(key=lambda outcome: (outcome["converged"], -outcome["worst_severity"]))
+    analysed = screening["screened"] if screening is not None else len(cases)
+
+    result = {
+        "grid_name": grid_name,
+        "state_hash": fingerprint,
+        "method": method,
+        "mode": "n-1" if method == "screen" or cases[0][0] == "branch" else "model",
+        "contingencies": analysed,
+        "ac_solved": len(cases),
+        "not_converged": sum(1 for outcome in outcomes if not outcome["converged"]),
+        "with_violations": sum(1 for outcome in outcomes if outcome["overloads"] or outcome["voltage_violations"]),
+        "violations_total": len(violations),
+        "violations": violations[:top],
+        "contingency_summary": outcomes[:top],
+        "seconds": round(seconds, 4),
+        "contingencies_per_second": round(analysed / seconds, 2) if seconds > 0 else None,
+        "batches": [{key: batch[key] for key in ("size", "seconds", "pid")} for batch in batches],
+    }
+    if screening is not None:
+        screening["estimates"] = screening["estimates"][:top]
+        screening["flagged"] = len(screening["flagged"])
+        result["screening"] = screening
+    return result
+
+
+def _cases(circuit, mode: str) -> List[Case]:
+    if mode in ("auto", "model"):
+        groups = sorted({con.group.idtag for con in circuit.contingencies if con.group is not None})
+        if groups or mode == "model":
+            return [("group", idtag) for idtag in groups]
+    return [("branch", branch.idtag) for branch in (*circuit.lines, *circuit.transformers2w) if branch.active]
+
+
+def _solve_batch(
+    grid_id: int,
+    tmp_path: str,
+    status_index: Dict[str, Dict[str, bool]],
+    cases: List[Case],
+    max_loading: float,
+) -> dict:
+    # Runs inside a "contingency" worker process; its circuit cache parses the file once
+    started = time.perf_counter()
+    outcomes = []
+    with circuit_cache.checkout(grid_id, tmp_path) as cached:
+        circuit = cached.circuit
+        apply_status(circuit, status_index)
+        branches = {branch.idtag: branch for branch in (*circuit.lines, *circuit.transformers2w)}
+        by_group = {}
+        for con in circuit.contingencies:
+            if con.group is not None:
+                by_group.setdefault(con.group.idtag, []).append(con)
+        vmin = np.array([bus.Vmin for bus in circuit.buses], dtype=float)
+        vmax = np.array([bus.Vmax for bus in circuit.buses], dtype=float)
+
+        for kind, idtag in cases:
+            if kind == "group":
+                contingencies = by_group.get(idtag, [])
+                name = contingencies[0].group.name if contingencies else idtag
+                changes = _outage_changes(contingencies)
+            else:
+                name = branches[idtag].name
+                changes = [(branches[idtag], "active", False)]
+            outcomes.append(_solve_case(circuit, kind, idtag, name, changes, vmin, vmax, max_loading))
+
+    return {
+        "size": len(cases),
+        "seconds": round(time.perf_counter() - started, 4),
+        "pid": os.getpid(),
+        "outcomes": outcomes,
+    }
+
+
+def _outage_changes(contingencies) -> list:
+    """(device, attribute, new value) triples of one contingency group."""
+    changes = []
+    for con in contingencies:
+        device = con.device
+        if device is None:
+            continue
+        if con.prop == gce.ContingencyOperationTypes.Active:
+            changes.append((device, "active", bool(con.value)))
+        elif con.prop == gce.ContingencyOperationTypes.PowerPercentage and hasattr(device, "P"):
+            changes.append((device, "P", device.P * float(con.value) / 100.0))
+    return changes
+
+
+def _solve_case(circuit, kind: str, idtag: str, name: str, changes: list, vmin, vmax, max_loading: float) -> dict:
+    previous = [(device, attr, getattr(device, attr)) for device, attr, _ in changes]
+    try:
+        for device, attr, value in changes:
+            setattr(device, attr, value)
+        results = gce.power_flow(circuit)
+    finally:
+        # The cached circuit is shared by every case of this worker
+        for device, attr, value in reversed(previous):
+            setattr(device, attr, value)
+
+    converged = bool(results.converged)
+    violations = []
+    if converged:
+        loading = np.abs(results.loading.real) * 100.0
+        for i in np.flatnonzero(loading > max_loading):
+            violations.append({
+                "kind": "overload",
+                "element": str(results.branch_names[i]),
+                "value": float(loading[i]),
+                "limit": max_loading,
+                "severity": float(loading[i] - max_loading),
+            })
+        vm = np.abs(results.voltage)
+        low = np.flatnonzero(vm < vmin)
+        high = np.flatnonzero(vm > vmax)
+        for i, limit in [(i, vmin[i]) for i in low] + [(i, vmax[i]) for i in high]:
+            violations.append({
+                "kind": "undervoltage" if vm[i] < limit else "overvoltage",
+                "element": str(results.bus_names[i]),
+                "value": float(vm[i]),
+                "limit": float(limit),
+                "severity": float(abs(vm[i] - limit) * 100.0),
+            })
+    for row in violations:
+        row["contingency"] = idtag
+        row["contingency_name"] = name
+
+    return {
+        "contingency": idtag,
+        "name": name,
+        "kind": kind,
+        "converged": converged,
+        "overloads": sum(1 for row in violations if row["kind"] == "overload"),
+        "voltage_violations": sum(1 for row in violations if row["kind"] != "overload"),
+        "max_loading": float(np.nanmax(np.abs(results.loading.real)) * 100.0) if converged and len(results.loading) else None,
+        "worst_severity": max((row["severity"] for row in violations), default=0.0),
+        "violations": violations,
+    }
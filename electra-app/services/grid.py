@@ -1,199 +1,241 @@
 from fastapi import UploadFile, HTTPException
+import asyncio
 import logging
 import os
-import tempfile
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
 import VeraGridEngine as gce
-from repositories.grid_ingest_repo import save_grid_payload
-from repositories.grids_repo import list_grid_ids as repo_list_grid_ids
+from repositories.grid_ingest_repo import save_grid_payload, clone_grid
+from repositories.grids_repo import list_grid_ids as repo_list_grid_ids, find_grid_by_hash
+from repositories.payloads_repo import get_payload
+from services.circuit_cache import circuit_cache
+from services.grid_locks import grid_lock
+from services.columnar import encode_frame, ensure_available
+from services.contingency import run_contingency_analysis
+from services.power_flow import run_power_flow, power_flow_frames, SUMMARY_FIELDS
+from services.result_cache import evict_grid as evict_cached_results
+from services.storage import store_upload, remove_file
+from services.time_series import run_time_series, time_series_frame
+from services.workers import get_pool, PoolSaturatedError
 
 logger = logging.getLogger(__name__)
 
 
-async def upload_file(file: UploadFile):
-    try:
-
-        # Es crea un fitxer temporal per guardar el contingut del fitxer pujat
-        suffix = os.path.splitext(file.filename)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            content = await file.read()
-            if not content:
-                raise HTTPException(status_code=400, detail="Uploaded file is empty")
-            tmp.write(content)
-            tmp_path = tmp.name
-
-        # S'utilitza VeraGrid per processar el fitxer i obtenir les dades del model
-        grid_ = gce.open_file(tmp_path)
-        instruction = gce.RemoteInstruction(operation=gce.SimulationTypes.NoSim)
-        model_data = gce.gather_model_as_jsons_for_communication(circuit=grid_, instruction=instruction)
+class InvalidGridFile(ValueError):
+    """Raised by the ingest worker when VeraGrid cannot make sense of a file."""
 
-        # Basic validation of VeraGridEngine response
-        if not isinstance(model_data, dict):
-            raise HTTPException(
-                status_code=400,
-                detail=f"VeraGridEngine returned unexpected data type: {type(model_data).__name__}: {repr(model_data)[:200]}",
-            )
 
-        #src/VeraGrid/Gui/Diagrams/SchematicWidget/schematic_widget.py L1792
-        #function auto_layout
+async def upload_file(file: UploadFile, on_duplicate: str = "clone"):
+    stored = None
+    try:
 
+        # Es desa el fitxer pujat al directori d'emmagatzematge, per blocs
+        stored = await store_upload(file)
+        tmp_path = stored["path"]
 
-        # Attach tmp file path so we can clean it up later on delete
-        model_data["tmp_file_path"] = tmp_path
+        # Un fitxer ja pujat (mateix SHA-256) no es torna a processar
+        if on_duplicate != "import":
+            existing_id = await run_in_threadpool(find_grid_by_hash, stored["sha256"])
+            if existing_id is not None:
+                duplicate = await _handle_duplicate(existing_id, stored, on_duplicate)
+                if duplicate is not None:
+                    return duplicate
 
-        # Persist in DB
-        result = save_grid_payload(model_data)
+        # El parseig i la càrrega a la BD es fan fora del bucle d'esdeveniments
+        try:
+            future = get_pool("ingest").submit(_ingest_file, tmp_path, stored["sha256"])
+        except PoolSaturatedError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        try:
+            result = await asyncio.wrap_future(future)
+        except InvalidGridFile as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        return {
-            "message": "Grid saved",
-            "grid_id": result["grid_id"],
-            "buses_saved": result["buses_saved"],
-            "lines_saved": result["lines_saved"],
-            "generators_saved": result["generators_saved"],
-            "loads_saved": result["loads_saved"],
-            "shunts_saved": result["shunts_saved"],
-            "transformers2w_saved": result["transformers2w_saved"],
-        }
+        return _upload_response("Grid saved", result, stored)
 
+    except HTTPException:
+        if stored:
+            remove_file(stored["path"])
+        raise
     except Exception as e:
+        if stored:
+            remove_file(stored["path"])
         # Log full stack trace for diagnosis
         logger.exception("Error during grid upload")
         raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {str(e)}")
 
+
+async def _handle_duplicate(existing_id: int, stored: dict, on_duplicate: str) -> Optional[dict]:
+    if on_duplicate == "reuse":
+        remove_file(stored["path"])
+        return {
+            "message": "Grid already uploaded",
+            "grid_id": existing_id,
+            "duplicate_of": existing_id,
+            "file_size": stored["size"],
+            "file_sha256": stored["sha256"],
+        }
+    # clone: the new grid keeps the uploaded copy of the file and a copy of the stored rows,
+    # with the statuses of the file rather than those changed on the original grid
+    result = await run_in_threadpool(clone_grid, existing_id, stored["path"])
+    if result is None:
+        # The original grid was deleted in the meantime or predates base statuses
+        return None
+    logger.info(f"Grid {result['grid_id']} cloned from grid {existing_id} (same file hash)")
+    response = _upload_response("Grid cloned", result, stored)
+    response["duplicate_of"] = existing_id
+    return response
+
+
+def _upload_response(message: str, result: dict, stored: dict) -> dict:
+    return {
+        "message": message,
+        "grid_id": result["grid_id"],
+        "buses_saved": result["buses_saved"],
+        "lines_saved": result["lines_saved"],
+        "generators_saved": result["generators_saved"],
+        "loads_saved": result["loads_saved"],
+        "shunts_saved": result["shunts_saved"],
+        "transformers2w_saved": result["transformers2w_saved"],
+        "file_size": stored["size"],
+        "file_sha256": stored["sha256"],
+    }
+
+
+def _ingest_file(tmp_path: str, file_hash: Optional[str] = None) -> dict:
+    # Runs inside an "ingest" worker process
+    # S'utilitza VeraGrid per processar el fitxer i obtenir les dades del model
+    grid_ = gce.open_file(tmp_path)
+    instruction = gce.RemoteInstruction(operation=gce.SimulationTypes.NoSim)
+    model_data = gce.gather_model_as_jsons_for_communication(circuit=grid_, instruction=instruction)
+
+    # Basic validation of VeraGridEngine response
+    if not isinstance(model_data, dict):
+        raise InvalidGridFile(
+            f"VeraGridEngine returned unexpected data type: {type(model_data).__name__}: {repr(model_data)[:200]}"
+        )
+
+    #src/VeraGrid/Gui/Diagrams/SchematicWidget/schematic_widget.py L1792
+    #function auto_layout
+
+
+    # Attach tmp file path so we can clean it up later on delete
+    model_data["tmp_file_path"] = tmp_path
+
+    # Persist in DB
+    return save_grid_payload(model_data, file_hash=file_hash)
+
 def list_grid_ids():
     return repo_list_grid_ids()
 
+# Stored model JSON of a grid, only read when explicitly asked for
+def get_raw_payload(grid_id: int) -> bytes:
+    raw = get_payload(grid_id)
+    if raw is None:
+        raise HTTPException(status_code=404, detail=f"No stored model payload for grid {grid_id}")
+    return raw
+
 # Delete a grid and its associated tmp file (if present)
 def delete_grid(grid_id: int):
     from repositories.grids_repo import get_tmp_file_path, delete_grid as repo_delete_grid
 
-    tmp_path = get_tmp_file_path(grid_id)
-    # Delete DB row first (children cascade)
-    repo_delete_grid(grid_id)
-    # Delete the temporary file
-    if tmp_path and os.path.exists(tmp_path):
-        try:
-            os.remove(tmp_path)
-            logger.info(f"Deleted temporary file: {tmp_path}")
-        except Exception as e:
-            logger.warning(f"Could not delete temporary file {tmp_path}: {e}")
+    # No solve or status write may be using the grid while it disappears
+    with grid_lock(grid_id, exclusive=True):
+        tmp_path = get_tmp_file_path(grid_id)
+        # Delete DB row first (children cascade)
+        repo_delete_grid(grid_id)
+        # Drop the cached circuit without writing pending changes back
+        circuit_cache.evict(grid_id, flush=False)
+        evict_cached_results(grid_id)
+        # Delete the temporary file
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+                logger.info(f"Deleted temporary file: {tmp_path}")
+            except Exception as e:
+                logger.warning(f"Could not delete temporary file {tmp_path}: {e}")
 
 # Calculate power flow for a grid
-def calculate_power_flow(grid_id: int):
+def calculate_power_flow(grid_id: int, min_loading: Optional[float] = None):
+    tmp_path = _grid_file(grid_id)
+    try:
+        return run_power_flow(grid_id, tmp_path, min_loading=min_loading)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error calculating power flow for grid {grid_id}")
+        raise HTTPException(status_code=500, detail=f"Power flow calculation failed: {str(e)}")
+
+# Power flow bus or branch table encoded as Arrow IPC / Parquet; returns (content, summary)
+def calculate_power_flow_table(grid_id: int, table: str, fmt: str, min_loading: Optional[float] = None):
+    # Fail before solving when pyarrow is missing
+    ensure_available(fmt)
+    tmp_path = _grid_file(grid_id)
+    try:
+        frames = power_flow_frames(grid_id, tmp_path, min_loading=min_loading)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error calculating power flow for grid {grid_id}")
+        raise HTTPException(status_code=500, detail=f"Power flow calculation failed: {str(e)}")
+    summary = {field: frames[field] for field in SUMMARY_FIELDS}
+    return encode_frame(frames[f"{table}_df"], fmt, {**summary, "table": table}), summary
+
+# Time-series power flow over [start, end); JSON-ready dict, or (content, summary) for Arrow / Parquet
+def calculate_time_series(grid_id: int, start: int = 0, end: Optional[int] = None, chunks: Optional[int] = None,
+                          fmt: str = "json", table: str = "vm"):
+    if fmt != "json":
+        ensure_available(fmt)
+    tmp_path = _grid_file(grid_id)
+    try:
+        results = run_time_series(grid_id, tmp_path, start=start, end=end, chunks=chunks)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error calculating time-series power flow for grid {grid_id}")
+        raise HTTPException(status_code=500, detail=f"Time-series power flow failed: {str(e)}")
+    logger.info(
+        f"Time-series power flow of grid {grid_id}: {results['end'] - results['start']} steps "
+        f"in {len(results['chunks'])} chunks, {results['seconds']} s"
+    )
+    if fmt == "json":
+        return results
+    summary = {
+        "grid_name": results["grid_name"],
+        "state_hash": results["state_hash"],
+        "start": results["start"],
+        "end": results["end"],
+        "converged_steps": int(results["converged"].sum()),
+        "seconds": results["seconds"],
+    }
+    return encode_frame(time_series_frame(results, table), fmt, {**summary, "table": table}), summary
+
+# Contingency analysis (model contingency groups or N-1) with ranked violations
+def calculate_contingency_analysis(grid_id: int, mode: str = "auto", max_loading: float = 100.0, top: int = 100,
+                                   method: str = "ac"):
+    tmp_path = _grid_file(grid_id)
+    try:
+        result = run_contingency_analysis(grid_id, tmp_path, mode=mode, max_loading=max_loading, top=top, method=method)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error running contingency analysis for grid {grid_id}")
+        raise HTTPException(status_code=500, detail=f"Contingency analysis failed: {str(e)}")
+    logger.info(
+        f"Contingency analysis of grid {grid_id} ({method}): {result['contingencies']} contingencies, "
+        f"{result['ac_solved']} AC solves in {result['seconds']} s ({result['contingencies_per_second']}/s)"
+    )
+    return result
+
+def _grid_file(grid_id: int) -> str:
     from repositories.grids_repo import get_tmp_file_path
-    from services.bus import list_buses as service_list_buses
-    from services.generator import list_generators as service_list_generators
-    from services.load import list_loads as service_list_loads
-    from services.shunt import list_shunts as service_list_shunts
-    from services.line import list_lines as service_list_lines
-    from services.transformer2w import list_transformers2w as service_list_transformers2w
-    
+
     # Get the temporary file path for this grid
     tmp_path = get_tmp_file_path(grid_id)
-    
+
     if not tmp_path:
         raise HTTPException(status_code=404, detail=f"Grid {grid_id} not found")
-    
+
     if not os.path.exists(tmp_path):
         raise HTTPException(status_code=404, detail=f"Grid file not found for grid {grid_id}")
-    
-    try:
-        # Open the grid file
-        main_circuit = gce.open_file(tmp_path)
-        
-        # Sync active status from database to circuit
-        # Get all elements from database for this grid
-        
-        db_buses = service_list_buses()
-        db_generators = service_list_generators()
-        db_loads = service_list_loads()
-        db_shunts = service_list_shunts()
-        db_lines = service_list_lines()
-        db_transformers = service_list_transformers2w()
-        
-        # Filter by grid_id
-        db_buses = [b for b in db_buses if b.get('grid_id') == grid_id]
-        db_generators = [g for g in db_generators if g.get('grid_id') == grid_id]
-        db_loads = [l for l in db_loads if l.get('grid_id') == grid_id]
-        db_shunts = [s for s in db_shunts if s.get('grid_id') == grid_id]
-        db_lines = [l for l in db_lines if l.get('grid_id') == grid_id]
-        db_transformers = [t for t in db_transformers if t.get('grid_id') == grid_id]
-        
-        # Sync buses
-        for bus in main_circuit.buses:
-            db_bus = next((b for b in db_buses if b.get('idtag') == bus.idtag), None)
-            if db_bus and 'active' in db_bus:
-                bus.active = db_bus['active']
-        
-        # Sync generators
-        for gen in main_circuit.generators:
-            db_gen = next((g for g in db_generators if g.get('idtag') == gen.idtag), None)
-            if db_gen and 'active' in db_gen:
-                gen.active = db_gen['active']
-        
-        # Sync loads
-        for load in main_circuit.loads:
-            db_load = next((l for l in db_loads if l.get('idtag') == load.idtag), None)
-            if db_load and 'active' in db_load:
-                load.active = db_load['active']
-        
-        # Sync shunts
-        for shunt in main_circuit.shunts:
-            db_shunt = next((s for s in db_shunts if s.get('idtag') == shunt.idtag), None)
-            if db_shunt and 'active' in db_shunt:
-                shunt.active = db_shunt['active']
-        
-        # Sync lines
-        for line in main_circuit.lines:
-            db_line = next((l for l in db_lines if l.get('idtag') == line.idtag), None)
-            if db_line and 'active' in db_line:
-                line.active = db_line['active']
-        
-        # Sync transformers
-        for transformer in main_circuit.transformers2w:
-            db_transformer = next((t for t in db_transformers if t.get('idtag') == transformer.idtag), None)
-            if db_transformer and 'active' in db_transformer:
-                transformer.active = db_transformer['active']
-        
-        # Save updated circuit back to tmp file
-        gce.save_file(main_circuit, tmp_path)
-        logger.info(f"Synced active status from database to circuit for grid {grid_id}")
-        
-        # Run power flow calculation
-        results = gce.power_flow(main_circuit)
-        
-        # Convert DataFrames to JSON-serializable format
-        import json
-        import numpy as np
-        
-        # Helper to convert numpy types to native Python types
-        def convert_numpy(obj):
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                return float(obj)
-            elif isinstance(obj, np.bool_):
-                return bool(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            return obj
-        
-        bus_df = results.get_bus_df()
-        branch_df = results.get_branch_df()
-        
-        # Convert to dict and then convert numpy types
-        bus_results = json.loads(bus_df.to_json(orient='records'))
-        branch_results = json.loads(branch_df.to_json(orient='records'))
-        
-        # Return results as JSON
-        # Note: branch_results includes both lines and transformers
-        return {
-            "grid_name": str(main_circuit.name),
-            "converged": bool(results.converged),
-            "error": float(results.error),
-            "bus_results": bus_results,
-            "branch_results": branch_results
-        }
-        
-    except Exception as e:
-        logger.exception(f"Error calculating power flow for grid {grid_id}")
-        raise HTTPException(status_code=500, detail=f"Power flow calculation failed: {str(e)}")
\ No newline at end of file
+    return tmp_path
@@ -0,0 +1,154 @@
+"""
+Per-grid reader/writer locks.
+
+Operations that change a grid's file or rows (status updates written to the
+file, status batches, deletion) take the grid exclusively;
+power-flow solves that read the grid file take it shared. Different grids
+never wait for each other.
+
+Within a process the lock is a writer-preferring RWLock. Across uvicorn
+workers and job processes it is mirrored by a Postgres session-level
+advisory lock (GRID_LOCK_ADVISORY=0 turns that off for single-process
+deployments). Each held advisory lock keeps one connection of the separate
+lock pool (db.get_lock_pool), never one of the request pool; when that pool
+is exhausted the grid counts as busy.
+
+Grid files themselves are always replaced atomically by the circuit cache,
+so readers never see a partially written file even without a lock. The
+lock is not re-entrant: never take it again inside a locked block.
+"""
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Optional
+from fastapi import HTTPException
+from db.db import get_lock_pool
+from db.pool import PoolExhaustedError
+from repositories.advisory_locks_repo import lock_grid, unlock_grid, AdvisoryLockTimeout
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT = float(os.getenv("GRID_LOCK_TIMEOUT", "30"))
+USE_ADVISORY = os.getenv("GRID_LOCK_ADVISORY", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+class RWLock:
+    """Many readers or one writer; waiting writers block new readers."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self._readers += 1
+            return True
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self._writer = True
+                return True
+            finally:
+                self._writers_waiting -= 1
+                if not self._writer:
+                    # Readers held back for this writer may go on
+                    self._cond.notify_all()
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+# Only grids somebody holds or waits for keep an entry; the rest are collected
+_locks: "weakref.WeakValueDictionary[int, RWLock]" = weakref.WeakValueDictionary()
+_locks_guard = threading.Lock()
+
+
+def _lock_for(grid_id: int) -> RWLock:
+    with _locks_guard:
+        lock = _locks.get(grid_id)
+        if lock is None:
+            lock = _locks[grid_id] = RWLock()
+        return lock
+
+
+def _busy(grid_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"Grid {grid_id} is busy; try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+@contextmanager
+def grid_lock(grid_id: int, exclusive: bool = False, timeout: Optional[float] = None):
+    """Hold the grid's lock (shared by default) for the duration of the block.
+
+    Raises 503 if it cannot be taken within timeout (GRID_LOCK_TIMEOUT).
+    """
+    timeout = LOCK_TIMEOUT if timeout is None else timeout
+    started = time.monotonic()
+    lock = _lock_for(grid_id)
+    acquired = lock.acquire_write(timeout) if exclusive else lock.acquire_read(timeout)
+    if not acquired:
+        raise _busy(grid_id)
+    try:
+        if not USE_ADVISORY:
+            yield
+            return
+        pool = get_lock_pool()
+        try:
+            conn = pool.getconn(timeout=max(timeout - (time.monotonic() - started), 0.001))
+        except PoolExhaustedError:
+            raise _busy(grid_id)
+        # Closing the session is the fallback way of releasing its advisory lock
+        discard = False
+        try:
+            try:
+                lock_grid(conn, grid_id, exclusive, max(timeout - (time.monotonic() - started), 0.001))
+            except AdvisoryLockTimeout:
+                raise _busy(grid_id)
+            except Exception:
+                discard = True
+                raise
+            try:
+                yield
+            finally:
+                try:
+                    unlock_grid(conn, grid_id, exclusive)
+                except Exception as e:
+                    logger.warning(f"Could not release advisory lock of grid {grid_id}: {e}")
+                    discard = True
+        finally:
+            pool.putconn(conn, discard=discard)
+    finally:
+        if exclusive:
+            lock.release_write()
+        else:
+            lock.release_read()
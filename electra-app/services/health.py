@@ -1,4 +1,8 @@
-from db.db import get_conn
+from db.db import get_conn, pool_stats as db_pool_stats
+from repositories.migrations import current_version, LATEST_VERSION
+from services.circuit_cache import circuit_cache
+from services.workers import pools_stats
+from services.result_cache import power_flow_cache, sensitivity_cache
 
 
 def db_health_check() -> dict:
@@ -8,8 +12,29 @@ def db_health_check() -> dict:
             with conn.cursor() as cur:
                 cur.execute("SELECT 1;")
                 _ = cur.fetchone()
-            return {"status": "ok"}
         finally:
             conn.close()
+        # During a rolling deploy the database may already be ahead of this release
+        return {"status": "ok", "schema_version": current_version(), "schema_latest": LATEST_VERSION}
     except Exception as e:
         return {"status": "error", "error": f"{type(e).__name__}: {str(e)}"}
+
+
+def pool_stats() -> dict:
+    return db_pool_stats()
+
+
+def circuit_cache_stats() -> dict:
+    return circuit_cache.stats()
+
+
+def worker_pools_stats() -> list:
+    return pools_stats()
+
+
+def power_flow_cache_stats() -> dict:
+    return power_flow_cache.stats()
+
+
+def sensitivity_cache_stats() -> dict:
+    return sensitivity_cache.stats()
@@ -0,0 +1,108 @@
+"""
+Asynchronous power-flow jobs.
+
+Jobs are recorded in the jobs table and executed on the "power_flow" process
+pool; any uvicorn worker can report their status and results because both
+live in Postgres.
+
+A job whose worker process dies, or that is cancelled on shutdown, is failed
+by a callback on its future. Jobs lost with a whole server (restarts) are
+failed once they have been queued or running for longer than JOB_TIMEOUT.
+"""
+import logging
+import os
+import uuid
+from fastapi import HTTPException
+from repositories import jobs_repo
+from repositories.grids_repo import get_tmp_file_path
+from services.serialization import dumps_str
+from services.workers import get_pool, PoolSaturatedError
+
+logger = logging.getLogger(__name__)
+
+POWER_FLOW_JOB = "power_flow"
+
+# Seconds after which a queued/running job is considered lost
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "3600"))
+
+
+def submit_power_flow_job(grid_id: int) -> dict:
+    tmp_path = get_tmp_file_path(grid_id)
+    if not tmp_path:
+        raise HTTPException(status_code=404, detail=f"Grid {grid_id} not found")
+    if not os.path.exists(tmp_path):
+        raise HTTPException(status_code=404, detail=f"Grid file not found for grid {grid_id}")
+
+    job_id = uuid.uuid4().hex
+    jobs_repo.create_job(job_id, POWER_FLOW_JOB, grid_id)
+    try:
+        future = get_pool("power_flow").submit(_run_power_flow_job, job_id, grid_id)
+    except PoolSaturatedError as e:
+        jobs_repo.mark_failed(job_id, f"Rejected: {e}")
+        raise HTTPException(status_code=429, detail=str(e))
+    future.add_done_callback(lambda f: _on_job_done(job_id, f))
+    return {"job_id": job_id, "kind": POWER_FLOW_JOB, "grid_id": grid_id, "status": "queued"}
+
+
+def fail_stale_jobs() -> int:
+    """Fail every job queued or running for longer than JOB_TIMEOUT (run at startup)."""
+    return jobs_repo.fail_stale_jobs(JOB_TIMEOUT, f"Lost: not finished after {JOB_TIMEOUT:.0f}s")
+
+
+def get_job(job_id: str, include_result: bool = True) -> dict:
+    row = jobs_repo.get_job(job_id, include_result=include_result)
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if row["status"] in ("queued", "running"):
+        # Its worker may be gone for good (restart, crash of another server)
+        if jobs_repo.fail_stale_jobs(JOB_TIMEOUT, f"Lost: not finished after {JOB_TIMEOUT:.0f}s", job_id=job_id):
+            row = jobs_repo.get_job(job_id, include_result=include_result)
+    submitted_at, started_at, finished_at = row["submitted_at"], row["started_at"], row["finished_at"]
+    return {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "grid_id": row["grid_id"],
+        "status": row["status"],
+        "submitted_at": submitted_at,
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "queue_seconds": (started_at - submitted_at).total_seconds() if started_at else None,
+        "run_seconds": (finished_at - started_at).total_seconds() if started_at and finished_at else None,
+        "error": row["error"],
+        "result": row["result"],
+    }
+
+
+def _on_job_done(job_id: str, future) -> None:
+    # Runs in the parent; the worker records its own success or failure, so this only
+    # covers jobs that never reported back (worker process killed, pool shut down)
+    if future.cancelled():
+        error = "Cancelled before it ran (server shutting down)"
+    elif future.exception() is not None:
+        e = future.exception()
+        error = f"Worker failed: {type(e).__name__}: {str(e)}"
+    else:
+        return
+    try:
+        if jobs_repo.fail_unfinished(job_id, error):
+            logger.warning(f"Power flow job {job_id} failed outside its worker: {error}")
+    except Exception as e:
+        logger.error(f"Could not mark power flow job {job_id} as failed: {e}")
+
+
+def _run_power_flow_job(job_id: str, grid_id: int) -> None:
+    # Runs inside a worker process
+    from services.power_flow import run_power_flow
+
+    jobs_repo.mark_running(job_id)
+    try:
+        tmp_path = get_tmp_file_path(grid_id)
+        if not tmp_path or not os.path.exists(tmp_path):
+            raise FileNotFoundError(f"Grid file not found for grid {grid_id}")
+        result = run_power_flow(grid_id, tmp_path)
+    except Exception as e:
+        logger.exception(f"Power flow job {job_id} for grid {grid_id} failed")
+        jobs_repo.mark_failed(job_id, f"{type(e).__name__}: {str(e)}")
+        return
+    # NaN/Infinity are not valid in JSONB; the orjson encoder writes them as null
+    jobs_repo.mark_succeeded(job_id, result, dumps=dumps_str)
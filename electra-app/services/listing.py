@@ -0,0 +1,49 @@
+from typing import Callable, Iterable, Iterator
+from fastapi import HTTPException
+from services.serialization import dumps
+
+# Rows encoded per chunk handed to the StreamingResponse
+STREAM_BATCH_ROWS = 500
+
+
+def fetch_page(repo_list: Callable[..., dict], **params) -> dict:
+    """Run a repository list function, turning bad field projections into 400s."""
+    try:
+        return repo_list(**params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def fetch_stream(repo_stream: Callable[..., Iterator[dict]], fmt: str, **params) -> Iterator[bytes]:
+    """Encode a repository row iterator as NDJSON ("ndjson") or one JSON array ("json")."""
+    try:
+        rows = repo_stream(**params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _ndjson_chunks(rows) if fmt == "ndjson" else _json_array_chunks(rows)
+
+
+def _ndjson_chunks(rows: Iterable[dict]) -> Iterator[bytes]:
+    batch = []
+    for row in rows:
+        batch.append(dumps(row))
+        if len(batch) >= STREAM_BATCH_ROWS:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+
+def _json_array_chunks(rows: Iterable[dict]) -> Iterator[bytes]:
+    yield b"["
+    first = True
+    batch = []
+    for row in rows:
+        batch.append(dumps(row))
+        if len(batch) >= STREAM_BATCH_ROWS:
+            yield (b"" if first else b",") + b",".join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b"" if first else b",") + b",".join(batch)
+    yield b"]"
@@ -0,0 +1,232 @@
+"""
+Snapshot power flow of a stored grid.
+
+Shared by the synchronous endpoint and the job workers (services.jobs).
+Solved states are looked up by (grid_id, state_hash) first in the in-memory
+result cache, then in power_flow_runs / bus_results / branch_results, and
+only solved while the grid's active-status vector has not been seen. Results
+are kept as DataFrames and only turned into JSON records or Arrow tables
+when a response is built.
+
+A solve starts from the grid's last converged bus voltages when there are
+some (in memory, else power_flow_voltages), which usually saves Newton
+iterations after a few switching changes; if that guess does not converge
+the grid is solved again from a flat start.
+"""
+import logging
+import os
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+import VeraGridEngine as gce
+from repositories import results_repo
+from repositories.element_status_repo import list_element_status
+from services.circuit_cache import circuit_cache
+from services.grid_locks import grid_lock
+from services.result_cache import power_flow_cache, warm_start_cache
+from services.serialization import df_records
+from services.status_sync import WRITE_STATUS_TO_FILE, build_status_index, apply_status, summarize, state_hash
+
+logger = logging.getLogger(__name__)
+
+# Number of solved states kept per grid
+RESULTS_KEEP = int(os.getenv("POWER_FLOW_RESULTS_KEEP", "20"))
+# Seed each solve with the grid's last converged voltages
+WARM_START = os.getenv("POWER_FLOW_WARM_START", "1").strip().lower() not in ("0", "false", "no", "off")
+# Also keep them in power_flow_voltages, for other workers and restarts
+WARM_START_DB = os.getenv("POWER_FLOW_WARM_START_DB", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+# Scalar fields returned next to the bus and branch tables
+SUMMARY_FIELDS = ("grid_name", "converged", "error", "iterations", "warm_start", "state_hash", "cached")
+
+
+def run_power_flow(grid_id: int, tmp_path: str, min_loading: Optional[float] = None) -> dict:
+    """Return the power flow of the grid's current state as JSON-ready records.
+
+    min_loading keeps only branches whose absolute loading (%) reaches it.
+    """
+    frames = power_flow_frames(grid_id, tmp_path, min_loading=min_loading)
+    # Note: branch_results includes both lines and transformers
+    return {
+        **{field: frames[field] for field in SUMMARY_FIELDS},
+        "bus_results": df_records(frames["bus_df"]),
+        "branch_results": df_records(frames["branch_df"]),
+    }
+
+
+def power_flow_frames(grid_id: int, tmp_path: str, min_loading: Optional[float] = None) -> dict:
+    """Return the power flow of the grid's current state as bus_df / branch_df DataFrames.
+
+    The grid is only solved if its active-status vector has not been seen.
+    """
+    # Only the (idtag, active) pairs of this grid are fetched, in one query
+    status_index = build_status_index(list_element_status(grid_id))
+    fingerprint = state_hash(status_index)
+
+    key = (grid_id, fingerprint)
+    frames = power_flow_cache.get(key)
+    if frames is not None:
+        frames = {**frames, "cached": True}
+    else:
+        stored = results_repo.get_results(grid_id, fingerprint)
+        if stored is not None:
+            frames = _stored_frames(stored, fingerprint)
+        else:
+            # Looked up before the grid lock so no extra connection is held during the solve
+            guess = _last_voltages(grid_id) if WARM_START else None
+            frames = _solve(grid_id, tmp_path, status_index, fingerprint, guess)
+        power_flow_cache.put(key, frames)
+    return _filtered(frames, min_loading)
+
+
+def _solve(grid_id: int, tmp_path: str, status_index: dict, fingerprint: str, guess: Optional[dict] = None) -> dict:
+    # Use the cached circuit (parsed once per process) instead of re-opening the file;
+    # the shared grid lock lets solves run together but not alongside a writer
+    with grid_lock(grid_id), circuit_cache.checkout(grid_id, tmp_path, write_through=WRITE_STATUS_TO_FILE) as cached:
+        main_circuit = cached.circuit
+        changed = apply_status(main_circuit, status_index)
+
+        # Statuses are an in-memory overlay unless they are kept in the file too;
+        # then only a circuit that actually changed is written back
+        if changed:
+            if WRITE_STATUS_TO_FILE:
+                cached.mark_dirty()
+            logger.info(f"Synced active status from database to circuit for grid {grid_id}: {summarize(changed)}")
+
+        # Run power flow calculation
+        results, warm_start = _run(grid_id, main_circuit, guess)
+        grid_name = str(main_circuit.name)
+        bus_idtags = [bus.idtag for bus in main_circuit.buses]
+
+    bus_df = results.get_bus_df()
+    branch_df = results.get_branch_df()
+    converged = bool(results.converged)
+    error = float(results.error)
+    iterations = int(results.iterations)
+
+    if converged and WARM_START:
+        _remember_voltages(grid_id, fingerprint, bus_idtags, results.voltage)
+    try:
+        results_repo.save_results(
+            grid_id, fingerprint, grid_name, converged, error, bus_df, branch_df,
+            keep=RESULTS_KEEP, iterations=iterations, warm_start=warm_start,
+        )
+    except Exception as e:
+        # The solve is still valid; it will simply be recomputed next time
+        logger.warning(f"Could not store power flow results for grid {grid_id}: {e}")
+
+    return {
+        "grid_name": grid_name,
+        "converged": converged,
+        "error": error,
+        "iterations": iterations,
+        "warm_start": warm_start,
+        "state_hash": fingerprint,
+        "cached": False,
+        "bus_df": bus_df,
+        "branch_df": branch_df,
+    }
+
+
+def _run(grid_id: int, circuit, guess: Optional[dict]) -> Tuple[object, bool]:
+    """Solve the circuit from guess (its last converged voltages) if given; returns (results, warm_start)."""
+    if guess is not None:
+        previous = _seed_voltages(circuit, guess)
+        if previous:
+            try:
+                results = gce.power_flow(circuit, options=gce.PowerFlowOptions(use_stored_guess=True))
+            finally:
+                # Vm0 / Va0 belong to the grid file; the seed only lives for this solve
+                for bus, vm0, va0 in previous:
+                    bus.Vm0 = vm0
+                    bus.Va0 = va0
+            if results.converged:
+                return results, True
+            logger.info(f"Warm start of grid {grid_id} did not converge; solving from a flat start")
+    return gce.power_flow(circuit), False
+
+
+def _last_voltages(grid_id: int) -> Optional[dict]:
+    guess = warm_start_cache.get(grid_id)
+    if guess is None and WARM_START_DB:
+        try:
+            guess = results_repo.get_voltages(grid_id)
+        except Exception as e:
+            logger.warning(f"Could not read warm-start voltages of grid {grid_id}: {e}")
+        if guess is not None:
+            warm_start_cache.put(grid_id, guess)
+    return guess
+
+
+def _seed_voltages(circuit, guess: dict) -> list:
+    """Set Vm0 / Va0 of the buses found in guess; returns (bus, Vm0, Va0) of what was there before."""
+    position = {idtag: i for i, idtag in enumerate(guess["bus_idtags"])}
+    previous = []
+    seeded = {}
+    for bus in circuit.buses:
+        i = position.get(bus.idtag)
+        if i is None:
+            continue
+        previous.append((bus, bus.Vm0, bus.Va0))
+        bus.Vm0 = float(guess["vm"][i])
+        bus.Va0 = float(guess["va"][i])
+        seeded[bus.idtag] = bus
+    # A stored guess skips the set-point initialization, so controlled buses start at their set point
+    for gen in circuit.generators:
+        if gen.active and gen.is_controlled and gen.control_bus is None and gen.bus is not None:
+            bus = seeded.get(gen.bus.idtag)
+            if bus is not None:
+                bus.Vm0 = float(gen.Vset)
+    return previous
+
+
+def _remember_voltages(grid_id: int, fingerprint: str, bus_idtags: list, voltage) -> None:
+    guess = {
+        "state_hash": fingerprint,
+        "bus_idtags": bus_idtags,
+        "vm": np.abs(voltage),
+        "va": np.angle(voltage),
+    }
+    warm_start_cache.put(grid_id, guess)
+    if WARM_START_DB:
+        try:
+            results_repo.save_voltages(grid_id, fingerprint, bus_idtags, guess["vm"], guess["va"])
+        except Exception as e:
+            logger.warning(f"Could not store warm-start voltages of grid {grid_id}: {e}")
+
+
+def _filtered(frames: dict, min_loading: Optional[float]) -> dict:
+    if min_loading is None:
+        return frames
+    branch_df = frames["branch_df"]
+    if "loading" in branch_df.columns:
+        # NaN loadings compare False and are dropped
+        branch_df = branch_df[branch_df["loading"].abs() >= min_loading]
+    else:
+        branch_df = branch_df.iloc[0:0]
+    return {**frames, "branch_df": branch_df}
+
+
+def _frame(rows, columns) -> pd.DataFrame:
+    # Rename table columns back to the DataFrame column names returned by a fresh solve
+    return pd.DataFrame(
+        {src: [row[col] for row in rows] for col, src in columns},
+        index=pd.Index([row["name"] for row in rows]),
+        dtype=float,
+    )
+
+
+def _stored_frames(stored: dict, fingerprint: str) -> dict:
+    run = stored["run"]
+    return {
+        "grid_name": run["grid_name"],
+        "converged": bool(run["converged"]),
+        "error": run["error"],
+        "iterations": run["iterations"],
+        "warm_start": bool(run["warm_start"]),
+        "state_hash": fingerprint,
+        "cached": True,
+        "bus_df": _frame(stored["bus_rows"], results_repo.BUS_RESULT_COLUMNS),
+        "branch_df": _frame(stored["branch_rows"], results_repo.BRANCH_RESULT_COLUMNS),
+    }
@@ -0,0 +1,32 @@
+"""
+Reading element profiles kept in element_profiles (see repositories.profiles_repo).
+"""
+from typing import List, Optional
+from fastapi import HTTPException
+from repositories.element_status_repo import TABLE_BY_TYPE
+from repositories.profiles_repo import get_profile_rows, decode_profile, profile_dict
+
+
+def attach_profiles(element_type: str, row: dict) -> dict:
+    """Fill the *_prof fields of one element row from element_profiles, in their gathered-model form."""
+    if not isinstance(row, dict) or not row.get("idtag"):
+        return row
+    for profile in get_profile_rows(row["grid_id"], element_type, idtags=[row["idtag"]]):
+        if row.get(profile["property"]) is None:
+            row[profile["property"]] = profile_dict(profile)
+    return row
+
+
+def get_profiles(
+    grid_id: int,
+    element_type: str,
+    idtags: Optional[List[str]] = None,
+    properties: Optional[List[str]] = None,
+) -> dict:
+    """Profiles of one element type of a grid as {idtag: {property: array}}; arrays are serialized by orjson."""
+    if element_type not in TABLE_BY_TYPE:
+        raise HTTPException(status_code=400, detail=f"Unknown element type {element_type!r}")
+    profiles = {}
+    for row in get_profile_rows(grid_id, element_type, idtags, properties):
+        profiles.setdefault(row["idtag"], {})[row["property"]] = decode_profile(row)
+    return {"grid_id": grid_id, "element_type": element_type, "profiles": profiles}
@@ -0,0 +1,97 @@
+"""
+Bounded in-memory LRU/TTL caches of solved power flows and of the DC
+sensitivity models used for contingency screening.
+
+Keys are (grid_id, state_hash), the fingerprint of the grid's active-status
+vector, so a cached entry can never be served for a different topology.
+The warm-start cache is the exception: it is keyed by grid_id alone, since
+its voltages only seed the next solve of that grid, whatever its state.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+            stored_at, value = item
+            if self.ttl > 0 and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def discard_where(self, predicate) -> int:
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": (self._hits / lookups) if lookups else None,
+                "expired": self._expired,
+                "evictions": self._evictions,
+            }
+
+
+power_flow_cache = TTLCache(
+    max_entries=int(os.getenv("POWER_FLOW_CACHE_SIZE", "128")),
+    ttl=float(os.getenv("POWER_FLOW_CACHE_TTL", "600")),
+)
+
+# Factorized DC models used for contingency screening; each holds a sparse LU, so keep few
+sensitivity_cache = TTLCache(
+    max_entries=int(os.getenv("SENSITIVITY_CACHE_SIZE", "8")),
+    ttl=float(os.getenv("SENSITIVITY_CACHE_TTL", "1800")),
+)
+
+# Last converged bus voltages of each grid, used as the next solve's initial guess
+warm_start_cache = TTLCache(
+    max_entries=int(os.getenv("POWER_FLOW_WARM_START_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("POWER_FLOW_WARM_START_TTL", "86400")),
+)
+
+
+def evict_grid(grid_id: int) -> int:
+    evicted = warm_start_cache.discard_where(lambda key: key == grid_id)
+    evicted += sensitivity_cache.discard_where(lambda key: key[0] == grid_id)
+    return evicted + power_flow_cache.discard_where(lambda key: key[0] == grid_id)
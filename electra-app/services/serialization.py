@@ -0,0 +1,53 @@
+"""
+orjson-based JSON encoding shared by the API responses and the job store.
+
+orjson serializes numpy arrays and scalars, datetimes and UUIDs natively and
+writes NaN/Infinity as null, so solver output can be returned without
+per-value conversion and without a round trip through the stdlib encoder.
+"""
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    # pandas Timestamp / Timedelta, numpy datetime64 scalars, ...
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_default, option=OPTIONS)
+
+
+def dumps_str(obj: Any) -> str:
+    """dumps() as text, for psycopg2.extras.Json(..., dumps=dumps_str)."""
+    return dumps(obj).decode("utf-8")
+
+
+def df_records(df) -> list:
+    """Rows of a DataFrame as dicts, with its index (element names) as the "name" field."""
+    return df.rename_axis("name").reset_index().to_dict(orient="records")
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class of the app.
+
+    Routes that return large payloads build it directly so FastAPI skips
+    jsonable_encoder as well.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,103 @@
+"""
+Batched on/off switching of many elements of one grid.
+
+Every element type is updated with a single UPDATE ... FROM (VALUES ...)
+inside one transaction. In "file" status mode the cached circuit is then
+checked out once and written back at most once.
+"""
+import logging
+import os
+from typing import Dict, List
+from fastapi import HTTPException
+from db.db import transaction
+from repositories.element_status_repo import update_status_batch as repo_update_status_batch, cascade_bus_deactivation
+from repositories.grids_repo import get_tmp_file_path
+from services.circuit_cache import circuit_cache
+from services.grid_locks import grid_lock
+from services.status_sync import CIRCUIT_COLLECTIONS, WRITE_STATUS_TO_FILE, apply_status, summarize
+
+logger = logging.getLogger(__name__)
+
+
+def update_status_batch(grid_id: int, items: List[dict]) -> dict:
+    """Apply {element_type, id | idtag, active} items atomically.
+
+    Each item names its element by id or by idtag, not both, and no element
+    may be named twice (400). Deactivated buses cascade to their generators,
+    loads and shunts, as with PATCH /bus/{id}/status. Unknown elements roll
+    the whole batch back (404).
+    """
+    by_type: Dict[str, list] = {}
+    seen = set()
+    for item in items:
+        id_, idtag = item.get("id"), item.get("idtag") or None
+        if (id_ is None) == (idtag is None):
+            raise HTTPException(status_code=400, detail="Every item needs either an id or an idtag, not both")
+        key = (item["element_type"], "id" if id_ is not None else "idtag", id_ if id_ is not None else idtag)
+        if key in seen:
+            raise HTTPException(status_code=400, detail=f"{key[0]} {key[1]}={key[2]} appears more than once")
+        seen.add(key)
+        by_type.setdefault(item["element_type"], []).append((id_, idtag, item["active"]))
+
+    # {element_type: {idtag: active}} of every row touched, fed to apply_status
+    index: Dict[str, Dict[str, bool]] = {element_type: {} for element_type in CIRCUIT_COLLECTIONS}
+    updated: Dict[str, int] = {}
+    cascaded: Dict[str, int] = {}
+    with transaction():
+        tmp_path = get_tmp_file_path(grid_id)
+        if not tmp_path:
+            raise HTTPException(status_code=404, detail=f"Grid {grid_id} not found")
+
+        for element_type, rows in by_type.items():
+            result = repo_update_status_batch(grid_id, element_type, rows)
+            found_ids = {row["id"] for row in result}
+            found_idtags = {row["idtag"] for row in result}
+            if len(found_ids) < len(result):
+                # The same row was named once by id and once by idtag; the transaction is rolled back
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Some {element_type} elements are named both by id and by idtag",
+                )
+            missing = [
+                str(id_) if id_ is not None else idtag
+                for id_, idtag, _ in rows
+                if (id_ not in found_ids if id_ is not None else idtag not in found_idtags)
+            ]
+            if missing:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"{element_type} not found in grid {grid_id}: {', '.join(missing[:20])}",
+                )
+            for row in result:
+                index[element_type][row["idtag"]] = bool(row["active"])
+            updated[element_type] = len(result)
+
+        # Applied after the direct updates so a switched-off bus always wins
+        off_buses = [idtag for idtag, active in index["bus"].items() if not active]
+        if off_buses:
+            for element_type, idtags in cascade_bus_deactivation(grid_id, off_buses).items():
+                for idtag in idtags:
+                    index[element_type][idtag] = False
+                cascaded[element_type] = len(idtags)
+
+    changed = {}
+    try:
+        # In overlay mode the file stays untouched; statuses are applied at solve time
+        if WRITE_STATUS_TO_FILE and os.path.exists(tmp_path):
+            with grid_lock(grid_id, exclusive=True), circuit_cache.checkout(grid_id, tmp_path, write_through=True) as cached:
+                changed = apply_status(cached.circuit, index)
+                # One in-place modification, written to the file before the lock is released
+                if changed:
+                    cached.mark_dirty()
+            logger.info(f"Applied status batch to grid {grid_id}: {summarize(changed)}")
+    except Exception as e:
+        logger.error(f"Error updating VeraGrid circuit: {e}")
+        # The database is the source of truth; power flows resync from it
+
+    return {
+        "message": "Status batch applied",
+        "grid_id": grid_id,
+        "updated": updated,
+        "cascaded": cascaded,
+        "circuit_changed": summarize(changed),
+    }
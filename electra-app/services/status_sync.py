@@ -0,0 +1,73 @@
+"""
+Synchronization of element active status from the database into a circuit.
+
+Statuses are indexed once by idtag so applying them is linear in the number
+of circuit elements; the returned diff lets callers skip rewriting the grid
+file when nothing changed.
+
+GRID_STATUS_MODE selects where statuses live besides the database:
+"overlay" (default) treats the grid file as an immutable base model and
+applies statuses to the in-memory circuit only at solve time; "file" also
+writes every status change back into the grid file.
+"""
+import hashlib
+import os
+from typing import Dict, Iterable, List
+
+# element_type (as used by the repositories) -> MultiCircuit device list attribute
+CIRCUIT_COLLECTIONS = {
+    "bus": "buses",
+    "generator": "generators",
+    "load": "loads",
+    "shunt": "shunts",
+    "line": "lines",
+    "transformer2w": "transformers2w",
+}
+
+STATUS_MODE = os.getenv("GRID_STATUS_MODE", "overlay").strip().lower()
+if STATUS_MODE not in ("overlay", "file"):
+    raise RuntimeError(f"GRID_STATUS_MODE must be 'overlay' or 'file', not {STATUS_MODE!r}")
+# Whether status changes are written into the grid file at all
+WRITE_STATUS_TO_FILE = STATUS_MODE == "file"
+
+
+def build_status_index(rows: Iterable[dict]) -> Dict[str, Dict[str, bool]]:
+    """Build {element_type: {idtag: active}} from (element_type, idtag, active) rows."""
+    index: Dict[str, Dict[str, bool]] = {element_type: {} for element_type in CIRCUIT_COLLECTIONS}
+    for row in rows:
+        active = row.get("active")
+        if active is None:
+            continue
+        index.setdefault(row["element_type"], {})[row["idtag"]] = bool(active)
+    return index
+
+
+def apply_status(circuit, index: Dict[str, Dict[str, bool]]) -> Dict[str, List[str]]:
+    """Set device.active from the index and return the idtags that changed, per element_type."""
+    changed: Dict[str, List[str]] = {}
+    for element_type, attr in CIRCUIT_COLLECTIONS.items():
+        statuses = index.get(element_type)
+        if not statuses:
+            continue
+        flipped = []
+        for device in getattr(circuit, attr):
+            active = statuses.get(device.idtag)
+            if active is not None and bool(device.active) != active:
+                device.active = active
+                flipped.append(device.idtag)
+        if flipped:
+            changed[element_type] = flipped
+    return changed
+
+
+def summarize(changed: Dict[str, List[str]]) -> Dict[str, int]:
+    return {element_type: len(idtags) for element_type, idtags in changed.items()}
+
+
+def state_hash(index: Dict[str, Dict[str, bool]]) -> str:
+    """Stable fingerprint of a grid's active-status vector."""
+    digest = hashlib.sha256()
+    for element_type in sorted(index):
+        for idtag, active in sorted(index[element_type].items()):
+            digest.update(f"{element_type}\x1f{idtag}\x1f{int(active)}\x1e".encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,122 @@
+"""
+Managed on-disk storage of uploaded grid files.
+
+Uploads are streamed to GRID_STORAGE_DIR in fixed-size chunks while their
+SHA-256 is computed, so a file is never held in memory as a whole and
+oversized uploads are aborted as soon as they cross the limit.
+
+Starlette spools the whole multipart body before the endpoint runs, so
+UploadSizeLimit also counts request bytes as they arrive and cuts off
+oversized uploads, chunked ones included, before they are spooled.
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from typing import Optional
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+STORAGE_DIR = os.getenv("GRID_STORAGE_DIR", os.path.join(tempfile.gettempdir(), "electra-grids"))
+MAX_UPLOAD_BYTES = int(float(os.getenv("GRID_UPLOAD_MAX_MB", "1024")) * 1024 * 1024)
+CHUNK_SIZE = 1024 * 1024
+
+# Room for the multipart envelope around the file when checking Content-Length
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+def request_too_large(content_length: Optional[str]) -> bool:
+    """True when a request's declared Content-Length can only hold an oversized file."""
+    if not content_length or not content_length.isdigit():
+        return False
+    return int(content_length) > MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Uploaded file exceeds {MAX_UPLOAD_BYTES} bytes")
+
+
+class UploadSizeLimit:
+    """ASGI middleware capping the request body of upload endpoints.
+
+    A declared Content-Length over the limit is refused before anything is
+    read; otherwise body bytes are counted as they are received and the
+    request fails with 413 as soon as they cross it.
+    """
+
+    def __init__(self, app, path_suffix: str = "/files/upload"):
+        self.app = app
+        self.path_suffix = path_suffix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if request_too_large(headers.get(b"content-length", b"").decode("latin-1")):
+            error = _too_large()
+            await JSONResponse(status_code=error.status_code, content={"detail": error.detail})(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD:
+                    # Raised inside the form parser and answered by the app's HTTPException handler
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def store_upload(file: UploadFile) -> dict:
+    """Stream an upload into the storage directory.
+
+    Returns {"path", "size", "sha256"}; raises 400 for empty and 413 for
+    oversized files, leaving nothing behind on disk.
+    """
+    if file.size is not None:
+        if file.size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        if file.size > MAX_UPLOAD_BYTES:
+            raise _too_large()
+
+    os.makedirs(STORAGE_DIR, exist_ok=True)
+    suffix = os.path.splitext(file.filename or "")[1]
+    fd, partial_path = tempfile.mkstemp(dir=STORAGE_DIR, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        # VeraGrid picks the parser from the extension, so it is preserved
+        path = os.path.join(STORAGE_DIR, f"{uuid.uuid4().hex}{suffix}")
+        os.replace(partial_path, path)
+    except BaseException:
+        remove_file(partial_path)
+        raise
+    return {"path": path, "size": size, "sha256": digest.hexdigest()}
+
+
+def remove_file(path: Optional[str]) -> bool:
+    if not path:
+        return False
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,166 @@
+"""
+Time-series power flow of a stored grid over its *_prof profiles.
+
+The requested time steps are split into contiguous chunks that are solved
+in parallel on the "time_series" process pool, each worker running
+VeraGrid's PowerFlowTimeSeriesDriver on the circuit it keeps cached. The
+parent holds the grid's shared lock until every chunk is back, so the file
+cannot change under a run.
+
+Element status comes from the database as for snapshot solves: an element
+switched off there is off at every step; otherwise the file's active_prof
+decides.
+"""
+import logging
+import os
+import time
+from concurrent.futures import FIRST_EXCEPTION, wait
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import VeraGridEngine as gce
+from fastapi import HTTPException
+from repositories.element_status_repo import list_element_status
+from services.circuit_cache import circuit_cache
+from services.grid_locks import grid_lock
+from services.status_sync import CIRCUIT_COLLECTIONS, build_status_index, apply_status, state_hash
+from services.workers import get_pool, PoolSaturatedError
+
+logger = logging.getLogger(__name__)
+
+# Fewer steps than this are not worth a chunk of their own
+MIN_CHUNK_STEPS = int(os.getenv("TIME_SERIES_MIN_CHUNK", "24"))
+# Largest number of steps solved by one request
+MAX_STEPS = int(os.getenv("TIME_SERIES_MAX_STEPS", "8760"))
+
+
+def run_time_series(grid_id: int, tmp_path: str, start: int = 0, end: Optional[int] = None,
+                    chunks: Optional[int] = None) -> dict:
+    """Solve time steps [start, end) and return Vm (p.u.) and loading (%) per step.
+
+    vm is a (steps × buses) and loading a (steps × branches) float32 matrix;
+    chunks lists the index range, solve time and worker pid of every chunk.
+    """
+    status_index = build_status_index(list_element_status(grid_id))
+    pool = get_pool("time_series")
+    started = time.perf_counter()
+
+    with grid_lock(grid_id):
+        with circuit_cache.checkout(grid_id, tmp_path) as cached:
+            circuit = cached.circuit
+            n_time = circuit.get_time_number()
+            time_array = circuit.get_time_array()
+            grid_name = str(circuit.name)
+
+        if n_time == 0:
+            raise HTTPException(status_code=400, detail=f"Grid {grid_id} has no time profiles")
+        end = n_time if end is None else min(end, n_time)
+        if start < 0 or start >= end:
+            raise HTTPException(status_code=400, detail=f"Empty time range [{start}, {end}) for {n_time} steps")
+        if end - start > MAX_STEPS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{end - start} time steps requested; at most {MAX_STEPS} per request",
+            )
+
+        bounds = _chunk_bounds(start, end, chunks or pool.max_workers)
+        futures = []
+        try:
+            for lo, hi in bounds:
+                futures.append(pool.submit(_solve_chunk, grid_id, tmp_path, status_index, lo, hi))
+        except PoolSaturatedError as e:
+            for future in futures:
+                future.cancel()
+            raise HTTPException(status_code=429, detail=str(e))
+
+        _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+        parts = [future.result() for future in futures]
+
+    vm = np.concatenate([part["vm"] for part in parts])
+    loading = np.concatenate([part["loading"] for part in parts])
+    converged = np.concatenate([part["converged"] for part in parts])
+    times = pd.DatetimeIndex(time_array[start:end])
+    return {
+        "grid_name": grid_name,
+        "state_hash": state_hash(status_index),
+        "start": start,
+        "end": end,
+        "time": (times.asi8 // 10 ** 9).tolist() if times.size else [],
+        "bus_names": parts[0]["bus_names"],
+        "branch_names": parts[0]["branch_names"],
+        "converged": converged,
+        "error": np.concatenate([part["error"] for part in parts]),
+        "vm": vm,
+        "loading": loading,
+        "chunks": [{key: part[key] for key in ("start", "end", "seconds", "pid")} for part in parts],
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def time_series_frame(results: dict, table: str) -> pd.DataFrame:
+    """One row per bus ("vm") or branch ("loading") and one column per time step (unix seconds)."""
+    names = results["bus_names"] if table == "vm" else results["branch_names"]
+    return pd.DataFrame(
+        results[table].T,
+        index=pd.Index(names),
+        columns=[str(t) for t in results["time"]],
+    )
+
+
+def _chunk_bounds(start: int, end: int, chunks: int) -> List[tuple]:
+    steps = end - start
+    chunks = max(1, min(chunks, -(-steps // MIN_CHUNK_STEPS)))
+    edges = np.linspace(start, end, chunks + 1).round().astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+
+def _solve_chunk(grid_id: int, tmp_path: str, status_index: Dict[str, Dict[str, bool]], start: int, end: int) -> dict:
+    # Runs inside a "time_series" worker process; its circuit cache parses the file once
+    started = time.perf_counter()
+    with circuit_cache.checkout(grid_id, tmp_path) as cached:
+        circuit = cached.circuit
+        apply_status(circuit, status_index)
+        overridden = _switch_off_profiles(circuit, status_index)
+        try:
+            driver = gce.PowerFlowTimeSeriesDriver(
+                grid=circuit,
+                options=gce.PowerFlowOptions(),
+                time_indices=np.arange(start, end),
+            )
+            driver.run()
+        finally:
+            # The cached circuit keeps the profiles of its file
+            for device, profile in overridden:
+                device.active_prof = profile
+        results = driver.results
+
+    return {
+        "start": start,
+        "end": end,
+        "seconds": round(time.perf_counter() - started, 4),
+        "pid": os.getpid(),
+        "bus_names": [str(name) for name in results.bus_names],
+        "branch_names": [str(name) for name in results.branch_names],
+        "vm": np.abs(results.voltage).astype(np.float32),
+        "loading": (results.loading.real * 100.0).astype(np.float32),
+        "converged": np.asarray(results.converged_values, dtype=bool),
+        "error": np.asarray(results.error_values, dtype=np.float32),
+    }
+
+
+def _switch_off_profiles(circuit, status_index: Dict[str, Dict[str, bool]]) -> list:
+    """Turn off the whole active_prof of devices inactive in the database; returns (device, original) pairs."""
+    overridden = []
+    for element_type, attr in CIRCUIT_COLLECTIONS.items():
+        off = {idtag for idtag, active in status_index.get(element_type, {}).items() if not active}
+        if not off:
+            continue
+        for device in getattr(circuit, attr):
+            if device.idtag in off:
+                profile = device.active_prof.copy()
+                profile.fill(False)
+                overridden.append((device, device.active_prof))
+                device.active_prof = profile
+    return overridden
@@ -0,0 +1,118 @@
+"""
+Bounded process pools for CPU-bound work (power flow solves, grid ingest, ...).
+
+Each named pool is created lazily with the spawn start method, so children
+never inherit the parent's database sockets or threads. Submissions beyond
+<NAME>_MAX_PENDING queued or running tasks are rejected with
+PoolSaturatedError instead of piling up.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool already holds its maximum number of pending tasks."""
+
+
+class BoundedProcessPool:
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._submitted = 0
+        self._rejected = 0
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PoolSaturatedError(
+                    f"Worker pool '{self.name}' is saturated ({self._pending}/{self.max_pending} tasks pending)"
+                )
+            self._pending += 1
+            self._submitted += 1
+            executor = self._get_executor_locked()
+        try:
+            try:
+                future = executor.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                logger.warning(f"Worker pool '{self.name}' was broken; restarting it")
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                    executor = self._get_executor_locked()
+                future = executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._task_done(None)
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+            }
+
+    def _get_executor_locked(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _task_done(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+_pools: Dict[str, BoundedProcessPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> BoundedProcessPool:
+    """Return the named pool, sized from <NAME>_WORKERS and <NAME>_MAX_PENDING."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            prefix = name.upper()
+            max_workers = int(os.getenv(f"{prefix}_WORKERS", str(os.cpu_count() or 1)))
+            max_pending = int(os.getenv(f"{prefix}_MAX_PENDING", str(4 * max_workers)))
+            pool = BoundedProcessPool(name, max_workers, max_pending)
+            _pools[name] = pool
+        return pool
+
+
+def pools_stats() -> list:
+    with _pools_lock:
+        return [pool.stats() for pool in _pools.values()]
+
+
+def shutdown_pools(wait: bool = True) -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,95 @@
+import pytest
+
+pytest.importorskip("VeraGridEngine")
+
+from services import circuit_cache as cache_module
+from services.circuit_cache import CircuitCache
+
+
+class Circuit:
+    pass
+
+
+@pytest.fixture
+def grid_file(tmp_path):
+    path = tmp_path / "grid.veragrid"
+    path.write_bytes(b"x" * 100)
+    return str(path)
+
+
+@pytest.fixture
+def io(monkeypatch):
+    calls = {"open": 0, "save": 0}
+
+    def open_file(path):
+        calls["open"] += 1
+        return Circuit()
+
+    def save(circuit, path):
+        calls["save"] += 1
+
+    monkeypatch.setattr(cache_module.gce, "open_file", open_file)
+    monkeypatch.setattr(cache_module, "_save_atomically", save)
+    return calls
+
+
+def make_cache(flush_delay=60.0):
+    return CircuitCache(max_bytes=10 ** 6, size_factor=1.0, flush_delay=flush_delay)
+
+
+def test_second_checkout_reuses_the_parsed_circuit(grid_file, io):
+    cache = make_cache()
+    with cache.checkout(1, grid_file) as first:
+        circuit = first.circuit
+    with cache.checkout(1, grid_file) as second:
+        assert second.circuit is circuit
+    assert io["open"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_write_through_saves_before_returning(grid_file, io):
+    cache = make_cache()
+    with cache.checkout(1, grid_file, write_through=True) as cached:
+        cached.mark_dirty()
+    assert io["save"] == 1
+    assert cache.stats()["dirty"] == 0
+
+
+def test_modification_waits_for_the_flusher_without_write_through(grid_file, io):
+    cache = make_cache()
+    with cache.checkout(1, grid_file) as cached:
+        cached.mark_dirty()
+    assert io["save"] == 0
+    assert cache.stats()["dirty"] == 1
+    cache.flush_all()
+    assert io["save"] == 1
+
+
+def test_error_inside_checkout_drops_the_circuit(grid_file, io):
+    cache = make_cache()
+    with pytest.raises(RuntimeError):
+        with cache.checkout(1, grid_file) as cached:
+            cached.mark_dirty()
+            raise RuntimeError("half-applied change")
+    assert cache.stats()["entries"] == 0
+    assert io["save"] == 0
+    with cache.checkout(1, grid_file):
+        pass
+    assert io["open"] == 2
+
+
+def test_dirty_circuit_is_written_when_evicted(grid_file, io):
+    cache = make_cache()
+    with cache.checkout(1, grid_file) as cached:
+        cached.mark_dirty()
+    cache.evict(1)
+    assert io["save"] == 1
+
+
+def test_evict_without_flush_discards_changes(grid_file, io):
+    cache = make_cache()
+    with cache.checkout(1, grid_file) as cached:
+        cached.mark_dirty()
+    cache.evict(1, flush=False)
+    assert io["save"] == 0
+    assert cache.stats()["entries"] == 0
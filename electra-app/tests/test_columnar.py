@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+from services.columnar import ARROW_STREAM, PARQUET, negotiate
+
+
+def test_query_parameter_wins_over_accept():
+    assert negotiate("parquet", ARROW_STREAM) == "parquet"
+
+
+def test_accept_header_selects_the_format():
+    assert negotiate(None, f"{ARROW_STREAM}, application/json") == "arrow"
+    assert negotiate(None, PARQUET) == "parquet"
+    assert negotiate(None, "application/json") == "json"
+    assert negotiate(None, None) == "json"
+
+
+def test_arrow_stream_keeps_rows_names_and_metadata():
+    pa = pytest.importorskip("pyarrow")
+    from services.columnar import encode_frame
+
+    df = pd.DataFrame({"Vm": [1.0, 0.97]}, index=["B1", "B2"])
+    content = encode_frame(df, "arrow", {"state_hash": "abc", "converged": True})
+    table = pa.ipc.open_stream(content).read_all()
+    assert table.column("name").to_pylist() == ["B1", "B2"]
+    assert table.column("Vm").to_pylist() == [1.0, 0.97]
+    assert table.schema.metadata[b"electra.state_hash"] == b"abc"
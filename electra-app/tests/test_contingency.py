@@ -0,0 +1,165 @@
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+pytest.importorskip("VeraGridEngine")
+from fastapi import HTTPException
+from services import contingency
+from services.workers import PoolSaturatedError
+
+ACTIVE = contingency.gce.ContingencyOperationTypes.Active
+PERCENT = contingency.gce.ContingencyOperationTypes.PowerPercentage
+
+
+def make_circuit(contingencies=()):
+    lines = [SimpleNamespace(idtag="L1", name="Line 1", active=True), SimpleNamespace(idtag="L2", name="Line 2", active=False)]
+    trafos = [SimpleNamespace(idtag="T1", name="Trafo 1", active=True)]
+    buses = [SimpleNamespace(Vmin=0.95, Vmax=1.05), SimpleNamespace(Vmin=0.95, Vmax=1.05)]
+    return SimpleNamespace(name="grid", lines=lines, transformers2w=trafos, buses=buses, contingencies=list(contingencies))
+
+
+def fake_power_flow(circuit):
+    """Losing L1 overloads T1 and pulls B2 down; losing T1 does not converge."""
+    l1, t1 = circuit.lines[0].active, circuit.transformers2w[0].active
+    loading = np.array([0.6 if l1 else 0.0, 0.0, 0.7 if l1 else 1.3])
+    return SimpleNamespace(
+        converged=t1,
+        loading=loading + 0j,
+        voltage=np.array([1.0, 1.0 if l1 else 0.93]) + 0j,
+        branch_names=["Line 1", "Line 2", "Trafo 1"],
+        bus_names=["B1", "B2"],
+    )
+
+
+def group(idtag, device, prop=ACTIVE, value=0.0):
+    return SimpleNamespace(group=SimpleNamespace(idtag=idtag, name=f"Group {idtag}"), device=device, prop=prop, value=value)
+
+
+def test_cases_are_the_file_groups_when_there_are_some():
+    circuit = make_circuit()
+    circuit.contingencies = [group("G2", circuit.lines[0]), group("G1", circuit.lines[0]), group("G2", circuit.transformers2w[0])]
+    assert contingency._cases(circuit, "auto") == [("group", "G1"), ("group", "G2")]
+    assert contingency._cases(circuit, "model") == [("group", "G1"), ("group", "G2")]
+
+
+def test_cases_fall_back_to_active_branch_outages():
+    circuit = make_circuit()
+    assert contingency._cases(circuit, "auto") == [("branch", "L1"), ("branch", "T1")]
+    assert contingency._cases(circuit, "model") == []
+    circuit.contingencies = [group("G1", circuit.lines[0])]
+    assert contingency._cases(circuit, "n-1") == [("branch", "L1"), ("branch", "T1")]
+
+
+def test_outage_changes_of_a_group():
+    load = SimpleNamespace(P=20.0)
+    line = SimpleNamespace(active=True)
+    changes = contingency._outage_changes([
+        group("G", line, ACTIVE, 0.0),
+        group("G", load, PERCENT, 50.0),
+        group("G", None, ACTIVE, 0.0),
+        group("G", SimpleNamespace(), PERCENT, 50.0),
+    ])
+    assert changes == [(line, "active", False), (load, "P", 10.0)]
+
+
+def test_case_is_solved_with_the_outage_and_reverted(monkeypatch):
+    monkeypatch.setattr(contingency.gce, "power_flow", fake_power_flow)
+    circuit = make_circuit()
+    vmin = np.array([0.95, 0.95])
+    vmax = np.array([1.05, 1.05])
+    outcome = contingency._solve_case(circuit, "branch", "L1", "Line 1", [(circuit.lines[0], "active", False)], vmin, vmax, 100.0)
+    assert circuit.lines[0].active
+    assert outcome["converged"]
+    assert (outcome["overloads"], outcome["voltage_violations"]) == (1, 1)
+    assert outcome["max_loading"] == pytest.approx(130.0)
+    overload, low = outcome["violations"]
+    assert (overload["element"], overload["severity"]) == ("Trafo 1", pytest.approx(30.0))
+    assert (low["kind"], low["element"], low["severity"]) == ("undervoltage", "B2", pytest.approx(2.0))
+    assert outcome["worst_severity"] == pytest.approx(30.0)
+
+
+def test_outage_is_reverted_when_the_solver_fails(monkeypatch):
+    def broken(circuit):
+        raise RuntimeError("solver crashed")
+
+    monkeypatch.setattr(contingency.gce, "power_flow", broken)
+    circuit = make_circuit()
+    with pytest.raises(RuntimeError):
+        contingency._solve_case(circuit, "branch", "T1", "Trafo 1", [(circuit.transformers2w[0], "active", False)], None, None, 100.0)
+    assert circuit.transformers2w[0].active
+
+
+class InlinePool:
+    """Runs each task on submit; refuses tasks after `capacity` of them."""
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.futures = []
+
+    def submit(self, fn, *args):
+        if self.capacity is not None and len(self.futures) >= self.capacity:
+            raise PoolSaturatedError("contingency pool is full")
+        future = Future()
+        future.set_result(fn(*args))
+        self.futures.append(future)
+        return future
+
+
+@pytest.fixture
+def analysis(monkeypatch):
+    circuit = make_circuit()
+
+    @contextmanager
+    def checkout(grid_id, tmp_path):
+        yield SimpleNamespace(circuit=circuit)
+
+    pool = InlinePool()
+    monkeypatch.setattr(contingency, "list_element_status", lambda grid_id: [])
+    monkeypatch.setattr(contingency, "apply_status", lambda circuit, status_index: None)
+    monkeypatch.setattr(contingency, "grid_lock", lambda grid_id: nullcontext())
+    monkeypatch.setattr(contingency, "circuit_cache", SimpleNamespace(checkout=checkout))
+    monkeypatch.setattr(contingency, "get_pool", lambda name: pool)
+    monkeypatch.setattr(contingency.gce, "power_flow", fake_power_flow)
+    return pool
+
+
+def test_violations_are_ranked_and_limited(analysis):
+    result = contingency.run_contingency_analysis(1, "/grid.veragrid", top=1)
+    assert (result["mode"], result["contingencies"], result["ac_solved"]) == ("n-1", 2, 2)
+    assert (result["not_converged"], result["with_violations"], result["violations_total"]) == (1, 1, 2)
+    assert [row["kind"] for row in result["violations"]] == ["overload"]
+    assert result["violations"][0]["contingency"] == "L1"
+    # Cases that did not converge are listed first
+    assert [outcome["contingency"] for outcome in result["contingency_summary"]] == ["T1"]
+
+
+def test_batches_split_the_cases(analysis, monkeypatch):
+    monkeypatch.setattr(contingency, "BATCH_SIZE", 1)
+    result = contingency.run_contingency_analysis(1, "/grid.veragrid")
+    assert [batch["size"] for batch in result["batches"]] == [1, 1]
+    assert [row["severity"] for row in result["violations"]] == sorted((row["severity"] for row in result["violations"]), reverse=True)
+
+
+def test_saturated_pool_is_a_429(analysis, monkeypatch):
+    monkeypatch.setattr(contingency, "BATCH_SIZE", 1)
+    analysis.capacity = 1
+    with pytest.raises(HTTPException) as e:
+        contingency.run_contingency_analysis(1, "/grid.veragrid")
+    assert e.value.status_code == 429
+    assert len(analysis.futures) == 1
+
+
+def test_too_many_contingencies_is_a_400(analysis, monkeypatch):
+    monkeypatch.setattr(contingency, "MAX_CONTINGENCIES", 1)
+    with pytest.raises(HTTPException) as e:
+        contingency.run_contingency_analysis(1, "/grid.veragrid")
+    assert e.value.status_code == 400
+    assert analysis.futures == []
+
+
+def test_screening_needs_branch_outages(analysis):
+    with pytest.raises(HTTPException) as e:
+        contingency.run_contingency_analysis(1, "/grid.veragrid", mode="model", method="screen")
+    assert e.value.status_code == 400
@@ -0,0 +1,39 @@
+from repositories.copy_util import copy_merge
+
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+        self.copied = b""
+        self.rowcount = 2
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+
+    def copy_expert(self, query, stream, size):
+        self.statements.append(query)
+        self.copied = stream.read()
+
+
+def test_staged_rows_carry_their_payload_position():
+    cur = FakeCursor()
+    rows = [(1, "B1", "first"), (1, "B2", "other"), (1, "B1", "second")]
+    assert copy_merge(cur, "buses", ("grid_id", "idtag", "name"), iter(rows)) == 2
+    assert cur.copied.decode().splitlines() == ["1\tB1\tfirst\t0", "1\tB2\tother\t1", "1\tB1\tsecond\t2"]
+    assert "COPY _stage_buses (grid_id, idtag, name, _ordinal) FROM STDIN" in cur.statements
+
+
+def test_first_duplicate_of_a_key_is_kept():
+    cur = FakeCursor()
+    copy_merge(cur, "buses", ("grid_id", "idtag", "name"), [])
+    merge = next(q for q in cur.statements if q.startswith("INSERT INTO buses"))
+    assert merge.endswith("SELECT DISTINCT ON (grid_id, idtag) grid_id, idtag, name FROM _stage_buses ORDER BY grid_id, idtag, _ordinal;")
+
+
+def test_derived_columns_are_filled_from_staged_ones():
+    cur = FakeCursor()
+    copy_merge(cur, "lines", ("grid_id", "idtag", "active"), [], derived=(("base_active", "active"),))
+    merge = next(q for q in cur.statements if q.startswith("INSERT INTO lines"))
+    assert merge.startswith(
+        "INSERT INTO lines (grid_id, idtag, active, base_active) SELECT DISTINCT ON (grid_id, idtag) grid_id, idtag, active, active FROM"
+    )
@@ -0,0 +1,137 @@
+import asyncio
+import re
+import sqlite3
+import pytest
+
+pytest.importorskip("VeraGridEngine")
+from db import db
+from repositories import buses_repo, grid_ingest_repo, lines_repo
+from repositories.profiles_repo import PROFILE_COLUMNS
+from services import grid as grid_service
+
+SHA = "ab" * 32
+
+
+class SqliteCursor:
+    """Enough of a RealDictCursor for the clone queries, on sqlite."""
+
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        query = re.sub(r"%\((\w+)\)s", r":\1", query).replace("%s", "?")
+        self._cur.execute(query, params or ())
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+
+class SqliteConnection:
+    def __init__(self):
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.row_factory = lambda cur, row: {col[0]: value for col, value in zip(cur.description, row)}
+
+    def cursor(self):
+        return SqliteCursor(self._conn)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+
+class SqlitePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def getconn(self, timeout=None):
+        return self.conn
+
+    def putconn(self, conn, discard=False):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    conn = SqliteConnection()
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE grids (id INTEGER PRIMARY KEY, name, base_mva, tmp_file_path, file_hash);")
+        cur.execute("CREATE TABLE grid_payloads (grid_id, codec, raw_size, data);")
+        cur.execute(f"CREATE TABLE element_profiles ({', '.join(PROFILE_COLUMNS)});")
+        for table, repo, _ in grid_ingest_repo._ELEMENT_REPOS:
+            cur.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, {', '.join(repo.COLUMNS)}, base_active);")
+        cur.execute("INSERT INTO grids (id, name, base_mva, tmp_file_path, file_hash) VALUES (1, 'A', 100, '/a.veragrid', ?);", (SHA,))
+        cur.execute("INSERT INTO buses (grid_id, idtag, active, base_active) VALUES (1, 'B1', 1, 1), (1, 'B2', 1, 1);")
+        cur.execute("INSERT INTO lines (grid_id, idtag, active, base_active) VALUES (1, 'L1', 1, 1), (1, 'L2', 0, 0);")
+    monkeypatch.setattr(db, "get_pool", lambda: SqlitePool(conn))
+    return conn
+
+
+def rows(conn, table, grid_id):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT idtag, active, base_active FROM {table} WHERE grid_id = ? ORDER BY idtag;", (grid_id,))
+        return [(r["idtag"], bool(r["active"]), bool(r["base_active"])) for r in cur.fetchall()]
+
+
+def upload_again(monkeypatch, tmp_path):
+    path = tmp_path / "grid.veragrid"
+    path.write_bytes(b"same file")
+    stored = {"path": str(path), "size": 9, "sha256": SHA}
+
+    async def store_upload(file):
+        return stored
+
+    monkeypatch.setattr(grid_service, "store_upload", store_upload)
+    return asyncio.run(grid_service.upload_file(None))
+
+
+def test_reupload_ignores_status_changes_of_the_original(database, monkeypatch, tmp_path):
+    lines_repo.update_line_status(1, False)
+    buses_repo.update_bus_status(2, False)
+
+    response = upload_again(monkeypatch, tmp_path)
+
+    assert response["message"] == "Grid cloned"
+    assert response["duplicate_of"] == 1
+    new_id = response["grid_id"]
+    assert (response["buses_saved"], response["lines_saved"]) == (2, 2)
+    assert rows(database, "lines", new_id) == [("L1", True, True), ("L2", False, False)]
+    assert rows(database, "buses", new_id) == [("B1", True, True), ("B2", True, True)]
+    # The original grid keeps its own changes
+    assert rows(database, "lines", 1) == [("L1", False, True), ("L2", False, False)]
+
+
+def test_grid_without_base_statuses_is_not_cloned(database):
+    with database.cursor() as cur:
+        cur.execute("UPDATE lines SET base_active = NULL WHERE grid_id = 1;")
+    assert grid_ingest_repo.clone_grid(1, "/copy.veragrid") is None
+    with database.cursor() as cur:
+        cur.execute("SELECT COUNT(*) AS n FROM grids;")
+        assert cur.fetchone()["n"] == 1
+
+
+def test_reupload_can_reuse_the_original(database, monkeypatch, tmp_path):
+    path = tmp_path / "grid.veragrid"
+    path.write_bytes(b"same file")
+
+    async def store_upload(file):
+        return {"path": str(path), "size": 9, "sha256": SHA}
+
+    monkeypatch.setattr(grid_service, "store_upload", store_upload)
+    response = asyncio.run(grid_service.upload_file(None, on_duplicate="reuse"))
+    assert response["grid_id"] == response["duplicate_of"] == 1
+    assert not path.exists()
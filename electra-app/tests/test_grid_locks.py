@@ -0,0 +1,151 @@
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from db.pool import PoolExhaustedError
+from repositories.advisory_locks_repo import AdvisoryLockTimeout
+from services import grid_locks
+from services.grid_locks import RWLock, grid_lock
+
+
+class FakeLockPool:
+    def __init__(self, exhausted=False):
+        self.exhausted = exhausted
+        self.returned = []
+
+    def getconn(self, timeout):
+        if self.exhausted:
+            raise PoolExhaustedError("no connection")
+        return "conn"
+
+    def putconn(self, conn, discard=False):
+        self.returned.append((conn, discard))
+
+
+@pytest.fixture
+def advisory(monkeypatch):
+    pool = FakeLockPool()
+    calls = []
+    monkeypatch.setattr(grid_locks, "USE_ADVISORY", True)
+    monkeypatch.setattr(grid_locks, "get_lock_pool", lambda: pool)
+    monkeypatch.setattr(grid_locks, "lock_grid", lambda conn, grid_id, exclusive, timeout: calls.append(("lock", grid_id, exclusive)))
+    monkeypatch.setattr(grid_locks, "unlock_grid", lambda conn, grid_id, exclusive: calls.append(("unlock", grid_id, exclusive)))
+    return pool, calls
+
+
+def test_readers_share_the_lock():
+    lock = RWLock()
+    assert lock.acquire_read(0.01)
+    assert lock.acquire_read(0.01)
+    assert not lock.acquire_write(0.01)
+    lock.release_read()
+    lock.release_read()
+    assert lock.acquire_write(0.01)
+
+
+def test_writer_excludes_readers_and_writers():
+    lock = RWLock()
+    assert lock.acquire_write(0.01)
+    assert not lock.acquire_read(0.01)
+    assert not lock.acquire_write(0.01)
+    lock.release_write()
+    assert lock.acquire_read(0.01)
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = RWLock()
+    assert lock.acquire_read(0.01)
+    writer_done = threading.Event()
+    writer = threading.Thread(target=lambda: lock.acquire_write(5) and writer_done.set())
+    writer.start()
+    while not lock._writers_waiting:
+        time.sleep(0.001)
+    assert not lock.acquire_read(0.01)
+    lock.release_read()
+    writer.join()
+    assert writer_done.is_set()
+
+
+def test_timed_out_writer_lets_readers_in_again():
+    lock = RWLock()
+    assert lock.acquire_read(0.01)
+    assert not lock.acquire_write(0.01)
+    assert lock.acquire_read(0.01)
+
+
+def test_busy_grid_is_a_503(monkeypatch):
+    monkeypatch.setattr(grid_locks, "USE_ADVISORY", False)
+    with grid_lock(101, exclusive=True):
+        with pytest.raises(HTTPException) as e:
+            with grid_lock(101, timeout=0.01):
+                pass
+    assert e.value.status_code == 503
+    assert e.value.headers == {"Retry-After": "1"}
+    with grid_lock(101, exclusive=True, timeout=0.01):
+        pass
+
+
+def test_other_grids_do_not_wait(monkeypatch):
+    monkeypatch.setattr(grid_locks, "USE_ADVISORY", False)
+    with grid_lock(102, exclusive=True):
+        with grid_lock(103, exclusive=True, timeout=0.01):
+            pass
+
+
+def test_advisory_lock_is_held_on_a_lock_pool_connection(advisory):
+    pool, calls = advisory
+    with grid_lock(104, exclusive=True):
+        assert calls == [("lock", 104, True)]
+        assert pool.returned == []
+    assert calls == [("lock", 104, True), ("unlock", 104, True)]
+    assert pool.returned == [("conn", False)]
+
+
+def test_exhausted_lock_pool_is_a_503(advisory):
+    pool, calls = advisory
+    pool.exhausted = True
+    with pytest.raises(HTTPException) as e:
+        with grid_lock(105, exclusive=True, timeout=0.01):
+            pass
+    assert e.value.status_code == 503
+    assert calls == []
+    # The in-process lock was released again
+    assert grid_locks._lock_for(105).acquire_write(0.01)
+
+
+def test_advisory_timeout_is_a_503_and_keeps_the_connection(advisory, monkeypatch):
+    pool, _ = advisory
+
+    def timeout(conn, grid_id, exclusive, timeout):
+        raise AdvisoryLockTimeout(grid_id)
+
+    monkeypatch.setattr(grid_locks, "lock_grid", timeout)
+    with pytest.raises(HTTPException) as e:
+        with grid_lock(106, timeout=0.01):
+            pass
+    assert e.value.status_code == 503
+    assert pool.returned == [("conn", False)]
+
+
+def test_failed_unlock_discards_the_connection(advisory, monkeypatch):
+    pool, _ = advisory
+
+    def broken(conn, grid_id, exclusive):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(grid_locks, "unlock_grid", broken)
+    with grid_lock(107):
+        pass
+    assert pool.returned == [("conn", True)]
+
+
+def test_unused_grid_locks_are_dropped(monkeypatch):
+    import gc
+    monkeypatch.setattr(grid_locks, "USE_ADVISORY", False)
+    with grid_lock(108, exclusive=True):
+        assert 108 in grid_locks._locks
+        with pytest.raises(HTTPException):
+            with grid_lock(108, timeout=0.01):
+                pass
+    gc.collect()
+    assert 108 not in grid_locks._locks
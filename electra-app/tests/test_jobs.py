@@ -0,0 +1,94 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+import pytest
+from services import jobs
+from services.workers import BoundedProcessPool, PoolSaturatedError
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+class FakePool:
+    def __init__(self):
+        self.executor = FakeExecutor()
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs)
+
+
+@pytest.fixture
+def failed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(jobs.jobs_repo, "fail_unfinished", lambda job_id, error: calls.append((job_id, error)) or True)
+    return calls
+
+
+def submit(monkeypatch, tmp_path):
+    grid_file = tmp_path / "grid.veragrid"
+    grid_file.write_bytes(b"")
+    pool = FakePool()
+    monkeypatch.setattr(jobs, "get_tmp_file_path", lambda grid_id: str(grid_file))
+    monkeypatch.setattr(jobs.jobs_repo, "create_job", lambda *args, **kwargs: None)
+    monkeypatch.setattr(jobs, "get_pool", lambda name: pool)
+    job = jobs.submit_power_flow_job(7)
+    return job, pool.executor.futures[0]
+
+
+def test_worker_crash_fails_the_job(monkeypatch, tmp_path, failed):
+    job, future = submit(monkeypatch, tmp_path)
+    future.set_exception(BrokenProcessPool("worker died"))
+    assert failed == [(job["job_id"], "Worker failed: BrokenProcessPool: worker died")]
+
+
+def test_cancelled_job_is_failed(monkeypatch, tmp_path, failed):
+    job, future = submit(monkeypatch, tmp_path)
+    future.cancel()
+    assert len(failed) == 1
+    assert failed[0][1].startswith("Cancelled")
+
+
+def test_finished_job_is_left_to_its_worker(monkeypatch, tmp_path, failed):
+    _, future = submit(monkeypatch, tmp_path)
+    future.set_result(None)
+    assert failed == []
+
+
+def test_polling_a_lost_job_reports_it_failed(monkeypatch):
+    now = datetime.now(timezone.utc)
+    rows = iter([
+        {"id": "j", "kind": "power_flow", "grid_id": 1, "status": "running", "submitted_at": now,
+         "started_at": now, "finished_at": None, "error": None, "result": None},
+        {"id": "j", "kind": "power_flow", "grid_id": 1, "status": "failed", "submitted_at": now,
+         "started_at": now, "finished_at": now, "error": "Lost", "result": None},
+    ])
+    swept = []
+    monkeypatch.setattr(jobs.jobs_repo, "get_job", lambda job_id, include_result=True: next(rows))
+    monkeypatch.setattr(
+        jobs.jobs_repo, "fail_stale_jobs",
+        lambda max_age, error, job_id=None: swept.append((max_age, job_id)) or 1,
+    )
+    assert jobs.get_job("j")["status"] == "failed"
+    assert swept == [(jobs.JOB_TIMEOUT, "j")]
+
+
+def test_pool_rejects_submissions_beyond_max_pending(monkeypatch):
+    pool = BoundedProcessPool("test", max_workers=1, max_pending=2)
+    executor = FakeExecutor()
+    monkeypatch.setattr(pool, "_get_executor_locked", lambda: executor)
+    pool.submit(print)
+    pool.submit(print)
+    with pytest.raises(PoolSaturatedError):
+        pool.submit(print)
+    assert pool.stats()["rejected"] == 1
+
+    executor.futures[0].set_result(None)
+    pool.submit(print)
+    assert pool.stats()["pending"] == 2
@@ -0,0 +1,96 @@
+import json
+import pytest
+from fastapi import HTTPException
+from repositories import pagination
+from routes.pagination import stream_format
+from services import listing
+
+ROWS = [{"id": i, "idtag": f"B{i}"} for i in range(1, 6)]
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(listing, "STREAM_BATCH_ROWS", 2)
+
+
+def test_ndjson_is_one_row_per_line_in_batches():
+    chunks = list(listing.fetch_stream(lambda: iter(ROWS), "ndjson"))
+    assert len(chunks) == 3
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+
+@pytest.mark.parametrize("rows", [ROWS, ROWS[:4], ROWS[:1], []])
+def test_json_array_chunks_form_one_array(rows):
+    chunks = list(listing.fetch_stream(lambda: iter(rows), "json"))
+    assert json.loads(b"".join(chunks)) == rows
+
+
+def test_empty_ndjson_stream_has_no_chunks():
+    assert list(listing.fetch_stream(lambda: iter([]), "ndjson")) == []
+
+
+def test_bad_projection_is_a_400_before_streaming():
+    def stream(**params):
+        raise ValueError("Unknown field(s): nope")
+
+    with pytest.raises(HTTPException) as e:
+        listing.fetch_stream(stream, "json", fields=["nope"])
+    assert e.value.status_code == 400
+
+
+def test_stream_format_comes_from_the_query_or_accept():
+    assert stream_format("json", "application/x-ndjson") == "json"
+    assert stream_format(None, "application/x-ndjson, application/json") == "ndjson"
+    assert stream_format(None, "application/json") is None
+    assert stream_format(None, None) is None
+
+
+class NamedCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cur = NamedCursor(rows)
+        self.closed = False
+
+    def cursor(self, name=None):
+        assert name and name.startswith("stream_")
+        return self.cur
+
+    def close(self):
+        self.closed = True
+
+
+def test_rows_come_from_a_named_cursor_that_is_returned(monkeypatch):
+    conn = FakeConnection(ROWS)
+    monkeypatch.setattr(pagination, "get_conn", lambda: conn)
+    rows = pagination._iter_named("SELECT 1;", [], 100)
+    assert next(rows) == ROWS[0]
+    assert conn.cur.itersize == 100 and not conn.closed
+    assert list(rows) == ROWS[1:]
+    assert conn.closed
+
+
+def test_abandoned_stream_returns_its_connection(monkeypatch):
+    conn = FakeConnection(ROWS)
+    monkeypatch.setattr(pagination, "get_conn", lambda: conn)
+    rows = pagination._iter_named("SELECT 1;", [], 100)
+    next(rows)
+    rows.close()
+    assert conn.closed
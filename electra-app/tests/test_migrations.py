@@ -0,0 +1,89 @@
+from contextlib import contextmanager
+from repositories import migrations
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.executed.append((" ".join(query.split()), params))
+
+    def fetchall(self):
+        return [{"version": v} for v in self.conn.applied]
+
+
+class FakeConnection:
+    def __init__(self, applied):
+        self.applied = applied
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def use_connection(monkeypatch, conn):
+    @contextmanager
+    def transaction():
+        yield conn
+
+    monkeypatch.setattr(migrations, "transaction", transaction)
+
+
+def test_versions_are_unique_and_increasing():
+    versions = [version for version, _, _ in migrations.MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+
+
+def test_only_pending_migrations_run_in_order(monkeypatch):
+    ran = []
+    steps = [(v, f"step {v}", lambda conn, v=v: ran.append(v)) for v in (1, 2, 3, 4)]
+    monkeypatch.setattr(migrations, "MIGRATIONS", steps)
+    conn = FakeConnection(applied=[1, 3])
+    use_connection(monkeypatch, conn)
+
+    assert migrations.apply_migrations() == [2, 4]
+    assert ran == [2, 4]
+    recorded = [params for query, params in conn.executed if query.startswith("INSERT INTO schema_version")]
+    assert recorded == [(2, "step 2"), (4, "step 4")]
+
+
+def test_migrations_are_serialized_by_an_advisory_lock(monkeypatch):
+    monkeypatch.setattr(migrations, "MIGRATIONS", [])
+    conn = FakeConnection(applied=[])
+    use_connection(monkeypatch, conn)
+
+    assert migrations.apply_migrations() == []
+    query, params = conn.executed[0]
+    assert query.startswith("SELECT pg_advisory_xact_lock")
+    assert params == (migrations._MIGRATION_LOCK_KEY,)
+
+
+def test_baseline_runs_the_frozen_ddl_in_order():
+    conn = FakeConnection([])
+    migrations._baseline(conn)
+    statements = [query for query, _ in conn.executed]
+    assert statements[0].startswith("CREATE TABLE IF NOT EXISTS grids (")
+    assert "raw_json JSONB" in statements[0]
+    assert len(statements) == len(migrations.BASELINE_DDL)
+    created = [s.split()[5] for s in statements if s.startswith("CREATE TABLE")]
+    assert created == ["grids", "buses", "loads", "generators", "shunts", "transformers2w", "lines"]
+
+
+def test_current_version_is_reported(monkeypatch):
+    class VersionCursor(FakeCursor):
+        def fetchone(self):
+            return {"version": 7}
+
+    conn = FakeConnection([])
+    conn.cursor = lambda: VersionCursor(conn)
+    use_connection(monkeypatch, conn)
+    assert migrations.current_version() == 7
+    assert migrations.LATEST_VERSION == migrations.MIGRATIONS[-1][0]
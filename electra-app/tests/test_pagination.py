@@ -0,0 +1,76 @@
+import pytest
+from repositories import pagination
+from repositories.pagination import resolve_fields
+from routes.pagination import list_stream
+
+ALLOWED = ("id", "grid_id", "idtag", "name", "active")
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        self.params = params
+
+    def fetchall(self):
+        # [grid_id, after_id, limit + 1], after_id only past the first page
+        limit = self.params[-1]
+        after_id = self.params[1] if len(self.params) == 3 else 0
+        return [row for row in self.rows if row["id"] > after_id][:limit]
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cur = FakeCursor(rows)
+
+    def cursor(self):
+        return self.cur
+
+    def close(self):
+        pass
+
+
+def test_projection_always_starts_with_the_cursor_column():
+    assert resolve_fields(["name", " idtag ", "name"], ALLOWED) == ["id", "name", "idtag"]
+    assert resolve_fields(None, ALLOWED) == list(ALLOWED)
+
+
+def test_unknown_fields_are_named():
+    with pytest.raises(ValueError, match="secret"):
+        resolve_fields(["name", "secret"], ALLOWED)
+
+
+def test_pages_follow_the_keyset_cursor(monkeypatch):
+    rows = [{"id": i, "grid_id": 1} for i in range(1, 6)]
+    monkeypatch.setattr(pagination, "get_conn", lambda: FakeConnection(rows))
+
+    first = pagination.list_page("buses", ALLOWED, grid_id=1, limit=2)
+    assert [r["id"] for r in first["rows"]] == [1, 2]
+    assert first["next_after_id"] == 2
+
+    last = pagination.list_page("buses", ALLOWED, grid_id=1, after_id=4, limit=2)
+    assert [r["id"] for r in last["rows"]] == [5]
+    assert last["next_after_id"] is None
+
+
+def test_plain_listings_stream_every_row():
+    plain = {"limit": None, "after_id": None, "include_total": False}
+    assert list_stream(plain, None) == "json"
+    assert list_stream(plain, "ndjson") == "ndjson"
+
+
+def test_any_pagination_parameter_asks_for_a_page():
+    for page in (
+        {"limit": 10, "after_id": None, "include_total": False},
+        {"limit": None, "after_id": 5, "include_total": False},
+        {"limit": None, "after_id": None, "include_total": True},
+    ):
+        assert list_stream(page, None) is None
@@ -0,0 +1,75 @@
+from repositories import payloads_repo
+from repositories.payloads_repo import compress, decompress
+
+
+def test_compressed_payload_round_trips():
+    raw = b'{"model_data": {"bus": []}}' * 100
+    codec, packed = compress(raw)
+    assert codec in ("zstd", "zlib")
+    assert len(packed) < len(raw)
+    assert decompress(codec, packed) == raw
+
+
+def test_uncompressed_payload_is_returned_as_is():
+    assert decompress("none", b"raw") == b"raw"
+
+
+def test_zlib_payload_is_readable_without_zstandard():
+    import zlib
+    assert decompress("zlib", zlib.compress(b"abc")) == b"abc"
+
+
+class FakeCursor:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+
+    def fetchone(self):
+        return {"?column?": 1}
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.named = FakeCursor(rows)
+        self.plain = FakeCursor()
+
+    def cursor(self, name=None):
+        return self.named if name else self.plain
+
+
+def test_migrated_raw_json_is_compressed_in_batches(monkeypatch):
+    raw = '{"model_data": {"bus": [' + ", ".join(['{"idtag": "B"}'] * 200) + "]}}"
+    written = []
+    monkeypatch.setattr(payloads_repo, "_MIGRATION_BATCH_ROWS", 2)
+    monkeypatch.setattr(payloads_repo, "execute_values", lambda cur, query, rows: written.append(rows))
+    conn = FakeConnection([{"id": i, "raw": raw} for i in range(5)])
+    payloads_repo.move_raw_json(conn)
+    assert [len(rows) for rows in written] == [2, 2, 1]
+    for grid_id, codec, raw_size, data in sum(written, []):
+        assert codec != "none"
+        assert raw_size == len(raw)
+        assert decompress(codec, bytes(data.adapted)) == raw.encode("utf-8")
+    assert conn.plain.executed[-1] == "ALTER TABLE grids DROP COLUMN raw_json;"
+    assert "current_schema()" in conn.plain.executed[-2]
+
+
+def test_uncompressed_payloads_are_recompressed(monkeypatch):
+    written = []
+    monkeypatch.setattr(payloads_repo, "execute_values", lambda cur, query, rows: written.append(rows))
+    payloads_repo.compress_stored_payloads(FakeConnection([{"grid_id": 7, "data": memoryview(b"x" * 1000)}]))
+    (grid_id, codec, raw_size, data), = written[0]
+    assert (grid_id, raw_size) == (7, 1000)
+    assert decompress(codec, bytes(data.adapted)) == b"x" * 1000
@@ -0,0 +1,112 @@
+import pytest
+from psycopg2 import extensions
+from db.pool import ConnectionPool, PoolClosedError, PoolExhaustedError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    options = {"min_size": 0, "max_size": 2, "checkout_timeout": 0.05, "health_check_after": 60}
+    options.update(kwargs)
+    return ConnectionPool(connect, **options), created
+
+
+def test_returned_connection_is_reused():
+    pool, created = make_pool()
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert len(created) == 1
+    assert pool.stats()["reused"] == 1
+
+
+def test_idle_connections_are_handed_out_lifo():
+    pool, _ = make_pool()
+    first, second = pool.getconn(), pool.getconn()
+    pool.putconn(first)
+    pool.putconn(second)
+    assert pool.getconn() is second
+
+
+def test_exhausted_pool_times_out():
+    pool, _ = make_pool(max_size=1)
+    pool.getconn()
+    with pytest.raises(PoolExhaustedError):
+        pool.getconn()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_open_transaction_is_rolled_back_on_return():
+    pool, _ = make_pool()
+    conn = pool.getconn()
+    conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.rollbacks == 1
+    assert not conn.closed
+
+
+def test_discarded_connection_is_closed_and_frees_its_slot():
+    pool, created = make_pool(max_size=1)
+    conn = pool.getconn()
+    pool.putconn(conn, discard=True)
+    assert conn.closed
+    assert pool.getconn() is not conn
+    assert len(created) == 2
+
+
+def test_failed_connect_frees_its_slot():
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("connection refused")
+        return FakeConnection()
+
+    pool = ConnectionPool(connect, min_size=0, max_size=1, checkout_timeout=0.05)
+    with pytest.raises(RuntimeError):
+        pool.getconn()
+    assert pool.getconn() is not None
+
+
+def test_warm_opens_min_size_connections():
+    pool, created = make_pool(min_size=2)
+    pool.warm()
+    assert len(created) == 2
+    assert pool.stats()["idle"] == 2
+
+
+def test_closed_pool_refuses_checkouts():
+    pool, created = make_pool()
+    pool.putconn(pool.getconn())
+    pool.close()
+    assert created[0].closed
+    with pytest.raises(PoolClosedError):
+        pool.getconn()
+
+
+def test_invalid_bounds_are_rejected():
+    with pytest.raises(ValueError):
+        ConnectionPool(FakeConnection, min_size=3, max_size=2)
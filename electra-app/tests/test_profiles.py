@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from repositories.profiles_repo import PROFILE_COLUMNS, decode_profile, encode_profile, profile_dict, split_profiles
+
+
+def as_row(encoded):
+    return dict(zip(PROFILE_COLUMNS[4:], encoded))
+
+
+def dense(values, default=0.0):
+    return {"is_sparse": False, "size": len(values), "default": default, "dense_data": values}
+
+
+@pytest.mark.parametrize("values, encoding", [
+    ([1.5] * 50, "const"),
+    ([1.0] * 100 + [2.0] * 100 + [1.0] * 100, "rle"),
+    (list(np.linspace(0.0, 1.0, 200)), "dense"),
+    ([0.1, 0.2, 0.3], "dense"),
+    ([True, False, False, True], "dense"),
+    ([False] * 300 + [True] * 300, "rle"),
+])
+def test_dense_profiles_round_trip(values, encoding):
+    default = False if isinstance(values[0], bool) else 0.0
+    encoded = encode_profile(dense(values, default))
+    assert encoded[0] == encoding
+    decoded = decode_profile(as_row(encoded))
+    np.testing.assert_array_equal(decoded, np.asarray(values))
+    assert decoded.dtype == (np.bool_ if isinstance(values[0], bool) else np.float64)
+
+
+def test_large_dense_profile_is_compressed():
+    values = list(np.round(np.sin(np.arange(8760) / 24.0), 2))
+    encoded = encode_profile(dense(values))
+    assert encoded[4] != "none"
+    np.testing.assert_array_equal(decode_profile(as_row(encoded)), values)
+
+
+def test_sparse_profile_round_trips():
+    profile = {"is_sparse": True, "size": 10, "default": 1.0, "sparse_data": {"map": {"2": 0.5, "7": 3.0}}}
+    encoded = encode_profile(profile)
+    assert encoded[0] == "sparse"
+    expected = np.ones(10)
+    expected[2], expected[7] = 0.5, 3.0
+    np.testing.assert_array_equal(decode_profile(as_row(encoded)), expected)
+    assert profile_dict(as_row(encoded)) == profile
+
+
+def test_empty_sparse_profile_is_const():
+    profile = {"is_sparse": True, "size": 4, "default": True, "sparse_data": {"map": {}}}
+    encoded = encode_profile(profile)
+    assert encoded[:2] == ("const", "|b1")
+    np.testing.assert_array_equal(decode_profile(as_row(encoded)), [True] * 4)
+    assert profile_dict(as_row(encoded)) == profile
+
+
+def test_profile_dict_restores_dense_form():
+    profile = dense([1.0, 2.0, 2.0, 3.0])
+    assert profile_dict(as_row(encode_profile(profile))) == profile
+
+
+@pytest.mark.parametrize("profile", [
+    None,
+    [1.0, 2.0],
+    {"size": 2, "dense_data": [1.0, 2.0]},
+    dense(["B1", "B2"], default=None),
+    {"is_sparse": False, "size": 2, "default": 0.0},
+])
+def test_other_profiles_stay_json(profile):
+    assert encode_profile(profile) is None
+
+
+def test_split_profiles_moves_numeric_profiles():
+    bus_prof = dense(["B1", "B2"], default=None)
+    elements = [
+        {"idtag": "D1", "p_prof": dense([1.0, 2.0]), "bus_prof": bus_prof, "name": "load"},
+        {"idtag": "D1", "p_prof": dense([5.0, 6.0])},
+        {"idtag": "", "p_prof": dense([1.0, 2.0])},
+    ]
+    stripped, rows = split_profiles(7, "load", elements)
+    assert stripped[0] == {"idtag": "D1", "p_prof": None, "bus_prof": bus_prof, "name": "load"}
+    assert elements[0]["p_prof"] is not None
+    assert stripped[2] is elements[2]
+    assert [row[:4] for row in rows] == [(7, "load", "D1", "p_prof")]
+    np.testing.assert_array_equal(decode_profile(dict(zip(PROFILE_COLUMNS, rows[0]))), [1.0, 2.0])
+
+
+def test_unknown_encoding_is_rejected():
+    row = {"dtype": "<f8", "size": 1, "encoding": "delta", "default_value": None, "codec": "none", "data": b""}
+    with pytest.raises(ValueError):
+        decode_profile(row)
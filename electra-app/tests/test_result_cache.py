@@ -0,0 +1,45 @@
+from services import result_cache
+from services.result_cache import TTLCache
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = TTLCache(max_entries=2, ttl=0)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: clock[0])
+    cache = TTLCache(max_entries=4, ttl=10)
+    cache.put("a", 1)
+    clock[0] += 9
+    assert cache.get("a") == 1
+    clock[0] += 2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"]) == (1, 1, 1)
+
+
+def test_zero_sized_cache_stores_nothing():
+    cache = TTLCache(max_entries=0, ttl=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_evict_grid_clears_every_cache_of_that_grid_only():
+    result_cache.power_flow_cache.put((1, "h1"), "frames")
+    result_cache.power_flow_cache.put((2, "h2"), "frames")
+    result_cache.sensitivity_cache.put((1, "h1"), "model")
+    result_cache.warm_start_cache.put(1, "voltages")
+    try:
+        assert result_cache.evict_grid(1) == 3
+        assert result_cache.power_flow_cache.get((2, "h2")) == "frames"
+        assert result_cache.warm_start_cache.get(1) is None
+    finally:
+        result_cache.evict_grid(2)
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("VeraGridEngine")
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from services import sensitivity
+
+# Triangle 0-1-2 with bus 0 as slack, plus a radial branch to bus 3
+F = np.array([0, 1, 0, 2])
+T = np.array([1, 2, 2, 3])
+X = np.array([0.1, 0.2, 0.25, 0.1])
+RATES = np.array([100.0, 50.0, 80.0, 60.0])
+P = np.array([0.0, -50.0, -30.0, -40.0])
+IDTAGS = np.array(["L01", "L12", "L02", "L23"], dtype=object)
+
+
+def dc_flows(active):
+    """Brute-force DC branch flows with the given branches in service."""
+    b = np.where(active, 1.0 / X, 0.0)
+    rows = np.arange(F.size)
+    A = sp.csc_matrix((np.r_[np.ones(F.size), -np.ones(F.size)], (np.r_[rows, rows], np.r_[F, T])), shape=(F.size, 4))
+    Bf = sp.diags(b) @ A
+    Bbus = (A.T @ Bf).toarray()
+    theta = np.zeros(4)
+    theta[1:] = np.linalg.solve(Bbus[1:, 1:], P[1:])
+    return Bf @ theta
+
+
+def dc_model():
+    b = 1.0 / X
+    rows = np.arange(F.size)
+    A = sp.csc_matrix((np.r_[np.ones(F.size), -np.ones(F.size)], (np.r_[rows, rows], np.r_[F, T])), shape=(F.size, 4))
+    Bf = (sp.diags(b) @ A).tocsc()
+    Bbus = (A.T @ Bf).tocsc()
+    keep = np.arange(1, 4)
+    return {
+        "lu": spla.splu(Bbus[keep][:, keep].tocsc()),
+        "A": A[:, keep].tocsr(),
+        "Bf": Bf[:, keep].tocsr(),
+        "in_service": np.ones(F.size, dtype=bool),
+        "idtags": IDTAGS,
+        "names": IDTAGS,
+        "rates": RATES,
+    }
+
+
+def test_outage_loadings_match_brute_force():
+    base = dc_flows(np.ones(F.size, dtype=bool))
+    result = sensitivity.screen_outages(dc_model(), base, ["L01", "L12", "L02"], max_loading=100.0, margin=0.0)
+    assert result["screened"] == 3
+    assert result["islanding"] == 0
+    estimates = {e["contingency"]: e for e in result["estimates"]}
+    for k, idtag in enumerate(IDTAGS[:3]):
+        active = np.ones(F.size, dtype=bool)
+        active[k] = False
+        loading = np.abs(dc_flows(active)) / RATES * 100.0
+        assert estimates[idtag]["dc_loading"] == pytest.approx(loading.max())
+        assert estimates[idtag]["element"] == IDTAGS[loading.argmax()]
+
+
+def test_only_outages_over_the_margin_are_flagged():
+    base = dc_flows(np.ones(F.size, dtype=bool))
+    worst = {}
+    for k, idtag in enumerate(IDTAGS[:3]):
+        active = np.ones(F.size, dtype=bool)
+        active[k] = False
+        worst[idtag] = (np.abs(dc_flows(active)) / RATES * 100.0).max()
+    threshold = sorted(worst.values())[1]
+    result = sensitivity.screen_outages(dc_model(), base, list(worst), max_loading=threshold, margin=1.0)
+    assert sorted(result["flagged"]) == sorted(i for i, v in worst.items() if v >= threshold - 1e-9)
+
+
+def test_radial_outage_is_flagged_as_islanding():
+    base = dc_flows(np.ones(F.size, dtype=bool))
+    result = sensitivity.screen_outages(dc_model(), base, ["L23"], max_loading=100.0, margin=10.0)
+    assert result["islanding"] == 1
+    assert result["flagged"] == ["L23"]
+
+
+def test_unknown_and_out_of_service_branches_are_skipped():
+    model = dc_model()
+    model["in_service"] = np.array([True, False, True, True])
+    base = dc_flows(np.ones(F.size, dtype=bool))
+    result = sensitivity.screen_outages(model, base, ["L12", "nope", "L01"], max_loading=100.0, margin=0.9)
+    assert result["screened"] == 1
+    assert [e["contingency"] for e in result["estimates"]] == ["L01"]
+
+
+def test_blocks_give_the_same_result(monkeypatch):
+    base = dc_flows(np.ones(F.size, dtype=bool))
+    whole = sensitivity.screen_outages(dc_model(), base, list(IDTAGS), max_loading=100.0, margin=0.9)
+    monkeypatch.setattr(sensitivity, "BLOCK_SIZE", 1)
+    blocked = sensitivity.screen_outages(dc_model(), base, list(IDTAGS), max_loading=100.0, margin=0.9)
+    for a, b in zip(whole["estimates"], blocked["estimates"]):
+        assert a["contingency"] == b["contingency"]
+        assert a["dc_loading"] == pytest.approx(b["dc_loading"])
+    assert whole["flagged"] == blocked["flagged"]
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+import json
+import numpy as np
+import pandas as pd
+from services.serialization import dumps, df_records
+
+
+def test_numpy_values_and_non_finite_floats():
+    body = json.loads(dumps({
+        "vm": np.array([1.0, np.nan]),
+        "n": np.int64(3),
+        "inf": float("inf"),
+        "flags": np.array([True, False]),
+    }))
+    assert body == {"vm": [1.0, None], "n": 3, "inf": None, "flags": [True, False]}
+
+
+def test_fallback_types():
+    body = json.loads(dumps({
+        "d": Decimal("1.5"),
+        "t": pd.Timestamp("2024-01-01T00:00:00"),
+        "when": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        1: "int key",
+    }))
+    assert body["d"] == 1.5
+    assert body["t"].startswith("2024-01-01T00:00:00")
+    assert body["when"] == "2024-01-01T00:00:00+00:00"
+    assert body["1"] == "int key"
+
+
+def test_frame_index_becomes_the_name_field():
+    df = pd.DataFrame({"Vm": [1.0, 0.98]}, index=["B1", "B2"])
+    assert df_records(df) == [{"name": "B1", "Vm": 1.0}, {"name": "B2", "Vm": 0.98}]
@@ -0,0 +1,34 @@
+from repositories.copy_util import _encode
+from psycopg2.extras import Json
+from services.status_sync import state_hash
+
+
+def test_hash_ignores_insertion_order():
+    a = {"line": {"L1": True, "L2": False}, "bus": {"B1": True}}
+    b = {"bus": {"B1": True}, "line": {"L2": False, "L1": True}}
+    assert state_hash(a) == state_hash(b)
+
+
+def test_hash_changes_when_one_element_flips():
+    before = {"line": {"L1": True, "L2": True}}
+    after = {"line": {"L1": True, "L2": False}}
+    assert state_hash(before) != state_hash(after)
+
+
+def test_hash_separates_element_types():
+    assert state_hash({"line": {"X": True}}) != state_hash({"load": {"X": True}})
+
+
+def test_hash_separates_idtag_boundaries():
+    assert state_hash({"line": {"ab": True, "c": True}}) != state_hash({"line": {"a": True, "bc": True}})
+
+
+def test_copy_encoding_of_special_values():
+    assert _encode(None) == "\\N"
+    assert _encode(True) == "t"
+    assert _encode(float("nan")) == "NaN"
+    assert _encode(float("-inf")) == "-Infinity"
+    assert _encode(0.1) == "0.1"
+    assert _encode("a\tb\nc\\") == "a\\tb\\nc\\\\"
+    assert _encode(b"\x01\xff") == "\\\\x01ff"
+    assert _encode(Json({"k": [1, 2]})) == '{"k": [1, 2]}'
@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+import pytest
+from fastapi import HTTPException
+from repositories import element_status_repo
+
+
+@pytest.fixture
+def status_batch(monkeypatch):
+    pytest.importorskip("VeraGridEngine")
+    from services import status_batch
+
+    @contextmanager
+    def transaction():
+        yield None
+
+    monkeypatch.setattr(status_batch, "transaction", transaction)
+    monkeypatch.setattr(status_batch, "get_tmp_file_path", lambda grid_id: "/nonexistent/grid.veragrid")
+    return status_batch
+
+
+class FakeConnection:
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_id_and_idtag_items_are_updated_by_separate_statements(monkeypatch):
+    statements = []
+
+    def execute_values(cur, query, values, template, page_size, fetch):
+        statements.append((template, values))
+        return [{"id": i, "idtag": None, "active": False} for i in range(len(values))]
+
+    monkeypatch.setattr(element_status_repo, "get_conn", FakeConnection)
+    monkeypatch.setattr(element_status_repo, "execute_values", execute_values)
+    rows = element_status_repo.update_status_batch(1, "line", [(5, None, False), (None, "L2", True), (6, None, True)])
+    assert statements == [
+        ("(%s::integer, %s::boolean)", [(5, False), (6, True)]),
+        ("(%s::text, %s::boolean)", [("L2", True)]),
+    ]
+    assert len(rows) == 3
+
+
+@pytest.mark.parametrize("item", [
+    {"element_type": "line", "id": 1, "idtag": "L1", "active": False},
+    {"element_type": "line", "id": None, "idtag": None, "active": False},
+    {"element_type": "line", "id": None, "idtag": "", "active": False},
+])
+def test_items_must_name_exactly_one_key(status_batch, item):
+    with pytest.raises(HTTPException) as e:
+        status_batch.update_status_batch(1, [item])
+    assert e.value.status_code == 400
+
+
+def test_repeated_keys_are_rejected(status_batch):
+    items = [
+        {"element_type": "load", "id": None, "idtag": "D1", "active": False},
+        {"element_type": "load", "id": None, "idtag": "D1", "active": True},
+    ]
+    with pytest.raises(HTTPException) as e:
+        status_batch.update_status_batch(1, items)
+    assert e.value.status_code == 400
+
+
+def test_same_key_in_different_types_is_allowed(status_batch, monkeypatch):
+    monkeypatch.setattr(
+        status_batch, "repo_update_status_batch",
+        lambda grid_id, element_type, rows: [{"id": 1, "idtag": "X", "active": rows[0][2]}],
+    )
+    items = [
+        {"element_type": "load", "id": None, "idtag": "X", "active": True},
+        {"element_type": "shunt", "id": None, "idtag": "X", "active": True},
+    ]
+    assert status_batch.update_status_batch(1, items)["updated"] == {"load": 1, "shunt": 1}
+
+
+def test_row_named_by_id_and_by_idtag_is_rejected(status_batch, monkeypatch):
+    monkeypatch.setattr(
+        status_batch, "repo_update_status_batch",
+        lambda grid_id, element_type, rows: [{"id": 3, "idtag": "L3", "active": False}] * 2,
+    )
+    items = [
+        {"element_type": "line", "id": 3, "idtag": None, "active": False},
+        {"element_type": "line", "id": None, "idtag": "L3", "active": False},
+    ]
+    with pytest.raises(HTTPException) as e:
+        status_batch.update_status_batch(1, items)
+    assert e.value.status_code == 400
+
+
+def test_unknown_elements_are_reported(status_batch, monkeypatch):
+    monkeypatch.setattr(status_batch, "repo_update_status_batch", lambda grid_id, element_type, rows: [])
+    with pytest.raises(HTTPException) as e:
+        status_batch.update_status_batch(1, [{"element_type": "line", "id": 9, "idtag": None, "active": False}])
+    assert e.value.status_code == 404
+    assert "9" in e.value.detail
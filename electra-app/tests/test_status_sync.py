@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+from services.status_sync import build_status_index, apply_status, summarize
+
+
+def device(idtag, active=True):
+    return SimpleNamespace(idtag=idtag, active=active)
+
+
+def circuit(**collections):
+    empty = {name: [] for name in ("buses", "generators", "loads", "shunts", "lines", "transformers2w")}
+    return SimpleNamespace(**{**empty, **collections})
+
+
+def test_index_groups_rows_by_type_and_skips_unknown_status():
+    index = build_status_index([
+        {"element_type": "line", "idtag": "L1", "active": True},
+        {"element_type": "line", "idtag": "L2", "active": False},
+        {"element_type": "bus", "idtag": "B1", "active": None},
+    ])
+    assert index["line"] == {"L1": True, "L2": False}
+    assert index["bus"] == {}
+    assert set(index) >= {"bus", "generator", "load", "shunt", "line", "transformer2w"}
+
+
+def test_apply_status_only_reports_flipped_devices():
+    lines = [device("L1", True), device("L2", True), device("L3", False)]
+    grid = circuit(lines=lines)
+    changed = apply_status(grid, {"line": {"L1": True, "L2": False, "L3": True}})
+    assert changed == {"line": ["L2", "L3"]}
+    assert [d.active for d in lines] == [True, False, True]
+
+
+def test_apply_status_leaves_devices_missing_from_the_index():
+    loads = [device("D1", False)]
+    assert apply_status(circuit(loads=loads), {"load": {"other": True}}) == {}
+    assert loads[0].active is False
+
+
+def test_applying_the_same_index_twice_changes_nothing():
+    grid = circuit(buses=[device("B1", True)], generators=[device("G1", True)])
+    index = {"bus": {"B1": False}, "generator": {"G1": False}}
+    assert summarize(apply_status(grid, index)) == {"bus": 1, "generator": 1}
+    assert apply_status(grid, index) == {}
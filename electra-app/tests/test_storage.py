@@ -0,0 +1,117 @@
+import asyncio
+import os
+import hashlib
+import pytest
+from fastapi import HTTPException
+from services import storage
+
+
+class Upload:
+    def __init__(self, data: bytes, filename: str = "grid.veragrid", size=None):
+        self._data = data
+        self._pos = 0
+        self.filename = filename
+        self.size = size
+
+    async def read(self, n: int) -> bytes:
+        chunk = self._data[self._pos:self._pos + n]
+        self._pos += len(chunk)
+        return chunk
+
+
+@pytest.fixture
+def storage_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_DIR", str(tmp_path))
+    monkeypatch.setattr(storage, "CHUNK_SIZE", 4)
+    return tmp_path
+
+
+def test_upload_is_streamed_to_disk_with_its_hash(storage_dir):
+    data = b"0123456789"
+    stored = asyncio.run(storage.store_upload(Upload(data)))
+    assert stored["size"] == len(data)
+    assert stored["sha256"] == hashlib.sha256(data).hexdigest()
+    assert stored["path"].endswith(".veragrid")
+    with open(stored["path"], "rb") as f:
+        assert f.read() == data
+
+
+def test_oversized_upload_is_rejected_and_removed(storage_dir, monkeypatch):
+    monkeypatch.setattr(storage, "MAX_UPLOAD_BYTES", 6)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(storage.store_upload(Upload(b"0123456789")))
+    assert e.value.status_code == 413
+    assert os.listdir(storage_dir) == []
+
+
+def test_empty_upload_is_rejected(storage_dir):
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(storage.store_upload(Upload(b"")))
+    assert e.value.status_code == 400
+    assert os.listdir(storage_dir) == []
+
+
+def test_declared_length_check(monkeypatch):
+    monkeypatch.setattr(storage, "MAX_UPLOAD_BYTES", 100)
+    assert not storage.request_too_large(None)
+    assert not storage.request_too_large("abc")
+    assert not storage.request_too_large(str(100 + storage._MULTIPART_OVERHEAD))
+    assert storage.request_too_large(str(101 + storage._MULTIPART_OVERHEAD))
+
+
+@pytest.fixture
+def upload_app(monkeypatch):
+    from fastapi import FastAPI, File, UploadFile
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(storage, "MAX_UPLOAD_BYTES", 1000)
+    monkeypatch.setattr(storage, "_MULTIPART_OVERHEAD", 200)
+    app = FastAPI()
+    reads = []
+
+    @app.post("/grid/files/upload")
+    async def upload(file: UploadFile = File(...)):
+        data = await file.read()
+        reads.append(len(data))
+        return {"size": len(data)}
+
+    app.add_middleware(storage.UploadSizeLimit)
+    client = TestClient(app)
+    client.reads = reads
+    return client
+
+
+def multipart(data: bytes) -> tuple[bytes, str]:
+    boundary = "limit-test"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"g.veragrid\"\r\n"
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def chunked(body: bytes, size: int = 100):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def test_declared_oversized_upload_is_refused(upload_app):
+    body, content_type = multipart(b"x" * 5000)
+    response = upload_app.post("/grid/files/upload", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 413
+    assert upload_app.reads == []
+
+
+def test_chunked_oversized_upload_is_cut_off(upload_app):
+    body, content_type = multipart(b"x" * 5000)
+    response = upload_app.post("/grid/files/upload", content=chunked(body), headers={"Content-Type": content_type})
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Uploaded file exceeds 1000 bytes"
+    assert upload_app.reads == []
+
+
+def test_chunked_upload_within_the_limit_passes(upload_app):
+    body, content_type = multipart(b"x" * 900)
+    response = upload_app.post("/grid/files/upload", content=chunked(body), headers={"Content-Type": content_type})
+    assert response.status_code == 200
+    assert response.json() == {"size": 900}
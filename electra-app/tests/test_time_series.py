@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("VeraGridEngine")
+from services import time_series
+
+
+@pytest.mark.parametrize("start, end, chunks", [(0, 8760, 8), (5, 100, 3), (0, 10, 4), (0, 1, 16), (3, 3, 2)])
+def test_chunks_cover_the_range_without_overlap(start, end, chunks):
+    bounds = time_series._chunk_bounds(start, end, chunks)
+    assert len(bounds) <= chunks
+    assert [lo for lo, _ in bounds[1:]] == [hi for _, hi in bounds[:-1]]
+    if end > start:
+        assert bounds[0][0] == start and bounds[-1][1] == end
+    else:
+        assert bounds == []
+
+
+def test_chunks_are_not_smaller_than_the_minimum(monkeypatch):
+    monkeypatch.setattr(time_series, "MIN_CHUNK_STEPS", 24)
+    assert time_series._chunk_bounds(0, 48, 8) == [(0, 24), (24, 48)]
+    assert time_series._chunk_bounds(0, 50, 8) == [(0, 17), (17, 33), (33, 50)]
+    assert time_series._chunk_bounds(0, 10, 8) == [(0, 10)]
+
+
+def test_chunks_are_balanced():
+    sizes = [hi - lo for lo, hi in time_series._chunk_bounds(0, 8760, 7)]
+    assert len(sizes) == 7
+    assert max(sizes) - min(sizes) <= 1
+
+
+def test_time_series_frame_has_one_column_per_step():
+    results = {
+        "time": [0, 3600],
+        "bus_names": ["B1", "B2", "B3"],
+        "branch_names": ["L1"],
+        "vm": np.array([[1.0, 0.99, 0.98], [1.0, 0.97, 0.96]], dtype=np.float32),
+        "loading": np.array([[50.0], [75.0]], dtype=np.float32),
+    }
+    vm = time_series.time_series_frame(results, "vm")
+    assert list(vm.index) == ["B1", "B2", "B3"]
+    assert list(vm.columns) == ["0", "3600"]
+    assert vm.loc["B3", "3600"] == pytest.approx(0.96)
+    loading = time_series.time_series_frame(results, "loading")
+    assert loading.shape == (1, 2)
+    assert loading.loc["L1", "3600"] == 75.0
@@ -0,0 +1,95 @@
+import asyncio
+from concurrent.futures import Future
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("VeraGridEngine")
+from fastapi import HTTPException
+from services import grid as grid_service
+from services.workers import PoolSaturatedError
+
+COUNTS = {
+    "grid_id": 5, "buses_saved": 2, "lines_saved": 1, "generators_saved": 1,
+    "loads_saved": 1, "shunts_saved": 0, "transformers2w_saved": 0,
+}
+
+
+class FakePool:
+    def __init__(self, outcome=None, saturated=False):
+        self.outcome = outcome
+        self.saturated = saturated
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        if self.saturated:
+            raise PoolSaturatedError("ingest pool is full")
+        self.submitted.append((fn, args))
+        future = Future()
+        if isinstance(self.outcome, Exception):
+            future.set_exception(self.outcome)
+        else:
+            future.set_result(self.outcome)
+        return future
+
+
+@pytest.fixture
+def upload(monkeypatch, tmp_path):
+    path = tmp_path / "grid.veragrid"
+    path.write_bytes(b"grid")
+
+    async def store_upload(file):
+        return {"path": str(path), "size": 4, "sha256": "cd" * 32}
+
+    lookups = []
+    monkeypatch.setattr(grid_service, "store_upload", store_upload)
+    monkeypatch.setattr(grid_service, "find_grid_by_hash", lambda sha: lookups.append(sha))
+
+    def run(pool, **kwargs):
+        monkeypatch.setattr(grid_service, "get_pool", lambda name: pool)
+        return asyncio.run(grid_service.upload_file(None, **kwargs))
+
+    run.path = path
+    run.lookups = lookups
+    return run
+
+
+def test_new_file_is_ingested_on_the_pool(upload):
+    pool = FakePool(outcome=COUNTS)
+    response = upload(pool)
+    assert response["message"] == "Grid saved"
+    assert (response["grid_id"], response["buses_saved"], response["file_size"]) == (5, 2, 4)
+    assert pool.submitted == [(grid_service._ingest_file, (str(upload.path), "cd" * 32))]
+    assert upload.path.exists()
+
+
+def test_saturated_ingest_pool_is_a_429(upload):
+    with pytest.raises(HTTPException) as e:
+        upload(FakePool(saturated=True))
+    assert e.value.status_code == 429
+    assert not upload.path.exists()
+
+
+def test_unreadable_file_is_a_400(upload):
+    with pytest.raises(HTTPException) as e:
+        upload(FakePool(outcome=grid_service.InvalidGridFile("not a grid")))
+    assert (e.value.status_code, e.value.detail) == (400, "not a grid")
+    assert not upload.path.exists()
+
+
+def test_other_ingest_errors_are_a_500(upload):
+    with pytest.raises(HTTPException) as e:
+        upload(FakePool(outcome=RuntimeError("database is down")))
+    assert (e.value.status_code, e.value.detail) == (500, "RuntimeError: database is down")
+    assert not upload.path.exists()
+
+
+def test_import_skips_the_duplicate_lookup(upload):
+    upload(FakePool(outcome=COUNTS), on_duplicate="import")
+    assert upload.lookups == []
+
+
+def test_unexpected_engine_output_is_an_invalid_file(monkeypatch):
+    monkeypatch.setattr(grid_service.gce, "open_file", lambda path: SimpleNamespace())
+    monkeypatch.setattr(grid_service.gce, "gather_model_as_jsons_for_communication", lambda circuit, instruction: "error")
+    with pytest.raises(grid_service.InvalidGridFile):
+        grid_service._ingest_file("/grid.veragrid")
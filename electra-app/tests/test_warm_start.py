@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+pytest.importorskip("VeraGridEngine")
+from services import power_flow
+from services.result_cache import TTLCache
+
+
+def make_circuit():
+    buses = [SimpleNamespace(idtag=f"B{i}", Vm0=1.0, Va0=0.0) for i in range(3)]
+    gen = SimpleNamespace(active=True, is_controlled=True, control_bus=None, bus=buses[1], Vset=1.03)
+    return SimpleNamespace(buses=buses, generators=[gen])
+
+
+GUESS = {"state_hash": "h", "bus_idtags": ["B0", "B1", "B9"], "vm": np.array([0.98, 0.97, 0.9]), "va": np.array([0.0, -0.1, 0.2])}
+
+
+@pytest.fixture
+def solves(monkeypatch):
+    """Record each power flow call with the Vm0 / Va0 the buses had; the next result comes from outcomes."""
+    calls = []
+    outcomes = []
+
+    def fake_power_flow(circuit, options=None):
+        calls.append((options, [(bus.Vm0, bus.Va0) for bus in circuit.buses]))
+        return SimpleNamespace(converged=outcomes.pop(0))
+
+    monkeypatch.setattr(power_flow.gce, "power_flow", fake_power_flow)
+    monkeypatch.setattr(power_flow.gce, "PowerFlowOptions", lambda **kw: kw)
+    return calls, outcomes
+
+
+def test_seed_sets_matching_buses_and_controlled_set_points():
+    circuit = make_circuit()
+    previous = power_flow._seed_voltages(circuit, GUESS)
+    assert [bus.idtag for bus, _, _ in previous] == ["B0", "B1"]
+    assert (circuit.buses[0].Vm0, circuit.buses[0].Va0) == (0.98, 0.0)
+    assert (circuit.buses[1].Vm0, circuit.buses[1].Va0) == (1.03, -0.1)
+    assert (circuit.buses[2].Vm0, circuit.buses[2].Va0) == (1.0, 0.0)
+
+
+def test_converged_warm_start_restores_the_file_voltages(solves):
+    calls, outcomes = solves
+    outcomes.append(True)
+    circuit = make_circuit()
+    results, warm_start = power_flow._run(1, circuit, GUESS)
+    assert results.converged and warm_start
+    assert calls == [({"use_stored_guess": True}, [(0.98, 0.0), (1.03, -0.1), (1.0, 0.0)])]
+    assert [(bus.Vm0, bus.Va0) for bus in circuit.buses] == [(1.0, 0.0)] * 3
+
+
+def test_failed_warm_start_falls_back_to_a_flat_start(solves):
+    calls, outcomes = solves
+    outcomes.extend([False, True])
+    circuit = make_circuit()
+    results, warm_start = power_flow._run(1, circuit, GUESS)
+    assert results.converged and not warm_start
+    assert len(calls) == 2
+    assert calls[1] == (None, [(1.0, 0.0)] * 3)
+
+
+def test_guess_without_known_buses_solves_once_from_a_flat_start(solves):
+    calls, outcomes = solves
+    outcomes.append(True)
+    guess = {**GUESS, "bus_idtags": ["X", "Y", "Z"]}
+    _, warm_start = power_flow._run(1, make_circuit(), guess)
+    assert not warm_start
+    assert calls == [(None, [(1.0, 0.0)] * 3)]
+
+
+def test_last_voltages_falls_back_to_the_database(monkeypatch):
+    monkeypatch.setattr(power_flow, "warm_start_cache", TTLCache(max_entries=4, ttl=60))
+    monkeypatch.setattr(power_flow, "WARM_START_DB", True)
+    reads = []
+    monkeypatch.setattr(power_flow.results_repo, "get_voltages", lambda grid_id: reads.append(grid_id) or GUESS)
+    assert power_flow._last_voltages(3) is GUESS
+    assert power_flow._last_voltages(3) is GUESS
+    assert reads == [3]
+
+
+def test_unreadable_voltages_mean_no_warm_start(monkeypatch):
+    monkeypatch.setattr(power_flow, "warm_start_cache", TTLCache(max_entries=4, ttl=60))
+    monkeypatch.setattr(power_flow, "WARM_START_DB", True)
+
+    def broken(grid_id):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(power_flow.results_repo, "get_voltages", broken)
+    assert power_flow._last_voltages(3) is None